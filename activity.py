@@ -0,0 +1,68 @@
+import heapq
+from itertools import count
+
+from aircraft import AircraftStatus
+
+# Какие самолёты модель шагает на каждом такте. Летящие двигаются и стоят в active в
+# порядке номеров модели, как шагали и раньше. Остальные только стареют: ждущему посадки
+# известен такт, на котором у него кончится топливо, и до этого такта модель его не трогает;
+# стоящий на земле ждёт вылета, который устраивает аэропорт; уничтоженный больше не
+# меняется вовсе. Время нешагаемых идёт от часов модели, см. Aircraft.suspend, так что
+# работа такта растёт с числом летящих, а не всех когда-либо созданных самолётов.
+
+class ActiveSet:
+    def __init__(self, order):
+        # order(aircraft) - номер самолёта в модели, в этом порядке они шагают
+        self._order = order
+        self._active = []
+        # новые и только что вылетевшие; встают в active на ближайшем шаге
+        self._joining = []
+        # (такт, номер, самолёт): на этом шаге у ждущего посадки кончится топливо
+        self._wakeups = []
+        self._seq = count()
+
+    def __len__(self):
+        return len(self._active) + len(self._joining)
+
+    def join(self, aircraft):
+        self._joining.append(aircraft)
+
+    def forget(self, aircrafts: set):
+        # самолёты ушли из модели (передача в другую область)
+        self._active = [x for x in self._active if x not in aircrafts]
+        self._joining = [x for x in self._joining if x not in aircrafts]
+
+    def step(self, tick: int):
+        stepping = self._active
+        extra = self._joining
+        self._joining = []
+
+        wakeups = self._wakeups
+        while wakeups and wakeups[0][0] <= tick:
+            _, _, aircraft = heapq.heappop(wakeups)
+            # запись прошлой посадки или уже сгоревшего самолёта пропускается
+            if aircraft.idle and aircraft.status == AircraftStatus.Landing and not aircraft.destroyed:
+                # time() уже считает этот такт, а шаг сделает его сам
+                if aircraft.time - 1 >= aircraft.life_time():
+                    aircraft.resume(tick - 1)
+                    extra.append(aircraft)
+
+        if extra:
+            extra = sorted(dict.fromkeys(extra), key=self._order)
+            stepping = list(heapq.merge(stepping, extra, key=self._order)) if stepping else extra
+
+        active = []
+        for aircraft in stepping:
+            aircraft.step()
+            if aircraft.status == AircraftStatus.EnRoute and not aircraft.destroyed:
+                active.append(aircraft)
+            else:
+                self._suspend(aircraft, tick)
+        self._active = active
+
+    def _suspend(self, aircraft, tick: int):
+        aircraft.suspend(tick)
+        if aircraft.status == AircraftStatus.Landing and not aircraft.destroyed:
+            # сгорит на шаге, перед которым time дойдёт до life_time()
+            wake = tick + 1 + max(0, aircraft.life_time() - aircraft.time)
+            heapq.heappush(self._wakeups, (wake, next(self._seq), aircraft))
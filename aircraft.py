@@ -1,12 +1,15 @@
 from enum import Enum
+from collections import namedtuple
 from vector import Vec2d
 import airport
-from random import randint
+import random
 from purpose import Purpose
-import pyray as rl
+from events import EventKind
 import math
+import os
 from drawable import Drawable
 from stepable import Stepable
+from history import VisitHistory
 
 class AircraftStatus(Enum):
     EnRoute = 1
@@ -14,7 +17,55 @@ class AircraftStatus(Enum):
     Landed = 3
 
 
+# неизменяемый снимок самолёта, по которому рисует GUI, пока модель считает дальше
+class AircraftState(namedtuple('AircraftState', 'entity pos heading status destroyed conflict')):
+    __slots__ = ()
+
+    def draw(self):
+        import pyray as rl
+
+        if not self.status == AircraftStatus.EnRoute:
+            return
+        
+        pos = self.pos
+
+        color = rl.PURPLE
+        
+        if self.destroyed:
+            if not self.entity._marked:
+                color = rl.RED
+            rl.draw_poly(pos.Vector2(), 4, 5, math.pi / 4, color)
+            #rl.draw_texture_ex(self._texture, self.pos.Vector2(), 0, 0.1, rl.WHITE)
+        else:  
+            if not self.entity._marked:
+                # в опасном сближении с другим самолётом, см. conflicts.py
+                color = rl.ORANGE if self.conflict else rl.BLACK
+
+            # угол и смещение спрайта посчитаны один раз на перелёт, см. Aircraft.heading
+            angle_deg, dx, dy = self.heading
+            rl.draw_texture_ex(Aircraft._texture, rl.Vector2(pos.x - dx, pos.y - dy), angle_deg, 1, color)
+
+    def bounds(self):
+        # прямоугольник вокруг круга из check_collision
+        size = Aircraft._texture_size
+        x = self.pos.x - size / 2
+        y = self.pos.y - size / 2
+        return x - size, y - size, x + size, y + size
+
+    def check_collision(self, mouse) -> bool:
+        import pyray as rl
+
+        size = Aircraft._texture_size
+        return rl.check_collision_point_circle(mouse, rl.Vector2(self.pos.x - size / 2, self.pos.y - size / 2), size)
+
+
 class Aircraft(Drawable, Stepable):
+    __slots__ = (
+        '__name', '__destination', '__pos', '__speed', '__max_flight_time', '__stop_time',
+        '_weight_fueled', '__max_weight', '__purpose', '__time', '__status', '__destroyed',
+        '__history', '__model', '__rng', '_fleet', '_row', '_heading', '_idle_since',
+    )
+
     _texture = None
     _texture_size = 12
     
@@ -33,7 +84,8 @@ class Aircraft(Drawable, Stepable):
         Stepable.__init__(self)
         self.__name = name
         self.__destination = destination
-        self.__pos = pos
+        # позиция меняется на месте, поэтому храним свою копию
+        self.__pos = Vec2d(pos.x, pos.y)
         self.__speed = speed
         self.__max_flight_time = maxFlightTime
         self.__stop_time = stopTime
@@ -49,31 +101,63 @@ class Aircraft(Drawable, Stepable):
 
         self.__status = AircraftStatus.EnRoute
         self.__destroyed = False
-        self.__visited_airports = []
+        self.__history = VisitHistory()
+        self.__model = None
+        # пока модель не выдала свой поток, случайные числа берутся из глобального random
+        self.__rng = random
+        self._fleet = None
+        self._row = -1
+        self._heading = None
+        # такт модели, с которого самолёт не шагают, см. suspend
+        self._idle_since = None
         
     @staticmethod
-    def load():
+    def load(source: str = 'img/airplane2.png'):
+        import pyray as rl
+
         if Aircraft._texture is None:
-            img = rl.load_image('img/airplane2.png')
-            rl.image_resize(img, Aircraft._texture_size, Aircraft._texture_size)
-            rl.image_rotate(img, 45)
+            # уменьшенный и повёрнутый спрайт сохраняется рядом с исходным, чтобы
+            # не обрабатывать картинку при каждом запуске
+            cached = Aircraft._sprite_cache_path(source)
+            if os.path.exists(cached):
+                img = rl.load_image(cached)
+            else:
+                img = rl.load_image(source)
+                rl.image_resize(img, Aircraft._texture_size, Aircraft._texture_size)
+                rl.image_rotate(img, 45)
+                try:
+                    os.makedirs(os.path.dirname(cached), exist_ok=True)
+                    rl.export_image(img, cached)
+                except OSError:
+                    pass
             #img = rl.load_image_svg('img/airplane.svg', 10, 10)
             Aircraft._texture = rl.load_texture_from_image(img)
             rl.unload_image(img)
 
+    @staticmethod
+    def _sprite_cache_path(source: str) -> str:
+        # в имени всё, от чего зависит результат: размер, поворот и версия исходника
+        folder, name = os.path.split(source)
+        stem = os.path.splitext(name)[0]
+        stat = os.stat(source)
+        return os.path.join(folder, '.cache',
+                            f'{stem}-{Aircraft._texture_size}-45-{stat.st_size}-{stat.st_mtime_ns}.png')
+
     @staticmethod
     def unload():
+        import pyray as rl
+
         if Aircraft._texture is not None:
             rl.unload_texture(Aircraft._texture)
             Aircraft._texture = None
 
     @staticmethod
-    def new_rand(name: str, destination, pos):
-        speed = randint(5, 25) / 10.0
-        weightFueled = randint(150, 300)
-        maxWeight = randint(800, 1000)
-        maxFlightTime = randint(2500, 3500)
-        stopTime = randint(100, 300)
+    def new_rand(name: str, destination, pos, rng=random):
+        speed = rng.randint(5, 25) / 10.0
+        weightFueled = rng.randint(150, 300)
+        maxWeight = rng.randint(800, 1000)
+        maxFlightTime = rng.randint(2500, 3500)
+        stopTime = rng.randint(100, 300)
         purpose = Purpose.Military if destination.purpose == Purpose.Military else Purpose.Civil
 
         return Aircraft(name, destination, Vec2d(pos.x, pos.y), speed, 
@@ -87,20 +171,60 @@ class Aircraft(Drawable, Stepable):
         return self.__purpose
     @property
     def pos(self) -> Vec2d:
+        if self._fleet is not None:
+            return self._fleet.pos(self._row)
         return self.__pos
     @property
     def time(self) -> int:
+        if self._fleet is not None:
+            return self._fleet.time(self._row)
+        if self._idle_since is not None:
+            return self.__time + self.__model.tick - self._idle_since
         return self.__time
+    @property
+    def speed(self) -> float:
+        return self.__speed
+    @property
+    def stop_time(self) -> int:
+        return self.__stop_time
+    @property
+    def max_flight_time(self) -> int:
+        return self.__max_flight_time
+    @property
+    def max_weight(self) -> float:
+        return self.__max_weight
 
     @property
     def visited_airports(self) -> list[airport.Airport]:
-        return self.__visited_airports[:]
+        # последние history.HISTORY_SIZE посещённых, от старых к новым
+        return list(self.recent_visits())[::-1]
+
+    @property
+    def history(self) -> VisitHistory:
+        return self.__history
+
+    @property
+    def visits(self) -> int:
+        # сколько всего аэропортов самолёт посетил, включая вытесненные из истории
+        return self.__history.total
+
+    def recent_visits(self, n: int | None = None):
+        # последние посещённые аэропорты от новых к старым, без копирования истории
+        if self.__model is None:
+            return
+        airports = self.__model.airports
+        for i in self.__history.recent(n):
+            yield airports[i]
     
     @property
     def destroyed(self):
+        if self._fleet is not None:
+            return self._fleet.destroyed(self._row)
         return self.__destroyed
     @property
     def status(self):
+        if self._fleet is not None:
+            return self._fleet.status(self._row)
         return self.__status
     
     
@@ -110,6 +234,39 @@ class Aircraft(Drawable, Stepable):
     @destination.setter
     def destination(self, value: airport.Airport):
         self.__destination = value
+        self._heading = None
+        if self._fleet is not None:
+            self._fleet.retarget(self._row)
+
+    @property
+    def rng(self):
+        return self.__rng
+
+    def set_model(self, model):
+        self.__model = model
+
+    def set_rng(self, rng):
+        self.__rng = rng
+
+    def _notify_destroyed(self):
+        if self.__model is None:
+            return
+
+        # если самолёт уже стоял в очереди на посадку, он пропадает из неё
+        queue = self.destination if self.status == AircraftStatus.Landing else None
+        self.__model.events.publish(EventKind.Destroyed, self, queue)
+
+    def _restore(self, time: int, status: AircraftStatus, destroyed: bool, history: VisitHistory):
+        # изменяемая часть состояния из снимка; вызывается до привязки к флоту
+        self.__time = time
+        self.__status = status
+        self.__destroyed = destroyed
+        self.__history = history
+
+    def _bind(self, fleet, row: int):
+        # состояние полёта теперь хранится в строке row массивов fleet
+        self._fleet = fleet
+        self._row = row
 
     def _basic_info(self):
         return f'''{self.name}
@@ -121,63 +278,53 @@ destination: {self.destination.name}
 weight: {self.weight()}
 time: {self.time}
 life time: {self.life_time()}
-'''
+''' + self._conflict_info()
+
+    def _conflict_info(self):
+        if self.__model is None:
+            return ''
+        others = self.__model.conflicts_of(self)
+        if not others:
+            return ''
+        return 'conflicts: ' + ', '.join(x.name for x in others) + '\n'
     def _history_info(self):
-        hist = self.visited_airports
-        hist.reverse()
-
         info_text = ''
 
-        if hist:
-            info_text += '\nvisited airports:\n'
-            for i in hist[:5]:
+        if self.visits:
+            info_text += f'\nvisited airports ({self.visits}):\n'
+            for i in self.recent_visits(5):
                 info_text += f'{i.name}\n'
         return info_text
 
     def info(self) -> str:
         return self._basic_info() + self._history_info()
     
-    def draw(self):
-        if not self.status == AircraftStatus.EnRoute:
-            return
-        
+    @property
+    def heading(self) -> tuple[float, float, float]:
+        # (угол в градусах, смещение спрайта по x и y) на текущем перелёте. Самолёт летит
+        # по прямой к цели, так что всё это меняется только вместе с destination
+        if self._heading is None:
+            pos = self.pos
+            target = self.destination.pos
+            angle = math.atan2(target.y - pos.y, target.x - pos.x)
+            size = Aircraft._texture_size
+            self._heading = (math.degrees(angle),
+                             size * math.cos(angle + math.pi / 4), size * math.sin(angle + math.pi / 4))
+        return self._heading
+
+    def state(self) -> AircraftState:
         pos = self.pos
+        status = self.status
+        destroyed = self.destroyed
+        heading = self.heading if status == AircraftStatus.EnRoute and not destroyed else None
+        conflict = self.__model is not None and self.__model.in_conflict(self)
+        return AircraftState(self, Vec2d(pos.x, pos.y), heading, status, destroyed, conflict)
 
-        color = rl.PURPLE
-        
-        if self.destroyed:
-            if not self._marked:
-                color = rl.RED
-            rl.draw_poly(pos.Vector2(), 4, 5, math.pi / 4, color)
-            #rl.draw_texture_ex(self._texture, self.pos.Vector2(), 0, 0.1, rl.WHITE)
-        else:  
-            if not self._marked:
-                color = rl.BLACK
-                
-            dpos = self.destination.pos
-            line = (dpos - pos).normalize()
-            ox = Vec2d(1, 0)
-            
-            
-            angle_rad = rl.vector2_angle(ox.Vector2(), line.Vector2())
-            #расчёт угла поворота
-            #angle_rad = math.acos((ox.x * line.x + ox.y * line.y) / (ox.length() * line.length()))
-            #if line.y < 0:
-            #    angle_rad = -angle_rad
-            
-            angle_deg = angle_rad / (2 * math.pi) * 360 
-            
-            angle_dis = angle_rad + math.pi / 4
-            
-            displacement = (Aircraft._texture_size) * Vec2d(math.cos(angle_dis), math.sin(angle_dis))
-            #pos = pos - Vec2d(Aircraft._texture_size, Aircraft._texture_size)
-            
-            rl.draw_texture_ex(self._texture, (pos - displacement).Vector2(), angle_deg, 1, color)
-            #rl.draw_circle(round(pos.x), round(pos.y), 3, color)
-            
+    def draw(self):
+        self.state().draw()
     
     def check_collision(self, mouse) -> bool:
-        return rl.check_collision_point_circle(mouse, rl.Vector2(self.pos.x - self._texture_size / 2, self.pos.y - self._texture_size / 2), self._texture_size)
+        return self.state().check_collision(mouse)
 
     def step(self):
         #TODO переделать приземление
@@ -188,44 +335,113 @@ life time: {self.life_time()}
 
         self.__time += 1
 
+    def advance(self, ticks: int):
+        # то же, что ticks вызовов step(), если за это время самолёт не долетит
+        # и не будет уничтожен (это проверяет вызывающий)
+        if not self.__destroyed and self.__status == AircraftStatus.EnRoute:
+            self.__step_towards(self.destination.pos, self.__speed * ticks)
+
+        self.__time += ticks
+
+    def arrive(self):
+        # шаг, на котором самолёт долетает до цели
+        self.__pos.assign(self.destination.pos)
+        self.__land_request()
+        self.__time += 1
+
+    @property
+    def idle(self) -> bool:
+        return self._idle_since is not None
+
+    def suspend(self, tick: int):
+        # модель перестаёт шагать самолёт после такта tick: он не летит, и меняется у него
+        # только time, которое дальше считается от часов модели
+        self._idle_since = tick
+
+    def resume(self, tick: int):
+        # time, накопленное до такта tick, снова хранится в самолёте
+        self.__time += tick - self._idle_since
+        self._idle_since = None
+
     def can_depart(self):
-        return self.status == AircraftStatus.Landed and self.__time >= self.__stop_time
+        return self.status == AircraftStatus.Landed and self.time >= self.__stop_time
     
     def depart(self, destination: airport.Airport):
-        self.__visited_airports.append(self.__destination)
+        if self.__model is not None:
+            # номер аэропорта в модели; без модели номеров нет и история не ведётся
+            self.__history.append(self.__model.airport_id(self.__destination))
         self.__destination = destination
+        self._heading = None
+        self._idle_since = None
+
+        if self._fleet is not None:
+            self._fleet.depart(self._row)
+            return
+
         self.__status = AircraftStatus.EnRoute
         self.__time = 0
 
-    def depart_rand(self, destination: airport.Airport):
+    def rand_payload(self):
+        # груз на следующий рейс; у самолёта без груза его нет
+        return None
+
+    def depart_with(self, destination: airport.Airport, payload):
         self.depart(destination)
 
+    def depart_rand(self, destination: airport.Airport):
+        self.depart_with(destination, self.rand_payload())
+
     def __move(self):
         dpos = self.destination.pos
-        line = dpos - self.__pos
+        pos = self.__pos
+        dx = dpos.x - pos.x
+        dy = dpos.y - pos.y
 
-        if line.length() <= self.__speed:
-            self.__pos = dpos
+        if math.sqrt(dx * dx + dy * dy) <= self.__speed:
+            pos.assign(dpos)
             self.__land_request()
             return
         
-        self.__pos += line.normalize() * self.__speed
+        self.__step_towards(dpos, self.__speed)
+
+    def __step_towards(self, target: Vec2d, distance: float):
+        # сдвиг на distance к target в локальных числах: ни новых объектов, ни общих
+        # черновиков, которые делили бы модели в одном процессе или потоки
+        pos = self.__pos
+        dx = target.x - pos.x
+        dy = target.y - pos.y
+        length = math.sqrt(dx * dx + dy * dy)
+        if length == 0:
+            return
+        # порядок операций как у normalize_into и scale_, чтобы совпадать с векторным движком
+        pos.x = pos.x + distance * (dx / length)
+        pos.y = pos.y + distance * (dy / length)
 
     def __land_request(self):
         self.__status = AircraftStatus.Landing
         self.destination.land_request(self)
         
     def landed(self):
+        if self._fleet is not None:
+            self._fleet.landed(self._row)
+            return
         self.__status = AircraftStatus.Landed
 
     def life_time(self):
         return int(self.__max_flight_time * (self.weight() / self.__max_weight))
+
+    def life_time_with(self, payload):
+        # life_time() после загрузки payload, не меняя самолёт
+        return int(self.__max_flight_time * (self._weight_with(payload) / self.__max_weight))
     
     def left_time(self):
         return self.life_time() - self.time
     
     def weight(self):
         return self._weight_fueled
+
+    def _weight_with(self, payload):
+        return self._weight_fueled
     
     def __destroy_check(self):
         if self.__destroyed or self.__status == AircraftStatus.Landed:
@@ -233,8 +449,11 @@ life time: {self.life_time()}
 
         if self.__time >= self.life_time():
             self.__destroyed = True
+            self._notify_destroyed()
 
 class CargoAircraft(Aircraft):
+    __slots__ = ('__max_cargo_weight', '__cargo_weight')
+
     def __init__(self, 
                  name: str,
                  destination: airport.Airport, 
@@ -266,31 +485,39 @@ class CargoAircraft(Aircraft):
 
     def weight(self):
         return self._weight_fueled + self.cargo_weight
+
+    def _weight_with(self, payload: float):
+        return self._weight_fueled + payload
     
     @staticmethod
-    def new_rand(name: str, destination, pos):
-        speed = randint(5, 25) / 10.0
-        weightFueled = randint(150, 300)
-        maxWeight = randint(900, 1300)
-        maxFlightTime = randint(2500, 3500)
-        stopTime = randint(100, 300)
+    def new_rand(name: str, destination, pos, rng=random):
+        speed = rng.randint(5, 25) / 10.0
+        weightFueled = rng.randint(150, 300)
+        maxWeight = rng.randint(900, 1300)
+        maxFlightTime = rng.randint(2500, 3500)
+        stopTime = rng.randint(100, 300)
         purpose = Purpose.Military if destination.purpose == Purpose.Military else Purpose.Civil
-        maxCargoWeight = randint(100, 250) / 10.0
-        cargoWeight = randint(0, int(maxCargoWeight * 10)) / 10.0
+        maxCargoWeight = rng.randint(100, 250) / 10.0
+        cargoWeight = rng.randint(0, int(maxCargoWeight * 10)) / 10.0
 
         return CargoAircraft(name, destination, Vec2d(pos.x, pos.y), speed, 
                              maxFlightTime, stopTime,
                              weightFueled, maxWeight, purpose,
                              cargoWeight, maxCargoWeight)
     
-    def depart_rand(self, destination: airport.Airport):
-        self.cargo_weight = randint(0, round(self.max_cargo_weight * 100)) / 100.0
+    def rand_payload(self) -> float:
+        return self.rng.randint(0, round(self.max_cargo_weight * 100)) / 100.0
+
+    def depart_with(self, destination: airport.Airport, payload: float):
+        self.cargo_weight = payload
         self.depart(destination)
 
     def info(self):
         return self._basic_info() + f'\ncargo: {self.cargo_weight} T\n' + self._history_info()
     
 class PassengerAircraft(Aircraft):
+    __slots__ = ('__passangers', '__max_passangers')
+
     def __init__(self, 
                  name: str,
                  destination: airport.Airport, 
@@ -323,25 +550,32 @@ class PassengerAircraft(Aircraft):
     
     def weight(self):
         return self._weight_fueled + 0.07 * self.passangers
+
+    def _weight_with(self, payload: int):
+        return self._weight_fueled + 0.07 * int(payload)
     
     @staticmethod
-    def new_rand(name: str, destination, pos):
-        speed = randint(5, 25) / 10.0
-        weightFueled = randint(150, 300)
-        maxWeight = randint(1000, 1200)
-        maxFlightTime = randint(2500, 3500)
-        stopTime = randint(100, 300)
+    def new_rand(name: str, destination, pos, rng=random):
+        speed = rng.randint(5, 25) / 10.0
+        weightFueled = rng.randint(150, 300)
+        maxWeight = rng.randint(1000, 1200)
+        maxFlightTime = rng.randint(2500, 3500)
+        stopTime = rng.randint(100, 300)
         purpose = Purpose.Military if destination.purpose == Purpose.Military else Purpose.Civil
-        passengers = randint(50, 300)
-        maxPassengers = randint(100, 500)
+        passengers = rng.randint(50, 300)
+        maxPassengers = rng.randint(100, 500)
 
         return PassengerAircraft(name, destination, Vec2d(pos.x, pos.y), speed, 
                                  maxFlightTime, stopTime, 
                                  weightFueled, maxWeight, purpose,
                                  passengers, maxPassengers)
     
-    def depart_rand(self, destination: airport.Airport):
-        self.passangers = randint(0, self.max_passangers)
+    def rand_payload(self) -> int:
+        return self.rng.randint(0, self.max_passangers)
+
+    def depart_with(self, destination: airport.Airport, payload: int):
+        # из журнала число пассажиров приходит как float
+        self.passangers = int(payload)
         self.depart(destination)
 
     def info(self) -> str:
@@ -1,10 +1,56 @@
+import heapq
+import random
+from collections import namedtuple
+from itertools import count
 from vector import Vec2d
 from purpose import Purpose
-import pyray as rl
+from events import EventKind
 from drawable import Drawable
 from stepable import Stepable
 
+# неизменяемый снимок аэропорта для GUI; позиция и назначение не меняются, поэтому берутся из entity
+class AirportState(namedtuple('AirportState', 'entity destroyed')):
+    __slots__ = ()
+
+    def draw(self):
+        import pyray as rl
+
+        airport = self.entity
+        pos = airport.pos
+        
+        colors = {
+            Purpose.General:  rl.BLUE,
+            Purpose.Military: rl.GREEN,
+            Purpose.Civil:    rl.YELLOW,
+        }
+        
+        color = colors[airport.purpose]
+
+        if airport._marked:
+            color = rl.PURPLE
+        
+        rl.draw_rectangle_rec(airport._shape, color)
+        
+        rl.draw_text(f'{self.destroyed}', pos.x + 4, pos.y + 4, 3, rl.BLACK)
+
+    def bounds(self):
+        pos = self.entity.pos
+        return round(pos.x) - 5, round(pos.y) - 5, round(pos.x) + 5, round(pos.y) + 5
+
+    def check_collision(self, mouse) -> bool:
+        import pyray as rl
+
+        return rl.check_collision_point_rec(mouse, self.entity._shape)
+
 class Airport(Drawable, Stepable):
+    __slots__ = (
+        '__name', '__pos', '__total_parkings', '__purpose', '__busy_parkings',
+        '__delay', '__timer', '__clock', '__seq',
+        '__waiting_aircrafts', '__parked_aircrafts', '__destroyed_aircrafts',
+        '__landing_queue', '__passanger_queue', '__departure_pending', '__departure_ready',
+        '__shape', '__model', '__rng',
+    )
+
     def __init__(self, name: str, pos: Vec2d, total_parkings: int, purpose: Purpose):
         Drawable.__init__(self)
         Stepable.__init__(self)
@@ -17,13 +63,27 @@ class Airport(Drawable, Stepable):
 
         self.__delay = 50
         self.__timer = 0
+        # число сделанных шагов; все самолёты в очередях стареют вместе с ним,
+        # поэтому ключи в кучах можно считать один раз при постановке в очередь
+        self.__clock = 0
+        self.__seq = count()
 
-        self.__waiting_aircrafts = []
-        self.__parked_aircrafts = []
+        # самолёт -> номер записи; порядок словаря совпадает с порядком прибытия
+        self.__waiting_aircrafts = {}
+        self.__parked_aircrafts = {}
         self.__destroyed_aircrafts = []
+
+        # кучи (ключ, номер, самолёт); устаревшие записи выбрасываются при извлечении
+        self.__landing_queue = []
+        self.__passanger_queue = []
+        # (такт готовности к вылету, номер, самолёт)
+        self.__departure_pending = []
+        # (такт посадки - время полёта, номер, самолёт): сверху самолёт с наибольшим time
+        self.__departure_ready = []
         
-        self.__shape = rl.Rectangle(round(pos.x) - 5, round(pos.y) - 5, 10, 10)
+        self.__shape = None
         self.__model = None
+        self.__rng = random
     
     @property
     def name(self) -> str:
@@ -35,6 +95,30 @@ class Airport(Drawable, Stepable):
     @property
     def purpose(self):
         return self.__purpose
+
+    @property
+    def total_parkings(self) -> int:
+        return self.__total_parkings
+
+    @property
+    def busy_parkings(self) -> int:
+        return self.__busy_parkings
+
+    @property
+    def waiting_aircrafts(self):
+        return self.__waiting_aircrafts.keys()
+
+    @property
+    def parked_aircrafts(self):
+        return self.__parked_aircrafts.keys()
+
+    @property
+    def _shape(self):
+        # прямоугольник создаётся только при отрисовке, чтобы модель не зависела от raylib
+        if self.__shape is None:
+            import pyray as rl
+            self.__shape = rl.Rectangle(round(self.pos.x) - 5, round(self.pos.y) - 5, 10, 10)
+        return self.__shape
     
     def info(self) -> str:
         info_text = f'''Airport {self.name}
@@ -59,32 +143,74 @@ Waiting aircrafts: {len(self.__waiting_aircrafts)}
             
         return info_text
     
-    def draw(self):
-        pos = self.pos
-        
-        colors = {
-            Purpose.General:  rl.BLUE,
-            Purpose.Military: rl.GREEN,
-            Purpose.Civil:    rl.YELLOW,
-        }
-        
-        color = colors[self.purpose]
+    def state(self) -> AirportState:
+        return AirportState(self, len(self.__destroyed_aircrafts))
 
-        if self._marked:
-            color = rl.PURPLE
-        
-        rl.draw_rectangle_rec(self.__shape, color)
-        
-        rl.draw_text(f'{len(self.__destroyed_aircrafts)}', pos.x + 4, pos.y + 4, 3, rl.BLACK)
+    def draw(self):
+        self.state().draw()
         
     def check_collision(self, mouse) -> bool:
-        return rl.check_collision_point_rec(mouse, self.__shape)
+        return self.state().check_collision(mouse)
     
+    @property
+    def rng(self):
+        return self.__rng
+
     def set_model(self, model):
         self.__model = model
+
+    def set_rng(self, rng):
+        self.__rng = rng
         
+    def _publish(self, kind, aircraft):
+        if self.__model is not None:
+            self.__model.events.publish(kind, aircraft, self)
+
+    def _dump(self) -> tuple:
+        # состояние для снимка; устаревшие записи куч не сохраняются
+        seq = next(self.__seq)
+        self.__seq = count(seq)
+
+        waiting = self.__waiting_aircrafts
+        live = lambda queue: [x for x in queue if waiting.get(x[2]) == x[1]]
+
+        return (self.__busy_parkings, self.__delay, self.__timer, self.__clock, seq,
+                list(waiting.items()), list(self.__parked_aircrafts.items()), self.__destroyed_aircrafts[:],
+                live(self.__landing_queue), live(self.__passanger_queue),
+                self.__departure_pending[:], self.__departure_ready[:])
+
+    def _restore(self, busy_parkings: int, delay: int, timer: int, clock: int, seq: int,
+                 waiting, parked, destroyed, landing, passanger, pending, ready):
+        self.__busy_parkings = busy_parkings
+        self.__delay = delay
+        self.__timer = timer
+        self.__clock = clock
+        self.__seq = count(seq)
+
+        self.__waiting_aircrafts = dict(waiting)
+        self.__parked_aircrafts = dict(parked)
+        self.__destroyed_aircrafts = list(destroyed)
+
+        # ключи (такт, номер) уникальны, поэтому порядок извлечения тот же, что и до сохранения
+        self.__landing_queue = list(landing)
+        self.__passanger_queue = list(passanger)
+        self.__departure_pending = list(pending)
+        self.__departure_ready = list(ready)
+        for queue in (self.__landing_queue, self.__passanger_queue, self.__departure_pending, self.__departure_ready):
+            heapq.heapify(queue)
+
     def land_request(self, aircraft):
-        self.__waiting_aircrafts.append(aircraft)
+        from aircraft import PassengerAircraft
+
+        seq = next(self.__seq)
+        self.__waiting_aircrafts[aircraft] = seq
+
+        entry = (self.__clock + aircraft.left_time(), seq, aircraft)
+        heapq.heappush(self.__landing_queue, entry)
+        if isinstance(aircraft, PassengerAircraft):
+            heapq.heappush(self.__passanger_queue, entry)
+
+        self._publish(EventKind.LandingRequested, aircraft)
     
     def step(self):
         self._check_destroyed()
@@ -98,45 +224,97 @@ Waiting aircrafts: {len(self.__waiting_aircrafts)}
                 self._depart()
 
         self.__timer += 1
-        
+        self.__clock += 1
+
+    def advance(self, ticks: int):
+        # ticks шагов подряд, на которых аэропорту некого сажать и выпускать
+        if ticks <= 0:
+            return
+
+        skip = max(0, self.__delay - self.__timer)
+        if ticks <= skip:
+            self.__timer += ticks
+        else:
+            # после срабатывания таймер идёт по кругу 1..delay
+            self.__timer = (ticks - skip - 1) % self.__delay + 1
+
+        self.__clock += ticks
+        self._check_destroyed()
+
+    def next_slot(self, clock: int | None = None) -> int:
+        # сколько шагов пройдёт до шага, на котором сработает таймер,
+        # если нужно, чтобы в этот момент часы аэропорта были не меньше clock
+        skip = max(0, self.__delay - self.__timer)
+
+        if clock is not None and self.__clock + skip < clock:
+            skip += -(-(clock - self.__clock - skip) // self.__delay) * self.__delay
+
+        return skip
+
+    def departure_clock(self) -> int | None:
+        # ближайшие часы аэропорта, когда кто-то из стоящих сможет вылететь
+        if self.__departure_ready:
+            return self.__clock
+        if self.__departure_pending:
+            return self.__departure_pending[0][0]
+        return None
+
+    def _peek_waiting(self, queue):
+        # ленивое удаление: запись актуальна, пока самолёт ждёт с тем же номером
+        while queue:
+            _, seq, aircraft = queue[0]
+            if self.__waiting_aircrafts.get(aircraft) == seq:
+                return aircraft
+            heapq.heappop(queue)
+        return None
+
     def _check_destroyed(self):
-        destroyed = list(filter(lambda x: x.destroyed, self.__waiting_aircrafts))
-        self.__destroyed_aircrafts.extend(destroyed)
-        for i in destroyed:
-            self.__waiting_aircrafts.remove(i)
+        # самолёт уничтожается, когда left_time() доходит до нуля, а очередь
+        # упорядочена по left_time(), так что уничтоженные всегда сверху
+        aircraft = self._peek_waiting(self.__landing_queue)
+        while aircraft is not None and aircraft.destroyed:
+            heapq.heappop(self.__landing_queue)
+            del self.__waiting_aircrafts[aircraft]
+            self.__destroyed_aircrafts.append(aircraft)
+            aircraft = self._peek_waiting(self.__landing_queue)
         
     def _can_land(self):
         return self.__busy_parkings < self.__total_parkings and self.__waiting_aircrafts
     
     def _land(self):
-        from aircraft import PassengerAircraft
-        
-        to_land = list(filter(lambda x: x.left_time() <= 150, self.__waiting_aircrafts))
+        aircraft = self._peek_waiting(self.__landing_queue)
+        if aircraft is None:
+            return
+
+        # срочные (<= 150 тактов) первыми, затем пассажирские, затем остальные
+        if aircraft.left_time() > 150:
+            aircraft = self._peek_waiting(self.__passanger_queue) or aircraft
 
-        if not to_land:
-            to_land = list(filter(lambda x: isinstance(x, PassengerAircraft), self.__waiting_aircrafts))
+        aircraft.landed()
+        del self.__waiting_aircrafts[aircraft]
 
-        if not to_land:
-            to_land = self.__waiting_aircrafts
+        seq = next(self.__seq)
+        self.__parked_aircrafts[aircraft] = seq
+        ready = self.__clock + aircraft.stop_time - aircraft.time
+        heapq.heappush(self.__departure_pending, (ready, seq, aircraft))
+        self.__busy_parkings -= 1
 
-        if to_land:
-            aircraft = min(to_land, key=lambda x: x.left_time())
-            aircraft.landed()
-            self.__waiting_aircrafts.remove(aircraft)
-            self.__parked_aircrafts.append(aircraft)
-            self.__busy_parkings -= 1
+        self._publish(EventKind.Landed, aircraft)
     
     
     def _depart(self):
-        to_depart = list(filter(lambda x: x.can_depart(), self.__parked_aircrafts))
-        
-        if not to_depart:
+        pending = self.__departure_pending
+        while pending and pending[0][0] <= self.__clock:
+            _, seq, aircraft = heapq.heappop(pending)
+            heapq.heappush(self.__departure_ready, (self.__clock - aircraft.time, seq, aircraft))
+
+        if not self.__departure_ready:
             return
         
-        to_depart = max(to_depart, key=lambda x: x.time)
+        _, _, to_depart = heapq.heappop(self.__departure_ready)
         
         self.__model.depart(to_depart)
-        self.__parked_aircrafts.remove(to_depart)
+        del self.__parked_aircrafts[to_depart]
         
         self.__busy_parkings += 1
     
\ No newline at end of file
@@ -0,0 +1,82 @@
+# python -m benchmarks.bench_airport_queues [--sizes 100 1000 10000]
+import argparse
+import random
+import time
+
+from aircraft import Aircraft, PassengerAircraft
+from airport import Airport
+from events import EventBus
+from purpose import Purpose
+from vector import Vec2d
+
+class _Model:
+    def __init__(self, destination):
+        self._destination = destination
+        self.events = EventBus()
+
+    def depart(self, aircraft):
+        aircraft.depart(self._destination)
+
+def _aircraft(i: int, destination: Airport):
+    kind = PassengerAircraft if i % 3 == 0 else Aircraft
+    args = [f'A{i}', destination, Vec2d(0, 0), 1.0,
+            random.randint(2500, 100000), 0,
+            random.randint(150, 300), 1000, Purpose.Civil]
+    if kind is PassengerAircraft:
+        args += [random.randint(50, 300), 500]
+    return kind(*args)
+
+def _linear_pick(waiting):
+    # выбор на посадку так, как он делался до очередей
+    to_land = [x for x in waiting if x.left_time() <= 150]
+    if not to_land:
+        to_land = [x for x in waiting if isinstance(x, PassengerAircraft)]
+    if not to_land:
+        to_land = waiting
+    return min(to_land, key=lambda x: x.left_time())
+
+def bench(size: int, decisions: int) -> tuple[float, float, float]:
+    hub = Airport('Hub', Vec2d(0, 0), size, Purpose.General)
+    other = Airport('Other', Vec2d(10, 10), size, Purpose.General)
+    hub.set_model(_Model(other))
+
+    aircrafts = [_aircraft(i, hub) for i in range(size)]
+    for aircraft in aircrafts:
+        hub.land_request(aircraft)
+
+    start = time.perf_counter()
+    for _ in range(decisions):
+        hub._land()
+    land = (time.perf_counter() - start) / decisions
+
+    # все севшие уже готовы к вылету (stopTime = 0); первый вызов переносит их в очередь готовых
+    hub._depart()
+
+    start = time.perf_counter()
+    for _ in range(decisions):
+        hub._depart()
+    depart = (time.perf_counter() - start) / decisions
+
+    start = time.perf_counter()
+    for _ in range(10):
+        _linear_pick(aircrafts)
+    linear = (time.perf_counter() - start) / 10
+
+    return land, depart, linear
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Airport landing/departure queue cost')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--decisions', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+
+    print(f'{"waiting":>8} {"_land us":>10} {"_depart us":>11} {"old scan us":>12}')
+    for size in args.sizes:
+        land, depart, linear = bench(size, min(args.decisions, size // 2))
+        print(f'{size:>8} {land * 1e6:>10.2f} {depart * 1e6:>11.2f} {linear * 1e6:>12.2f}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# python -m benchmarks.bench_conflicts [--aircrafts 1000 10000 100000] [--separation 5]
+import argparse
+import time
+
+import numpy as np
+
+from conflicts import close_pairs
+
+def _brute(x: np.ndarray, y: np.ndarray, radius: float, block: int = 2048) -> int:
+    # все пары подряд, блоками, чтобы матрица расстояний влезала в память
+    found = 0
+    for start in range(0, len(x), block):
+        dx = x[start:start + block, None] - x[None, :]
+        dy = y[start:start + block, None] - y[None, :]
+        close = dx * dx + dy * dy <= radius * radius
+        rows = np.arange(start, min(start + block, len(x)))[:, None]
+        found += int(np.count_nonzero(close & (rows < np.arange(len(x))[None, :])))
+    return found
+
+def bench(aircrafts: int, separation: float, width: float, height: float, brute: bool) -> tuple:
+    rng = np.random.default_rng(1)
+    x = rng.uniform(0, width, aircrafts)
+    y = rng.uniform(0, height, aircrafts)
+
+    start = time.perf_counter()
+    i, _ = close_pairs(x, y, separation)
+    grid = time.perf_counter() - start
+
+    if not brute:
+        return len(i), grid, None
+
+    start = time.perf_counter()
+    found = _brute(x, y, separation)
+    brute_time = time.perf_counter() - start
+    if found != len(i):
+        raise AssertionError(f"grid found {len(i)} pairs, brute force {found}")
+    return len(i), grid, brute_time
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Conflict search on a spatial hash against all pairs')
+    parser.add_argument('--aircrafts', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--separation', type=float, default=5.0)
+    parser.add_argument('--width', type=float, default=1000)
+    parser.add_argument('--height', type=float, default=800)
+    parser.add_argument('--brute-limit', type=int, default=30000, help='skip all pairs above this many aircraft')
+    args = parser.parse_args(argv)
+
+    print(f'{"aircrafts":>9} {"pairs":>9} {"grid ms":>9} {"all pairs ms":>13}')
+    for size in args.aircrafts:
+        pairs, grid, brute = bench(size, args.separation, args.width, args.height, size <= args.brute_limit)
+        brute_text = '-' if brute is None else f'{brute * 1e3:.2f}'
+        print(f'{size:>9} {pairs:>9} {grid * 1e3:>9.2f} {brute_text:>13}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# python -m benchmarks.bench_departures [--airports 10 100 1000 5000] [--departures 20000]
+import argparse
+import time
+
+import scenario
+from departures import WEIGHTS
+from purpose import Purpose
+
+def _filtered(model, aircraft):
+    # выбор цели так, как он делался до таблиц
+    options = model.airports[:]
+    options.remove(aircraft.destination)
+    options = list(filter(lambda x: x.purpose in [aircraft.purpose, Purpose.General], options))
+    return aircraft.destination.rng.choice(options)
+
+def _departures(model, count: int) -> float:
+    # самолёт улетает прямо из того места, куда летел: меряется только Model.depart
+    aircrafts = model.aircrafts
+    start = time.perf_counter()
+    for i in range(count):
+        model.depart(aircrafts[i % len(aircrafts)])
+    return (time.perf_counter() - start) / count
+
+def bench(airports: int, count: int) -> dict[str, float]:
+    model = scenario.generate(airports, 300, seed=1)
+    aircrafts = model.aircrafts
+
+    start = time.perf_counter()
+    for i in range(count):
+        _filtered(model, aircrafts[i % len(aircrafts)])
+    result = {'filtered': (time.perf_counter() - start) / count}
+
+    for name, (weight, per_origin) in WEIGHTS.items():
+        model.set_destination_weights(weight, per_origin)
+        # первый вылет из аэропорта строит таблицу псевдонимов: строим их все заранее
+        pilots = {x.purpose: x for x in aircrafts}.values()
+        for airport in model.airports:
+            for aircraft in pilots:
+                aircraft.destination = airport
+                model.depart(aircraft)
+        result[name] = _departures(model, count)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cost of choosing a destination in Model.depart')
+    parser.add_argument('--airports', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--departures', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    names = ['filtered', *WEIGHTS]
+    print(f'{"airports":>8} ' + ' '.join(f'{x + " us":>12}' for x in names))
+    for size in args.airports:
+        result = bench(size, args.departures)
+        print(f'{size:>8} ' + ' '.join(f'{result[x] * 1e6:>12.2f}' for x in names))
+
+if __name__ == "__main__":
+    main()
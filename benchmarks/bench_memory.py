@@ -0,0 +1,60 @@
+# python -m benchmarks.bench_memory [--aircrafts 100000] [--ticks 20]
+import argparse
+import gc
+import random
+import tracemalloc
+
+from aircraft import Aircraft, CargoAircraft, PassengerAircraft
+from airport import Airport
+from model import Model
+from purpose import Purpose
+from vector import Vec2d
+
+def build(aircrafts: int, airports: int) -> Model:
+    purposes = [Purpose.Civil, Purpose.Military, Purpose.General]
+    ports = [Airport(f'Airport {i}', Vec2d(random.randint(0, 1000), random.randint(0, 800)), 5, purposes[i % 3])
+             for i in range(airports)]
+
+    kinds = [Aircraft, CargoAircraft, PassengerAircraft]
+    planes = [kinds[i % 3].new_rand(f'Aircraft {i}', ports[i % airports],
+                                    Vec2d(random.randint(0, 1000), random.randint(0, 800)))
+              for i in range(aircrafts)]
+    return Model(planes, ports)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory per aircraft and allocations per tick')
+    parser.add_argument('--aircrafts', type=int, default=100000)
+    parser.add_argument('--airports', type=int, default=50)
+    parser.add_argument('--ticks', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    gc.collect()
+    tracemalloc.start()
+
+    before, _ = tracemalloc.get_traced_memory()
+    model = build(args.aircrafts, args.airports)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    print(f'bytes per aircraft: {(after - before) / args.aircrafts:.0f}')
+
+    # в первые такты ещё никто не долетел, так что меряется только движение
+    transient = 0
+    blocks = 0
+    for _ in range(args.ticks):
+        start = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        model.step()
+        _, peak = tracemalloc.get_traced_memory()
+        transient += peak - current
+        end = tracemalloc.take_snapshot()
+        blocks += sum(max(stat.count_diff, 0) for stat in end.compare_to(start, 'lineno'))
+        del start, end
+
+    print(f'peak transient bytes per tick: {transient / args.ticks:.0f}')
+    print(f'new blocks per tick: {blocks / args.ticks:.0f}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# python -m benchmarks.bench_replay [--airports 10 100 1000] [--departures 20000]
+import argparse
+import os
+import tempfile
+import time
+
+from aircraft import CargoAircraft, PassengerAircraft
+from airport import Airport
+from model import Model
+from purpose import Purpose
+from rng import Stream
+from vector import Vec2d
+
+def build(airports: int, seed: int = 1) -> Model:
+    rng = Stream(str(seed))
+    purposes = [Purpose.Civil, Purpose.Military, Purpose.General]
+    ports = [Airport(f'Airport {i}', Vec2d(rng.randint(0, 1000), rng.randint(0, 800)), 5, purposes[i % 3])
+             for i in range(airports)]
+    planes = [kind.new_rand(f'Aircraft {i}', ports[i % 3], Vec2d(0, 0), rng)
+              for i, kind in enumerate([CargoAircraft, PassengerAircraft] * 50)]
+    return Model(planes, ports, seed)
+
+def _departures(model: Model, count: int) -> float:
+    # вылеты из аэропорта назначения в новый без полёта: меряется только Model.depart
+    aircrafts = model.aircrafts
+    start = time.perf_counter()
+    for i in range(count):
+        model.depart(aircrafts[i % len(aircrafts)])
+    return (time.perf_counter() - start) / count
+
+def bench(airports: int, count: int, path) -> tuple[float, float]:
+    model = build(airports)
+    model.start_recording(path)
+    sampled = _departures(model, count)
+    model.stop_recording()
+
+    model = build(airports)
+    model.replay_from(path)
+    replayed = _departures(model, count)
+    return sampled, replayed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Model.depart cost when sampling and when replaying a log')
+    parser.add_argument('--airports', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--departures', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    print(f'{"airports":>8} {"sample us":>10} {"replay us":>10}')
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.airports:
+            path = os.path.join(folder, f'{size}.log')
+            sampled, replayed = bench(size, args.departures, path)
+            print(f'{size:>8} {sampled * 1e6:>10.2f} {replayed * 1e6:>10.2f}')
+
+if __name__ == "__main__":
+    main()
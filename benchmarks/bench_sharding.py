@@ -0,0 +1,37 @@
+# python -m benchmarks.bench_sharding [--shards 1 2 4 8] [--airports 2000] [--aircrafts 200000] [--ticks 200]
+import argparse
+import os
+import time
+
+import scenario
+from sharding import ShardedRun
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Throughput of the sharded model against the number of processes')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--airports', type=int, default=2000)
+    parser.add_argument('--aircrafts', type=int, default=200000)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--window', type=int, default=100)
+    # карта растёт вместе с сетью, чтобы перелёты между областями оставались длинными
+    parser.add_argument('--size', type=int, default=20000, help='map width; height is 4/5 of it')
+    args = parser.parse_args(argv)
+
+    print(f'cores: {os.cpu_count()}')
+    print(f'{"shards":>6} {"window":>6} {"ticks/s":>9} {"speedup":>8}')
+
+    base = None
+    for shards in args.shards:
+        model = scenario.generate(args.airports, args.aircrafts, seed=1, width=args.size, height=args.size * 4 // 5)
+        with ShardedRun(model, shards, args.window) as run:
+            start = time.perf_counter()
+            run.advance(args.ticks)
+            elapsed = time.perf_counter() - start
+            window = run.window
+
+        rate = args.ticks / elapsed
+        base = base or rate
+        print(f'{shards:>6} {window:>6} {rate:>9.1f} {rate / base:>8.2f}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# python -m benchmarks.bench_startup [--aircrafts 10000 100000 1000000] [--airports 1000]
+import argparse
+import gc
+import time
+import tracemalloc
+
+import scenario
+
+def bench(airports: int, aircrafts: int) -> tuple[float, int]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    model = scenario.generate(airports, aircrafts, seed=1)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del model
+    return elapsed, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Startup time and peak memory of a generated network')
+    parser.add_argument('--aircrafts', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--airports', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    # tracemalloc сам замедляет создание объектов, поэтому важны отношения, а не абсолютные числа
+    print(f'{"aircrafts":>10} {"seconds":>8} {"us/aircraft":>12} {"peak MB":>8} {"bytes/aircraft":>15}')
+    for size in args.aircrafts:
+        elapsed, peak = bench(args.airports, size)
+        print(f'{size:>10} {elapsed:>8.2f} {elapsed / size * 1e6:>12.2f} {peak / 2**20:>8.1f} {peak / size:>15.0f}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# python -m benchmarks.suite [--profile quick|full] [--output results.json]
+#                            [--baseline baseline.json] [--threshold 10]
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import scenario
+from benchmarks import bench_airport_queues
+
+# Набор замеров на сетях растущего размера. Результаты пишутся в JSON; с --baseline
+# каждый замер сравнивается с сохранённым, и если хоть один стал хуже больше чем
+# на --threshold процентов, скрипт завершается с кодом 1.
+
+# (самолёты, аэропорты)
+NETWORKS = {
+    'quick': [(10, 5), (1000, 50), (10000, 500)],
+    'full': [(10, 5), (1000, 50), (10000, 500), (100000, 1000), (1000000, 10000)],
+}
+
+# длина очереди на посадку в одном аэропорту
+QUEUES = {
+    'quick': [1000, 10000],
+    'full': [1000, 10000, 100000],
+}
+
+def _best(measure, repeat: int) -> float:
+    return min(measure() for _ in range(repeat))
+
+def ticks_per_second(model, min_time: float) -> float:
+    # первый шаг отдельно: в нём строятся ленивые структуры
+    model.step()
+    ticks = 0
+    start = time.perf_counter()
+    while True:
+        model.step()
+        ticks += 1
+        elapsed = time.perf_counter() - start
+        if ticks >= 2 and elapsed >= min_time:
+            return ticks / elapsed
+
+def depart_seconds(model, count: int) -> float:
+    # самолёт улетает прямо из того места, куда летел: меряется только Model.depart
+    aircrafts = model.aircrafts
+    start = time.perf_counter()
+    for i in range(count):
+        model.depart(aircrafts[i % len(aircrafts)])
+    return (time.perf_counter() - start) / count
+
+class _Graphics:
+    screen_width = 1000
+    screen_height = 800
+
+def info_seconds(model, repeat: int) -> tuple[float, float]:
+    # pyray нужен только ради прямоугольников, окно не открывается
+    from gui import FilterBox, Menu
+
+    menu = Menu(_Graphics, model)
+    box = FilterBox(_Graphics, model)
+    box._raw_text = list('500')
+
+    def timed(function):
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+    return _best(lambda: timed(menu._default_info), repeat), _best(lambda: timed(box.info), repeat)
+
+def peak_memory(aircrafts: int, airports: int, ticks: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        model = scenario.generate(airports, aircrafts, seed=1)
+        for _ in range(ticks):
+            model.step()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def run(profile: str, repeat: int, min_time: float, memory: bool) -> dict:
+    results = {}
+
+    def add(name: str, value: float, unit: str, higher_is_better: bool):
+        results[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+        print(f'{name:<32} {value:>14.6g} {unit}', flush=True)
+
+    for aircrafts, airports in NETWORKS[profile]:
+        size = f'{aircrafts}x{airports}'
+
+        model = scenario.generate(airports, aircrafts, seed=1)
+        add(f'step/{size}', _best(lambda: ticks_per_second(model, min_time), repeat), 'ticks/s', True)
+
+        menu, box = info_seconds(model, repeat)
+        add(f'menu_info/{size}', menu * 1e6, 'us', False)
+        add(f'filter_info/{size}', box * 1e6, 'us', False)
+
+        # меню и фильтр подписались на события модели; вылеты меряются на свежей модели,
+        # чтобы в них не попали их обработчики
+        del model
+        model = scenario.generate(airports, aircrafts, seed=1)
+        count = max(1000, min(20000, aircrafts))
+        add(f'depart/{size}', _best(lambda: depart_seconds(model, count), repeat) * 1e6, 'us', False)
+        del model
+
+        if memory:
+            add(f'peak_memory/{size}', peak_memory(aircrafts, airports, 3), 'bytes', False)
+
+    for depth in QUEUES[profile]:
+        decisions = min(50, depth // 2)
+        runs = [bench_airport_queues.bench(depth, decisions) for _ in range(repeat)]
+        land = min(x[0] for x in runs)
+        depart = min(x[1] for x in runs)
+        add(f'airport_land/{depth}', land * 1e6, 'us', False)
+        add(f'airport_depart/{depth}', depart * 1e6, 'us', False)
+
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        saved = baseline.get(name)
+        if saved is None or not saved['value']:
+            continue
+
+        change = (current['value'] - saved['value']) / saved['value'] * 100
+        worse = -change if current['higher_is_better'] else change
+        print(f'{name:<32} {saved["value"]:>14.6g} -> {current["value"]:<14.6g} {change:+7.1f}%')
+        if worse > threshold:
+            regressions.append(f'{name}: {worse:.1f}% worse than the baseline')
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark suite with scaling curves and regression thresholds')
+    parser.add_argument('--profile', default='quick', choices=sorted(NETWORKS),
+                        help='quick goes up to 10k aircraft, full up to 1M aircraft and 10k airports')
+    parser.add_argument('--repeat', type=int, default=3, help='best of this many runs per measurement')
+    parser.add_argument('--min-time', type=float, default=0.5, metavar='S',
+                        help='minimum time of one ticks/s measurement')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak memory runs')
+    parser.add_argument('--output', default=None, metavar='PATH', help='write the results as JSON')
+    parser.add_argument('--baseline', default=None, metavar='PATH', help='compare with results saved earlier')
+    parser.add_argument('--threshold', type=float, default=10.0, metavar='PERCENT',
+                        help='fail if any measurement is worse than the baseline by more than this')
+    args = parser.parse_args(argv)
+
+    results = run(args.profile, args.repeat, args.min_time, not args.no_memory)
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'profile': args.profile,
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results,
+            }, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) above {args.threshold}%:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
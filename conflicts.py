@@ -0,0 +1,110 @@
+import numpy as np
+
+from aircraft import AircraftStatus
+from events import EventKind
+from trajectory import aircraft_columns
+
+# Опасные сближения самолётов в воздухе. Каждый такт после движения самолёты
+# раскладываются по клеткам со стороной separation, и пары ищутся только в своей
+# клетке и четырёх соседних (остальные четыре соседки проверит та клетка), так что
+# работа растёт почти линейно, а не как n² у перебора всех пар.
+
+# сдвиги соседних клеток, которые смотрит каждая клетка: сама и половина окрестности
+_NEIGHBOURS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+def close_pairs(x: np.ndarray, y: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+    # номера i < j всех пар точек на расстоянии не больше radius
+    n = len(x)
+    if n < 2:
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+
+    cx = np.floor(x / radius).astype(np.int64)
+    cy = np.floor(y / radius).astype(np.int64)
+    cx -= cx.min() - 1
+    cy -= cy.min() - 1
+    # между столбцами запас в клетку, чтобы сдвиг по y не перескакивал в соседний столбец
+    height = int(cy.max()) + 2
+    keys = cx * height + cy
+
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    positions = np.arange(n)
+
+    first = []
+    second = []
+    for dx, dy in _NEIGHBOURS:
+        target = sorted_keys + (dx * height + dy)
+        hi = np.searchsorted(sorted_keys, target, 'right')
+        # в своей клетке - только те, что после себя, чтобы пара не попалась дважды
+        lo = positions + 1 if dx == dy == 0 else np.searchsorted(sorted_keys, target, 'left')
+        counts = hi - lo
+        total = int(counts.sum())
+        if total == 0:
+            continue
+
+        a = np.repeat(positions, counts)
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        b = starts + np.arange(total)
+        first.append(order[a])
+        second.append(order[b])
+
+    if not first:
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+
+    i = np.concatenate(first)
+    j = np.concatenate(second)
+    ddx = x[i] - x[j]
+    ddy = y[i] - y[j]
+    close = ddx * ddx + ddy * ddy <= radius * radius
+    i, j = i[close], j[close]
+    return np.minimum(i, j), np.maximum(i, j)
+
+class ConflictDetector:
+    def __init__(self, model, separation: float):
+        if not separation > 0:
+            raise ValueError(f"separation must be positive, got {separation}")
+
+        self._model = model
+        self._separation = separation
+        # текущие пары (i, j), i < j, номера как в model.aircrafts
+        self._pairs = set()
+        self._by_aircraft = {}
+        self._total = 0
+
+    @property
+    def separation(self) -> float:
+        return self._separation
+
+    @property
+    def pairs(self) -> set[tuple[int, int]]:
+        return self._pairs
+
+    @property
+    def total(self) -> int:
+        # сколько раз пары входили в конфликт
+        return self._total
+
+    def conflicts_of(self, index: int) -> set[int]:
+        return self._by_aircraft.get(index, set())
+
+    def check(self):
+        columns = aircraft_columns(self._model)
+        flying = np.flatnonzero((columns['status'] == AircraftStatus.EnRoute.value) & ~columns['destroyed'])
+        i, j = close_pairs(columns['x'][flying], columns['y'][flying], self._separation)
+        pairs = set(zip(flying[i].tolist(), flying[j].tolist()))
+
+        started = pairs - self._pairs
+        if started or len(pairs) != len(self._pairs):
+            by_aircraft = {}
+            for a, b in pairs:
+                by_aircraft.setdefault(a, set()).add(b)
+                by_aircraft.setdefault(b, set()).add(a)
+            self._by_aircraft = by_aircraft
+        self._pairs = pairs
+
+        if started:
+            self._total += len(started)
+            aircrafts = self._model.aircrafts
+            events = self._model.events
+            for a, b in sorted(started):
+                events.publish(EventKind.Conflict, aircrafts[a], aircrafts[b])
@@ -0,0 +1,73 @@
+import heapq
+import math
+from itertools import count
+
+from events import EventKind
+
+# самолёты в куче по такту, на котором у них кончится топливо (tick + life_time - time);
+# время у всех идёт одинаково, поэтому срок меняется только при вылете. Вылет - одна
+# вставка в кучу, а не сдвиг списка, и запрос обходит только записи в пределах срока
+class DeadlineIndex:
+    def __init__(self, model):
+        self._model = model
+        self._seq = count()
+
+        # самолёт -> номер его актуальной записи
+        self._current = {}
+        # (срок, номер, самолёт); записи прошлых рейсов и уничтоженных лениво пропускаются
+        self._entries = [self._add(x) for x in model.aircrafts if not x.destroyed]
+        heapq.heapify(self._entries)
+
+        model.events.subscribe(EventKind.Departed, self._on_departed)
+        model.events.subscribe(EventKind.Destroyed, self._on_destroyed)
+
+    def __len__(self):
+        return len(self._current)
+
+    def _deadline(self, aircraft) -> int:
+        return self._model.tick + aircraft.life_time() - aircraft.time
+
+    def _add(self, aircraft):
+        seq = next(self._seq)
+        self._current[aircraft] = seq
+        return (self._deadline(aircraft), seq, aircraft)
+
+    def add(self, aircraft):
+        heapq.heappush(self._entries, self._add(aircraft))
+
+    def _on_departed(self, aircraft, airport):
+        self.add(aircraft)
+        self._compact()
+
+    def _on_destroyed(self, aircraft, airport):
+        self._current.pop(aircraft, None)
+        self._compact()
+
+    def _compact(self):
+        if len(self._entries) > 2 * len(self._current) + 64:
+            current = self._current
+            self._entries = [x for x in self._entries if current.get(x[2]) == x[1]]
+            heapq.heapify(self._entries)
+
+    def expiring(self, within: float) -> list:
+        # не уничтоженные самолёты, у которых осталось не больше within тактов, самые срочные первыми
+        bound = (self._model.tick + within, math.inf)
+        entries = self._entries
+        current = self._current
+        found = []
+        # потомки в куче не меньше родителя: поддерево записи позже срока не обходится
+        stack = [0] if entries else []
+        while stack:
+            i = stack.pop()
+            entry = entries[i]
+            if entry > bound:
+                continue
+            if current.get(entry[2]) == entry[1]:
+                found.append(entry)
+            child = 2 * i + 1
+            if child < len(entries):
+                stack.append(child)
+            if child + 1 < len(entries):
+                stack.append(child + 1)
+        found.sort()
+        return [aircraft for _, _, aircraft in found]
@@ -0,0 +1,137 @@
+import math
+from array import array
+
+from purpose import Purpose
+
+# Возможные цели вылета для каждого назначения самолёта: аэропорты того же назначения
+# и общие, в порядке добавления. Аэропорт вылета из списка не удаляется, а пропускается
+# при выборе номера, так что выбор без весов - одно случайное число и O(1), и даёт ровно
+# то же, что random.choice по отфильтрованной копии списка.
+class DestinationTable:
+    def __init__(self, weight=None, per_origin: bool = True):
+        self._purposes = [x for x in Purpose if x != Purpose.General]
+        self._eligible = {purpose: [] for purpose in self._purposes}
+        self._position = {purpose: {} for purpose in self._purposes}
+
+        # weight(origin, target) -> неотрицательный вес; None - все цели равновероятны
+        self._weight = weight
+        # если вес не зависит от origin, на назначение хватает одной таблицы на все аэропорты
+        self._per_origin = per_origin
+        # (назначение, аэропорт вылета или None) -> таблица псевдонимов, строится при первом вылете
+        self._alias = {}
+
+    def __len__(self):
+        return sum(len(x) for x in self._eligible.values())
+
+    @property
+    def weight(self):
+        return self._weight
+
+    def set_weight(self, weight, per_origin: bool = True):
+        self._weight = weight
+        self._per_origin = per_origin
+        self._alias.clear()
+
+    def candidates(self, purpose: Purpose, origin) -> list:
+        return [x for x in self._eligible[purpose] if x is not origin]
+
+    def add(self, airport):
+        for purpose in self._purposes:
+            if airport.purpose in (purpose, Purpose.General):
+                self._position[purpose][airport] = len(self._eligible[purpose])
+                self._eligible[purpose].append(airport)
+        self._alias.clear()
+
+    def remove(self, airport):
+        for purpose in self._purposes:
+            if airport in self._position[purpose]:
+                eligible = [x for x in self._eligible[purpose] if x is not airport]
+                self._eligible[purpose] = eligible
+                self._position[purpose] = {x: i for i, x in enumerate(eligible)}
+        self._alias.clear()
+
+    def choose(self, purpose: Purpose, origin, rng):
+        if self._weight is not None:
+            return self._choose_weighted(purpose, origin, rng)
+
+        eligible = self._eligible[purpose]
+        skip = self._position[purpose].get(origin)
+        size = len(eligible) - (skip is not None)
+        if size <= 0:
+            raise IndexError(f"no destination for a {purpose.name} aircraft leaving {origin.name}")
+
+        index = rng.randint(0, size - 1)
+        if skip is not None and index >= skip:
+            index += 1
+        return eligible[index]
+
+    def _choose_weighted(self, purpose: Purpose, origin, rng):
+        key = (purpose, origin if self._per_origin else None)
+        table = self._alias.get(key)
+        if table is None:
+            table = self._alias[key] = self._build_alias(purpose, origin)
+
+        targets, probability, alias, weights, total = table
+        if not self._per_origin:
+            # общая таблица проверена только для того, кто её построил; если весь вес у
+            # самого аэропорта вылета, повтор выбора никогда бы не кончился
+            position = self._position[purpose].get(origin)
+            rest = total - (weights[position] if position is not None else 0.0)
+            if not rest > 0:
+                raise ValueError(f"no destination with positive weight for a {purpose.name} aircraft "
+                                 f"leaving {origin.name}")
+
+        while True:
+            # одно число на выбор: целая часть - столбец, дробная - монетка внутри столбца
+            u = rng.random() * len(targets)
+            column = int(u)
+            if u - column >= probability[column]:
+                column = alias[column]
+            # в общей таблице аэропорт вылета тоже есть, тогда выбор повторяется
+            if targets[column] is not origin:
+                return targets[column]
+
+    def _build_alias(self, purpose: Purpose, origin):
+        # метод Уолкера - Возе: O(n) на построение, O(1) на выбор
+        targets = self.candidates(purpose, origin)
+        weights = [float(self._weight(origin, x)) for x in targets]
+        total = sum(weights)
+        if not targets or not total > 0 or not math.isfinite(total):
+            raise ValueError(f"no destination with positive weight for a {purpose.name} aircraft leaving {origin.name}")
+
+        if not self._per_origin:
+            # у общей таблицы те же столбцы плюс сам origin с его весом
+            targets = self._eligible[purpose][:]
+            weights = [float(self._weight(None, x)) for x in targets]
+            total = sum(weights)
+
+        n = len(targets)
+        scaled = [x * n / total for x in weights]
+        probability = array('d', [1.0] * n)
+        alias = array('i', range(n))
+
+        small = [i for i, x in enumerate(scaled) if x < 1.0]
+        large = [i for i, x in enumerate(scaled) if x >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        return targets, probability, alias, weights, total
+
+def by_capacity(origin, target) -> float:
+    return target.total_parkings
+
+def by_inverse_distance(origin, target) -> float:
+    # ближние аэропорты выбираются чаще; совпадающие позиции считаются как расстояние 1
+    return 1.0 / max((target.pos - origin.pos).length(), 1.0)
+
+# имя -> (вес, зависит ли он от аэропорта вылета)
+WEIGHTS = {
+    'uniform': (None, True),
+    'capacity': (by_capacity, False),
+    'distance': (by_inverse_distance, True),
+}
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 
 class Drawable(ABC):
+    __slots__ = ('_marked',)
+
     @abstractmethod
     def __init__(self) -> None:
         super().__init__()
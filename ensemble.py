@@ -0,0 +1,176 @@
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from statistics import NormalDist
+from typing import Iterator
+
+import headless
+import scenario
+from stats import FleetStats
+
+# Ансамбль независимых прогонов одного сценария с разными зёрнами. Прогоны идут
+# в пуле процессов, а сводки возвращаются по мере готовности и сразу копятся в оценки.
+
+METRICS = ('destroyed', 'dead_passangers', 'dead_cargo', 'max_queue')
+
+def simulate(scenario_name: str, engine_name: str, seed: int, ticks: int) -> dict:
+    # выполняется в рабочем процессе, поэтому получает и возвращает только простые значения
+    model = scenario.SCENARIOS[scenario_name](headless.engine(engine_name), seed)
+    stats = FleetStats(model)
+    headless.run(model, ticks)
+
+    result = headless.summary(model)
+    result['seed'] = seed
+    result['queues'] = {airport.name: stats.max_waiting(airport) for airport in model.airports}
+    result['max_queue'] = max(result['queues'].values(), default=0)
+    return result
+
+class RunningStats:
+    # среднее и дисперсия по Уэлфорду, без хранения всех значений
+    def __init__(self):
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float):
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self._count - 1) if self._count > 1 else math.inf
+
+    def half_width(self, confidence: float = 0.95) -> float:
+        # нормальное приближение; для малого числа прогонов интервал получается чуть уже честного
+        if self._count < 2:
+            return math.inf
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        return z * math.sqrt(self.variance / self._count)
+
+    def interval(self, confidence: float = 0.95) -> tuple[float, float]:
+        width = self.half_width(confidence)
+        return self._mean - width, self._mean + width
+
+class Ensemble:
+    def __init__(self, scenario_name: str = 'default', engine_name: str = 'object', ticks: int = 10000,
+                 seed: int | None = None, workers: int | None = None):
+        if scenario_name not in scenario.SCENARIOS:
+            raise ValueError(f"unknown scenario {scenario_name!r}")
+        headless.engine(engine_name)
+
+        self._scenario = scenario_name
+        self._engine = engine_name
+        self._ticks = ticks
+        self._seed = random.getrandbits(31) if seed is None else seed
+        self._workers = workers or os.cpu_count() or 1
+
+        self._stats = {name: RunningStats() for name in METRICS}
+        self._queues = {}
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def runs(self) -> int:
+        return self._stats['destroyed'].count
+
+    def stats(self, metric: str) -> RunningStats:
+        return self._stats[metric]
+
+    def queue_stats(self) -> dict[str, RunningStats]:
+        # наибольшая очередь по каждому аэропорту отдельно
+        return dict(self._queues)
+
+    def _add(self, result: dict):
+        for name in METRICS:
+            self._stats[name].add(result[name])
+        for airport, length in result['queues'].items():
+            self._queues.setdefault(airport, RunningStats()).add(length)
+
+    def converged(self, metric: str, tolerance: float, confidence: float = 0.95) -> bool:
+        return self._stats[metric].half_width(confidence) <= tolerance
+
+    def run(self, runs: int, metric: str = 'destroyed', tolerance: float | None = None,
+            confidence: float = 0.95, min_runs: int = 10) -> Iterator[dict]:
+        # сводки отдаются в порядке готовности; в работе держится не больше двух задач на процесс,
+        # чтобы при ранней остановке не пришлось ждать уже отправленные прогоны
+        seeds = iter(range(self._seed, self._seed + runs))
+        window = 2 * self._workers
+
+        with ProcessPoolExecutor(self._workers) as pool:
+            pending = set()
+            try:
+                while True:
+                    while len(pending) < window:
+                        seed = next(seeds, None)
+                        if seed is None:
+                            break
+                        pending.add(pool.submit(simulate, self._scenario, self._engine, seed, self._ticks))
+
+                    if not pending:
+                        return
+
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        self._add(result)
+                        yield result
+
+                    if (tolerance is not None and self.runs >= min_runs
+                            and self.converged(metric, tolerance, confidence)):
+                        return
+            finally:
+                for future in pending:
+                    future.cancel()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run many seeds of a scenario in parallel and aggregate the outcome')
+    parser.add_argument('--scenario', default='default', choices=sorted(scenario.SCENARIOS))
+    parser.add_argument('--engine', default='object', choices=['object', 'fleet', 'event'])
+    parser.add_argument('--runs', type=int, default=100, help='maximum number of runs')
+    parser.add_argument('--ticks', type=int, default=10000, help='ticks per run')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the first run; run i uses seed + i')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (all cores by default)')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--metric', default='destroyed', choices=METRICS, help='metric checked for early stopping')
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help='stop once the confidence half-width of --metric is at most this')
+    parser.add_argument('--min-runs', type=int, default=10, help='never stop early before this many runs')
+    parser.add_argument('--quiet', action='store_true', help='only print the aggregate')
+    args = parser.parse_args(argv)
+
+    ensemble = Ensemble(args.scenario, args.engine, args.ticks, args.seed, args.workers)
+
+    start = time.perf_counter()
+    for result in ensemble.run(args.runs, args.metric, args.tolerance, args.confidence, args.min_runs):
+        if not args.quiet:
+            stats = ensemble.stats(args.metric)
+            print(f'seed {result["seed"]}: destroyed {result["destroyed"]}, '
+                  f'dead passangers {result["dead_passangers"]}, dead cargo {result["dead_cargo"]:.2f}, '
+                  f'max queue {result["max_queue"]} | {args.metric} {stats.mean:.3f} '
+                  f'± {stats.half_width(args.confidence):.3f}')
+    elapsed = time.perf_counter() - start
+
+    print(f'runs: {ensemble.runs} (seeds from {ensemble.seed}), {elapsed:.2f} s')
+    for name in METRICS:
+        stats = ensemble.stats(name)
+        print(f'{name}: {stats.mean:.3f} ± {stats.half_width(args.confidence):.3f}')
+    for airport, stats in ensemble.queue_stats().items():
+        print(f'max queue {airport}: {stats.mean:.3f} ± {stats.half_width(args.confidence):.3f}')
+
+if __name__ == "__main__":
+    main()
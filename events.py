@@ -0,0 +1,27 @@
+from enum import Enum
+
+class EventKind(Enum):
+    # (aircraft, airport) - аэропорт, из которого самолёт улетел
+    Departed = 1
+    # (aircraft, airport) - аэропорт, в очередь которого самолёт встал
+    LandingRequested = 2
+    # (aircraft, airport)
+    Landed = 3
+    # (aircraft, airport) - аэропорт, в очереди которого он ждал, или None, если разбился в пути
+    Destroyed = 4
+    # (aircraft, aircraft) - пара сблизилась меньше чем на separation, см. conflicts.py
+    Conflict = 5
+
+class EventBus:
+    def __init__(self):
+        self._subscribers = {kind: [] for kind in EventKind}
+
+    def subscribe(self, kind: EventKind, callback):
+        self._subscribers[kind].append(callback)
+
+    def unsubscribe(self, kind: EventKind, callback):
+        self._subscribers[kind].remove(callback)
+
+    def publish(self, kind: EventKind, aircraft, airport):
+        for callback in self._subscribers[kind]:
+            callback(aircraft, airport)
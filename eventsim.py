@@ -0,0 +1,271 @@
+import heapq
+import math
+from itertools import count
+from time import perf_counter
+from typing import Iterable
+
+from aircraft import Aircraft, AircraftStatus
+from airport import Airport
+from model import Model
+
+# виды событий
+ARRIVAL = 0
+DESTRUCTION = 1
+AIRPORT_SLOT = 2
+
+# внутри такта сначала шагают самолёты, потом аэропорты, каждые в порядке списка
+_AIRCRAFT_PHASE = 0
+_AIRPORT_PHASE = 1
+
+# если число шагов до посадки ближе к целому, чем на столько, то считаем честно
+_ARRIVAL_TOLERANCE = 1e-6
+
+def moves_to_arrive(pos, target, speed: float) -> int:
+    # номер шага (с 1), на котором самолёт из pos долетит до target, ровно как Aircraft.__move
+    x, y = pos.x, pos.y
+    tx, ty = target.x, target.y
+    dx = tx - x
+    dy = ty - y
+    length = math.sqrt(dx * dx + dy * dy)
+
+    if length <= speed:
+        return 1
+
+    moves = (length - speed) / speed
+    nearest = round(moves)
+    if abs(moves - nearest) * speed > _ARRIVAL_TOLERANCE:
+        return math.ceil(moves) + 1
+
+    # на границе ошибки округления решают исход, поэтому повторяем шаги модели
+    done = 0
+    while length > speed:
+        x = x + speed * (dx / length)
+        y = y + speed * (dy / length)
+        dx = tx - x
+        dy = ty - y
+        length = math.sqrt(dx * dx + dy * dy)
+        done += 1
+    return done + 1
+
+class EventModel(Model):
+    # самолёты и так трогаются только на своих событиях
+    _uses_activity = False
+
+    def __init__(self, aircrafts: Iterable[Aircraft], airports: Iterable[Airport], seed: int | None = None):
+        super().__init__(aircrafts, airports, seed)
+        self._schedule_all()
+
+    def add_airport(self, airport: Airport):
+        super().add_airport(airport)
+        self._airport_synced.append(self._tick)
+        self._slot.append(None)
+
+    def add_aircraft(self, aircraft: Aircraft):
+        super().add_aircraft(aircraft)
+        self._aircraft_synced.append(self._tick)
+        self._leg.append(0)
+        self._schedule_leg(len(self._aircrafts) - 1)
+
+    def _schedule_all(self):
+        # все сущности считаются синхронизированными на текущий такт
+        self._queue = []
+        self._seq = count()
+
+        self._aircraft_synced = [self._tick] * len(self._aircrafts)
+        self._leg = [0] * len(self._aircrafts)
+
+        self._airport_synced = [self._tick] * len(self._airports)
+        self._slot = [None] * len(self._airports)
+
+        for i in range(len(self._aircrafts)):
+            self._schedule_leg(i)
+        for i in range(len(self._airports)):
+            self._schedule_slot(i)
+
+    def _restore_tick(self, tick: int):
+        super()._restore_tick(tick)
+        self._schedule_all()
+
+    def _push(self, tick: int, phase: int, index: int, kind: int, leg: int = 0):
+        heapq.heappush(self._queue, (tick, phase, index, next(self._seq), kind, leg))
+
+    def _schedule_leg(self, i: int):
+        aircraft = self._aircrafts[i]
+        if aircraft.destroyed or aircraft.status == AircraftStatus.Landed:
+            return
+
+        synced = self._aircraft_synced[i]
+        leg = self._leg[i]
+
+        # на шаге synced + j проверка видит time + j - 1
+        destruction = synced + max(1, aircraft.life_time() - aircraft.time + 1)
+
+        if aircraft.status == AircraftStatus.EnRoute:
+            arrival = synced + moves_to_arrive(aircraft.pos, aircraft.destination.pos, aircraft.speed)
+            if arrival < destruction:
+                self._push(arrival, _AIRCRAFT_PHASE, i, ARRIVAL, leg)
+
+        self._push(destruction, _AIRCRAFT_PHASE, i, DESTRUCTION, leg)
+
+    def _schedule_slot(self, i: int):
+        airport = self._airports[i]
+
+        if airport.waiting_aircrafts:
+            skip = airport.next_slot()
+        else:
+            clock = airport.departure_clock()
+            if clock is None:
+                return
+            skip = airport.next_slot(clock)
+
+        tick = self._airport_synced[i] + 1 + skip
+        if self._slot[i] is not None and self._slot[i] <= tick:
+            return
+
+        self._slot[i] = tick
+        self._push(tick, _AIRPORT_PHASE, i, AIRPORT_SLOT)
+
+    def _sync_aircraft(self, i: int, tick: int):
+        ticks = tick - self._aircraft_synced[i]
+        if ticks > 0:
+            self._aircrafts[i].advance(ticks)
+            self._aircraft_synced[i] = tick
+
+    def _sync_airport(self, i: int, tick: int):
+        ticks = tick - self._airport_synced[i]
+        if ticks > 0:
+            self._airports[i].advance(ticks)
+            self._airport_synced[i] = tick
+
+    def _process(self, tick: int, index: int, kind: int, leg: int):
+        if kind == AIRPORT_SLOT:
+            if self._slot[index] != tick:
+                return
+            self._slot[index] = None
+
+            airport = self._airports[index]
+            self._sync_airport(index, tick - 1)
+            for aircraft in [*airport.waiting_aircrafts, *airport.parked_aircrafts]:
+                self._sync_aircraft(self._aircraft_index[aircraft], tick)
+
+            airport.step()
+            self._airport_synced[index] = tick
+            self._schedule_slot(index)
+            return
+
+        if leg != self._leg[index]:
+            return
+
+        aircraft = self._aircrafts[index]
+
+        if kind == ARRIVAL:
+            destination = self._airport_index[aircraft.destination]
+            self._sync_airport(destination, tick - 1)
+            self._sync_aircraft(index, tick - 1)
+            aircraft.arrive()
+            self._aircraft_synced[index] = tick
+            self._schedule_slot(destination)
+
+        elif kind == DESTRUCTION:
+            if aircraft.destroyed or aircraft.status == AircraftStatus.Landed:
+                return
+            self._sync_aircraft(index, tick - 1)
+            aircraft.step()
+            self._aircraft_synced[index] = tick
+
+    def depart(self, aircraft):
+        super().depart(aircraft)
+
+        i = self._aircraft_index[aircraft]
+        self._leg[i] += 1
+        self._aircraft_synced[i] = self._tick
+        self._schedule_leg(i)
+
+    def ticks_to_next_event(self) -> int:
+        queue = self._queue
+        while queue:
+            tick, _, index, _, kind, leg = queue[0]
+            if kind == AIRPORT_SLOT and self._slot[index] == tick:
+                break
+            if kind != AIRPORT_SLOT and leg == self._leg[index]:
+                break
+            heapq.heappop(queue)
+
+        if not queue:
+            return None
+        return queue[0][0] - self._tick
+
+    def advance(self, ticks: int):
+        target = self._tick + ticks
+        if self._conflicts is not None:
+            self._advance_checked(target)
+            return
+        if self._telemetry is not None:
+            # тактов как таких нет, поэтому меряются отрезки до очередного среза телеметрии
+            while self._tick < target:
+                self._advance_timed(min(target, self._telemetry.next_sample(self._tick)))
+            return
+
+        queue = self._queue
+
+        while queue and queue[0][0] <= target:
+            tick, _, index, _, kind, leg = heapq.heappop(queue)
+            self._tick = tick
+            self._process(tick, index, kind, leg)
+
+        self._tick = target
+        self._sync_all(target)
+
+    def _sync_all(self, tick: int):
+        # наружу модель отдаётся целиком в состоянии такта tick
+        for i in range(len(self._aircrafts)):
+            self._sync_aircraft(i, tick)
+        for i in range(len(self._airports)):
+            self._sync_airport(i, tick)
+
+    def _advance_checked(self, target: int):
+        # сближения ищутся между фазами каждого такта, как в Model.step, так что
+        # такты идут по одному: события самолётов, поиск пар, события аэропортов
+        queue = self._queue
+        telemetry = self._telemetry
+
+        while self._tick < target:
+            tick = self._tick = self._tick + 1
+            start = perf_counter()
+            while queue and queue[0][:2] <= (tick, _AIRCRAFT_PHASE):
+                at, _, index, _, kind, leg = heapq.heappop(queue)
+                self._process(at, index, kind, leg)
+
+            for i in range(len(self._aircrafts)):
+                self._sync_aircraft(i, tick)
+            self._conflicts.check()
+
+            middle = perf_counter()
+            while queue and queue[0][0] <= tick:
+                at, _, index, _, kind, leg = heapq.heappop(queue)
+                self._process(at, index, kind, leg)
+            if telemetry is not None:
+                telemetry.record(tick, middle - start, perf_counter() - middle)
+
+        self._sync_all(target)
+
+    def _advance_timed(self, target: int):
+        queue = self._queue
+        seconds = [0.0, 0.0]
+
+        while queue and queue[0][0] <= target:
+            tick, phase, index, _, kind, leg = heapq.heappop(queue)
+            self._tick = tick
+            start = perf_counter()
+            self._process(tick, index, kind, leg)
+            seconds[phase] += perf_counter() - start
+
+        self._tick = target
+        start = perf_counter()
+        self._sync_all(target)
+        seconds[_AIRCRAFT_PHASE] += perf_counter() - start
+
+        self._telemetry.record(target, *seconds)
+
+    def step(self):
+        self.advance(1)
@@ -0,0 +1,173 @@
+from typing import Iterable
+
+import numpy as np
+
+from aircraft import Aircraft, AircraftStatus
+from airport import Airport
+from model import Model
+from vector import Vec2d
+
+_EN_ROUTE = AircraftStatus.EnRoute.value
+_LANDING = AircraftStatus.Landing.value
+_LANDED = AircraftStatus.Landed.value
+
+# Состояние полёта всех самолётов в столбцах numpy. Самолёты, добавленные во флот,
+# становятся представлениями своих строк, а step() двигает их за один векторный проход.
+class Fleet:
+    _columns = (
+        ('_x', np.float64),
+        ('_y', np.float64),
+        ('_speed', np.float64),
+        ('_dest', np.int32),
+        ('_time', np.int64),
+        ('_life', np.int64),
+        ('_status', np.int8),
+        ('_destroyed', np.bool_),
+    )
+
+    def __init__(self, airports: list[Airport], capacity: int = 16):
+        self._airport_index = {airport: i for i, airport in enumerate(airports)}
+        self._airport_x = np.array([a.pos.x for a in airports], dtype=np.float64)
+        self._airport_y = np.array([a.pos.y for a in airports], dtype=np.float64)
+
+        self._aircrafts = []
+        self._size = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        for name, dtype in self._columns:
+            column = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                column[:self._size] = old[:self._size]
+            setattr(self, name, column)
+        self._capacity = capacity
+
+    def __len__(self):
+        return self._size
+
+    def add_airport(self, airport: Airport):
+        self._airport_index[airport] = len(self._airport_index)
+        self._airport_x = np.append(self._airport_x, airport.pos.x)
+        self._airport_y = np.append(self._airport_y, airport.pos.y)
+
+    def add(self, aircraft: Aircraft) -> int:
+        if aircraft._fleet is not None:
+            raise ValueError(f"aircraft {aircraft.name} already belongs to a fleet")
+
+        if self._size == self._capacity:
+            self._allocate(self._capacity * 2)
+
+        row = self._size
+        pos = aircraft.pos
+        self._x[row] = pos.x
+        self._y[row] = pos.y
+        self._speed[row] = aircraft.speed
+        self._dest[row] = self._airport_index[aircraft.destination]
+        self._time[row] = aircraft.time
+        self._life[row] = aircraft.life_time()
+        self._status[row] = aircraft.status.value
+        self._destroyed[row] = aircraft.destroyed
+
+        self._aircrafts.append(aircraft)
+        self._size += 1
+        aircraft._bind(self, row)
+        return row
+
+    # чтение строк для представлений Aircraft
+
+    def pos(self, row: int) -> Vec2d:
+        return Vec2d(float(self._x[row]), float(self._y[row]))
+
+    def time(self, row: int) -> int:
+        return int(self._time[row])
+
+    def status(self, row: int) -> AircraftStatus:
+        return AircraftStatus(int(self._status[row]))
+
+    def destroyed(self, row: int) -> bool:
+        return bool(self._destroyed[row])
+
+    # изменения, которые раньше делал сам Aircraft
+
+    def depart(self, row: int):
+        aircraft = self._aircrafts[row]
+        self._dest[row] = self._airport_index[aircraft.destination]
+        self._life[row] = aircraft.life_time()
+        self._status[row] = _EN_ROUTE
+        self._time[row] = 0
+
+    def retarget(self, row: int):
+        self._dest[row] = self._airport_index[self._aircrafts[row].destination]
+
+    def landed(self, row: int):
+        self._status[row] = _LANDED
+
+    def step(self):
+        n = self._size
+        x = self._x[:n]
+        y = self._y[:n]
+        status = self._status[:n]
+        destroyed = self._destroyed[:n]
+
+        # Aircraft.__destroy_check для всех сразу
+        doomed = ~destroyed & (status != _LANDED) & (self._time[:n] >= self._life[:n])
+        if doomed.any():
+            destroyed |= doomed
+            for row in np.flatnonzero(doomed).tolist():
+                self._aircrafts[row]._notify_destroyed()
+
+        # Aircraft.__move для всех летящих
+        moving = np.flatnonzero((status == _EN_ROUTE) & ~destroyed)
+        if moving.size:
+            dest = self._dest[moving]
+            tx = self._airport_x[dest]
+            ty = self._airport_y[dest]
+            dx = tx - x[moving]
+            dy = ty - y[moving]
+            dist = np.sqrt(dx * dx + dy * dy)
+            speed = self._speed[moving]
+
+            arrived = dist <= speed
+            going = ~arrived
+            rows = moving[going]
+            x[rows] += dx[going] / dist[going] * speed[going]
+            y[rows] += dy[going] / dist[going] * speed[going]
+
+            if arrived.any():
+                rows = moving[arrived]
+                x[rows] = tx[arrived]
+                y[rows] = ty[arrived]
+                status[rows] = _LANDING
+
+                for row in rows.tolist():
+                    aircraft = self._aircrafts[row]
+                    aircraft.destination.land_request(aircraft)
+
+        self._time[:n] += 1
+
+class FleetModel(Model):
+    # флот шагает всех сразу столбцами
+    _uses_activity = False
+
+    def __init__(self, aircrafts: Iterable[Aircraft], airports: Iterable[Airport], seed: int | None = None):
+        super().__init__(aircrafts, airports, seed)
+
+        self._fleet = Fleet(self._airports, capacity=max(16, len(self._aircrafts)))
+        for aircraft in self._aircrafts:
+            self._fleet.add(aircraft)
+
+    def add_airport(self, airport: Airport):
+        super().add_airport(airport)
+        self._fleet.add_airport(airport)
+
+    def add_aircraft(self, aircraft: Aircraft):
+        super().add_aircraft(aircraft)
+        self._fleet.add(aircraft)
+
+    @property
+    def fleet(self) -> Fleet:
+        return self._fleet
+
+    def _step_aircrafts(self):
+        self._fleet.step()
@@ -1,13 +1,15 @@
+from itertools import islice
 import pyray as rl
 from model import Model
-from aircraft import Aircraft, CargoAircraft, PassengerAircraft
+from runner import SimulationRunner, SPEEDS
+from stats import FleetStats
 from drawable import Drawable
 from stepable import Stepable
 
 class FilterBox(Drawable):
-    def __init__(self, graphics, aircrafts) -> None:
+    def __init__(self, graphics, model: Model) -> None:
         super().__init__()
-        self._aircrafts = aircrafts
+        self._model = model
         self._graphics = graphics
         
         self._raw_text = []
@@ -19,24 +21,29 @@ class FilterBox(Drawable):
 
         try:
             filter_time = float(self._input_text)
-            l = list(filter(lambda x: x.life_time() - x.time <= filter_time and not x.destroyed, self._aircrafts))
-
-            if not l:
-                menu_text += '  No data'
-            
-            for i in l:
-                menu_text += '  {}:\n    max {}\n    current {}\n    remain {}\n'.format(
-                    i.name,
-                    i.life_time(),
-                    i.time,
-                    i.life_time() - i.time)
-        except:
+        except ValueError:
             if self._input_text == '':
                 menu_text += '  No input'
             else:
                 menu_text += '  Incorrect input'
-        
-        return menu_text
+            return menu_text
+
+        # уже отсортированы по оставшемуся времени
+        l = self._model.aircrafts_expiring(filter_time)
+
+        if not l:
+            menu_text += '  No data'
+        
+        lines = []
+        for i in l:
+            life_time = i.life_time()
+            lines.append('  {}:\n    max {}\n    current {}\n    remain {}\n'.format(
+                i.name,
+                life_time,
+                i.time,
+                life_time - i.time))
+        
+        return menu_text + ''.join(lines)
             
     @property
     def _input_text(self):
@@ -63,28 +70,32 @@ than the specified value:''',
         return rl.check_collision_point_rec(mouse, self._shape)
 
 class Menu:
-    def __init__(self, graphics, aircrafts: list[Aircraft]) -> None:
-        self._aircrafts = aircrafts
+    _line_height = 20
+
+    def __init__(self, graphics, model: Model) -> None:
+        self._aircrafts = model.aircrafts
+        self._stats = FleetStats(model)
         
         self._info = None
         self._shape = rl.Rectangle(graphics.screen_width - 250, 5, 240, graphics.screen_height - 10)
         
     def _default_info(self):
-        l = list(filter(lambda x: x.destroyed, self._aircrafts))
-        dead_pas = sum([x.passangers for x in list(filter(lambda x: isinstance(x, PassengerAircraft), l))])
-        dead_cargo = sum([x.cargoWeight for x in list(filter(lambda x: isinstance(x, CargoAircraft), l))])
+        stats = self._stats
         
         menu_text = f'''
-Destroyed planes: {len(l)}
-Dead passangers: {dead_pas}
-Dead cargo: {dead_cargo} T
+Destroyed planes: {stats.destroyed}
+Dead passangers: {stats.dead_passangers}
+Dead cargo: {stats.dead_cargo:.2f} T
 
+Aircrafts:
 '''
         
-        menu_text += 'Aircrafts:\n'
-        for i in self._aircrafts:
-            menu_text += '    {}: {:.1f}\n'.format(i.name, i.pos)
-        return menu_text
+        # строк больше, чем влезает в меню, всё равно не видно
+        lines = int(self._shape.height // self._line_height) - menu_text.count('\n')
+        listing = ['    {}: {:.1f}'.format(i.name, i.pos) for i in islice(self._aircrafts, max(lines - 1, 0))]
+        if len(self._aircrafts) > len(listing):
+            listing.append(f'    ... {len(self._aircrafts) - len(listing)} more')
+        return menu_text + '\n'.join(listing) + '\n'
             
     @property
     def info(self):
@@ -116,7 +127,7 @@ class GUI:
         
         
 
-        self._paused = False
+        self._runner = None
         self._current_marked = None
         
     @property
@@ -127,16 +138,30 @@ class GUI:
         return self._screen_height
     
     def set_model(self, model):
+        if self._runner is not None:
+            self._runner.stop()
+
         self._model = model
-        self._menu = Menu(self, model.aircrafts)
-        self._filter_box = FilterBox(self, model.aircrafts)
+        self._menu = Menu(self, model)
+        self._filter_box = FilterBox(self, model)
         
-        self._drawable = model.drawable
-        self._drawable.append(self._filter_box)
+        # модель шагает в своём потоке, GUI рисует только опубликованные снимки
+        self._runner = SimulationRunner(model)
+        self._runner.info_source = self._menu._default_info
+        self._runner.start()
         
     def update_graphics(self):
         if rl.is_key_pressed(rl.KeyboardKey.KEY_SPACE):
             self._toggle_pause()
+        if rl.is_key_pressed(rl.KeyboardKey.KEY_RIGHT):
+            self._runner.step_once()
+        if not self._filter_box._marked:
+            for key, speed in zip(self._speed_keys, SPEEDS):
+                if rl.is_key_pressed(key):
+                    self._runner.speed = speed
+        
+        snapshot, self._hit_grid = self._runner.frame
+        self._drawable = [*snapshot.airports, *snapshot.aircrafts, self._filter_box]
         
         self._update_menu()
         
@@ -149,47 +174,75 @@ class GUI:
             i.draw()
             
         rl.draw_fps(10, 10)
+        rl.draw_text(self._speed_text(), 10, 32, 20, rl.DARKGREEN)
 
         rl.end_drawing()
-
-        if not self._paused:
-            self._model.step()
     
+    _speed_keys = (
+        rl.KeyboardKey.KEY_ONE,
+        rl.KeyboardKey.KEY_TWO,
+        rl.KeyboardKey.KEY_THREE,
+        rl.KeyboardKey.KEY_FOUR,
+    )
 
+    def _speed_text(self):
+        if self._runner.paused:
+            return 'paused'
+        if self._runner.speed is None:
+            return 'max'
+        return f'x{self._runner.speed}'
     
     def should_close(self):
         cond = rl.window_should_close()
         if cond:
+            self._runner.stop()
             rl.close_window()
         return cond
     
+    def _show_info(self, source):
+        self._runner.info_source = source
+
+        published, text = self._runner.info
+        if published == source:
+            self._menu.info = text
+    
     def _update_menu(self):
         mouse = rl.get_mouse_position()
         click = rl.is_mouse_button_pressed(rl.MouseButton.MOUSE_BUTTON_LEFT)
         
         if self._current_marked and not click:
-            self._menu.info = self._current_marked.info()
+            self._show_info(self._current_marked.info)
             return
         
-        for i in self._drawable:
-            if i.check_collision(mouse):
-                if click:
-                    if self._current_marked:
-                        self._current_marked.toggle_marked()
-                    i.toggle_marked()
-                    self._current_marked = i
-                self._menu.info = i.info()
-                return
+        hit = self._hit_test(mouse)
+        if hit is not None:
+            # снимки рисуются, а помечается и описывается сама сущность
+            entity = getattr(hit, 'entity', hit)
+            if click:
+                if self._current_marked:
+                    self._current_marked.toggle_marked()
+                entity.toggle_marked()
+                self._current_marked = entity
+            self._show_info(entity.info)
+            return
             
-        del self._menu.info
+        self._show_info(self._menu._default_info)
         if click:
             if self._current_marked:
                 self._current_marked.toggle_marked()
             self._current_marked = None
-            
-        
 
-    
+    def _hit_test(self, mouse):
+        # проверяются только элементы из клетки под курсором; номера идут в порядке
+        # self._drawable, так что, как и раньше, побеждает первый
+        for i in sorted(self._hit_grid.at(mouse.x, mouse.y)):
+            if self._drawable[i].check_collision(mouse):
+                return self._drawable[i]
+
+        # FilterBox последний в self._drawable и в сетку не попадает
+        if self._filter_box.check_collision(mouse):
+            return self._filter_box
+        return None
 
     def _toggle_pause(self):
-        self._paused = not self._paused
\ No newline at end of file
+        self._runner.toggle_pause()
\ No newline at end of file
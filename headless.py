@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import os
+import time
+from typing import Callable
+
+import scenario
+from aircraft import CargoAircraft, PassengerAircraft
+from departures import WEIGHTS
+from model import Model
+
+def run(model: Model, ticks: int | None = None, until: Callable[[Model], bool] | None = None) -> int:
+    if ticks is None and until is None:
+        raise ValueError("either ticks or until must be given")
+
+    if until is None:
+        model.advance(ticks)
+        return ticks
+
+    done = 0
+    while ticks is None or done < ticks:
+        if until(model):
+            break
+
+        # событийная модель перескакивает сразу к следующему событию
+        jump = model.ticks_to_next_event()
+        if jump is None:
+            if ticks is not None:
+                model.advance(ticks - done)
+                done = ticks
+            break
+
+        if ticks is not None:
+            jump = min(jump, ticks - done)
+        model.advance(jump)
+        done += jump
+
+    return done
+
+def engine(name: str) -> type[Model]:
+    if name == 'object':
+        return Model
+    if name == 'fleet':
+        # numpy нужен только векторному движку
+        from fleet import FleetModel
+        return FleetModel
+    if name == 'event':
+        from eventsim import EventModel
+        return EventModel
+    raise ValueError(f"unknown engine {name!r}")
+
+def summary(model: Model) -> dict:
+    destroyed = [x for x in model.aircrafts if x.destroyed]
+
+    return {
+        'tick': model.tick,
+        'aircrafts': len(model.aircrafts),
+        'airports': len(model.airports),
+        'destroyed': len(destroyed),
+        'dead_passangers': sum(x.passangers for x in destroyed if isinstance(x, PassengerAircraft)),
+        'dead_cargo': sum(x.cargo_weight for x in destroyed if isinstance(x, CargoAircraft)),
+    }
+
+def destroyed_at_least(count: int) -> Callable[[Model], bool]:
+    return lambda model: sum(1 for x in model.aircrafts if x.destroyed) >= count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the simulation without a window')
+    parser.add_argument('--scenario', default='default', choices=sorted(scenario.SCENARIOS))
+    parser.add_argument('--scenario-file', default=None, metavar='PATH',
+                        help='load the scenario from a JSON or CSV file instead')
+    parser.add_argument('--ticks', type=int, default=None, help='number of ticks to simulate')
+    parser.add_argument('--until-destroyed', type=int, default=None, metavar='N',
+                        help='stop as soon as N aircrafts are destroyed')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--engine', default='object', choices=['object', 'fleet', 'event'],
+                        help='per-object stepping, the vectorized numpy fleet or discrete events')
+    parser.add_argument('--destination-weights', default='uniform', choices=sorted(WEIGHTS),
+                        help='how departing aircraft pick their next airport')
+    parser.add_argument('--routes', action='store_true',
+                        help='send aircraft along multi-hop routes they can fly instead of straight to any airport')
+    parser.add_argument('--route-reserve', type=int, default=150, metavar='TICKS',
+                        help='flight time kept in reserve for the landing queue when planning routes')
+    parser.add_argument('--separation', type=float, default=None, metavar='R',
+                        help='report aircraft pairs closer than R after every tick')
+    parser.add_argument('--load-snapshot', default=None, metavar='PATH',
+                        help='resume from a snapshot instead of building the scenario')
+    parser.add_argument('--save-snapshot', default=None, metavar='PATH',
+                        help='write a snapshot of the final state')
+    parser.add_argument('--record', default=None, metavar='PATH',
+                        help='append every departure decision to a replay log')
+    parser.add_argument('--replay', default=None, metavar='PATH',
+                        help='take departure decisions from a replay log instead of sampling them')
+    parser.add_argument('--history-spill', default=None, metavar='PATH',
+                        help='append every visited airport to this file (memory keeps only the latest)')
+    parser.add_argument('--shards', type=int, default=None, metavar='N',
+                        help='split the airports into N regions stepped by separate processes')
+    parser.add_argument('--window', type=int, default=100, metavar='K',
+                        help='ticks between shard barriers (capped by the lookahead)')
+    parser.add_argument('--telemetry', default=None, metavar='PATH',
+                        help='write step timings, aircraft counts and airport queues to this file')
+    parser.add_argument('--telemetry-every', type=int, default=100, metavar='K',
+                        help='ticks between telemetry samples')
+    parser.add_argument('--telemetry-format', default='csv', choices=['csv', 'prometheus'])
+    parser.add_argument('--trajectory', default=None, metavar='DIR',
+                        help='record aircraft tracks into memory-mapped .npy columns in this directory')
+    parser.add_argument('--trajectory-every', type=int, default=1, metavar='K',
+                        help='record every K-th tick')
+    parser.add_argument('--trajectory-changes', action='store_true',
+                        help='record only state changes (departures, landings, destructions)')
+    parser.add_argument('--serve', default=None, metavar='HOST:PORT',
+                        help='stream the live state to TCP clients (see stream.py)')
+    parser.add_argument('--serve-rate', type=float, default=None, metavar='TPS',
+                        help='ticks per second while serving (as fast as possible by default)')
+    parser.add_argument('--profile', nargs='?', const='all', default=None, metavar='SCOPES',
+                        help='time the named hot paths (comma separated, all by default); '
+                             'AIRSIM_PROFILE does the same')
+    parser.add_argument('--profile-window', default=None, metavar='A:B',
+                        help='also run the sampling profiler from tick A to tick B of the run')
+    parser.add_argument('--profile-interval', type=float, default=1.0, metavar='MS',
+                        help='sampling interval in milliseconds')
+    parser.add_argument('--profile-out', default=None, metavar='PREFIX',
+                        help='prefix of the collapsed stack files (AIRSIM_PROFILE_OUT or profile)')
+    parser.add_argument('--profile-top', type=int, default=20, metavar='N')
+    args = parser.parse_args(argv)
+
+    if args.ticks is None and args.until_destroyed is None:
+        parser.error('at least one of --ticks and --until-destroyed is required')
+    if args.shards is not None:
+        if args.ticks is None or args.until_destroyed is not None:
+            parser.error('--shards needs --ticks and does not support --until-destroyed')
+        if args.record or args.replay or args.history_spill or args.destination_weights != 'uniform':
+            parser.error('--shards does not support --record, --replay, --history-spill or --destination-weights')
+        if args.telemetry is not None or args.trajectory is not None or args.serve is not None:
+            parser.error('--shards does not support --telemetry, --trajectory or --serve')
+        if args.separation is not None or args.routes:
+            parser.error('--shards does not support --separation or --routes')
+    serve = None
+    if args.serve is not None:
+        host, _, port = args.serve.rpartition(':')
+        if not port.isdigit():
+            parser.error('--serve must look like HOST:PORT')
+        serve = (host or '127.0.0.1', int(port))
+        if args.profile_window is not None or (args.trajectory is not None and not args.trajectory_changes):
+            parser.error('--serve does not support --profile-window or dense --trajectory')
+    if args.telemetry_every < 1:
+        parser.error('--telemetry-every must be positive')
+
+    window = None
+    if args.profile_window is not None:
+        try:
+            window = tuple(int(x) for x in args.profile_window.split(':'))
+        except ValueError:
+            window = ()
+        if len(window) != 2 or not 0 <= window[0] < window[1]:
+            parser.error('--profile-window must look like A:B with 0 <= A < B')
+        if args.shards is not None:
+            parser.error('--shards does not support --profile-window')
+        if args.trajectory is not None and not args.trajectory_changes:
+            parser.error('--profile-window only works with --trajectory-changes')
+    if args.trajectory_every < 1:
+        parser.error('--trajectory-every must be positive')
+
+    import profiling
+    try:
+        if args.profile is not None:
+            scopes = profiling.ScopeProfiler(profiling.parse_scopes(args.profile, profiling.SIMULATION_PATHS))
+        else:
+            scopes = profiling.from_environment(profiling.SIMULATION_PATHS)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.load_snapshot is not None:
+        # снимок восстанавливает и зерно с потоками, так что --seed здесь не нужен
+        model = engine(args.engine).load_snapshot(args.load_snapshot)
+    elif args.scenario_file is not None:
+        model = scenario.load(args.scenario_file, engine(args.engine), args.seed)
+    else:
+        model = scenario.SCENARIOS[args.scenario](engine(args.engine), args.seed)
+
+    model.set_destination_weights(*WEIGHTS[args.destination_weights])
+    if args.routes:
+        model.set_route_planning(args.route_reserve)
+    if args.separation is not None:
+        try:
+            model.set_conflict_separation(args.separation)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.replay is not None:
+        model.replay_from(args.replay)
+    if args.record is not None:
+        model.start_recording(args.record)
+    if args.history_spill is not None:
+        model.start_history_spill(args.history_spill)
+
+    telemetry = None
+    if args.telemetry is not None:
+        from telemetry import Telemetry
+        telemetry = Telemetry(model, args.telemetry, args.telemetry_every, args.telemetry_format)
+
+    trajectory = None
+    if args.trajectory is not None:
+        from trajectory import TrajectoryWriter
+        trajectory = TrajectoryWriter(model, args.trajectory, args.trajectory_every, args.trajectory_changes)
+
+    until = None
+    if args.until_destroyed is not None:
+        until = destroyed_at_least(args.until_destroyed)
+
+    if scopes is not None:
+        scopes.start()
+
+    start = time.perf_counter()
+    if window is not None:
+        done = _run_sampled(model, args.ticks, until, window, args.profile_interval / 1000,
+                            args.profile_out, args.profile_top)
+    elif args.shards is not None:
+        from sharding import ShardedRun
+        with ShardedRun(model, args.shards, args.window) as sharded:
+            sharded.advance(args.ticks)
+            # дальше (снимок, сводка) работаем с собранной обычной моделью
+            model = sharded.collect()
+        done = args.ticks
+    elif serve is not None:
+        done = asyncio.run(_serve(model, serve, args.ticks, args.serve_rate, until))
+    elif trajectory is not None:
+        done = trajectory.advance(args.ticks, until)
+    else:
+        done = run(model, args.ticks, until)
+    elapsed = time.perf_counter() - start
+
+    model.stop_recording()
+    model.stop_history_spill()
+    if telemetry is not None:
+        telemetry.close()
+    if trajectory is not None:
+        trajectory.close()
+    if args.save_snapshot is not None:
+        model.save_snapshot(args.save_snapshot)
+
+    for key, value in summary(model).items():
+        print(f'{key}: {value}')
+    if model.conflicts is not None:
+        print(f'conflicts: {model.conflicts.total}')
+    print(f'elapsed: {elapsed:.3f} s ({done / elapsed if elapsed else float("inf"):.0f} ticks/s)')
+
+    if scopes is not None:
+        profiling.finish(scopes, args.profile_out, args.profile_top)
+
+async def _serve(model: Model, address: tuple[str, int], ticks: int | None, rate: float | None, until) -> int:
+    from stream import StateServer
+
+    async with StateServer(model, *address) as server:
+        print(f'serving on {address[0]}:{server.port}', flush=True)
+        return await server.run(ticks, rate, until)
+
+def _run_sampled(model: Model, ticks: int | None, until, window: tuple[int, int], interval: float,
+                 prefix: str | None, top: int) -> int:
+    # прогон делится на три части, и сэмплер работает только в средней
+    import profiling
+
+    first, last = window
+    if ticks is not None:
+        first, last = min(first, ticks), min(last, ticks)
+
+    def stopped():
+        return until is not None and until(model)
+
+    done = run(model, first, until)
+    if last > first and not stopped():
+        start = model.tick
+        with profiling.SamplingProfiler(interval) as sampler:
+            done += run(model, last - first, until)
+
+        prefix = prefix or os.environ.get('AIRSIM_PROFILE_OUT', 'profile')
+        profiling.write_collapsed(f'{prefix}.samples.folded', sampler.collapsed())
+        print(f'sampled ticks {start}..{model.tick}: {sampler.samples} samples')
+        print(sampler.summary(top))
+
+    if (ticks is None or done < ticks) and not stopped():
+        done += run(model, None if ticks is None else ticks - done, until)
+    return done
+
+if __name__ == "__main__":
+    main()
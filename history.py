@@ -0,0 +1,130 @@
+import os
+import struct
+from array import array
+
+# История посещённых самолётом аэропортов. В памяти только последние size номеров
+# аэропортов (номер - место в model.airports) в кольце фиксированного размера и общее
+# число посещений, так что на долгих прогонах она не растёт. Полный путь при желании
+# дописывается моделью в файл, см. HistorySpill.
+
+HISTORY_SIZE = 16
+
+class VisitHistory:
+    __slots__ = ('_ids', '_size', '_total', '_filled')
+
+    def __init__(self, size: int = HISTORY_SIZE):
+        if size < 1:
+            raise ValueError(f"history size must be positive, got {size}")
+        # кольцо заводится при первом посещении: большинство самолётов в снимке ещё не летали
+        self._ids = None
+        self._size = size
+        self._total = 0
+        # сколько мест кольца занято: после restore посещений может быть больше, чем номеров
+        self._filled = 0
+
+    @classmethod
+    def restore(cls, ids, total: int | None = None, size: int = HISTORY_SIZE) -> 'VisitHistory':
+        # ids - от старых к новым, total - сколько всего было посещений (не меньше len(ids))
+        ids = list(ids)
+        history = cls(size)
+        history._total = max(0, (len(ids) if total is None else total) - len(ids[-size:]))
+        for i in ids[-size:]:
+            history.append(i)
+        return history
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def __len__(self):
+        return self._filled
+
+    def append(self, airport: int):
+        ids = self._ids
+        if ids is None:
+            ids = self._ids = array('i', bytes(4 * self._size))
+        ids[self._total % self._size] = airport
+        self._total += 1
+        if self._filled < self._size:
+            self._filled += 1
+
+    def recent(self, n: int | None = None):
+        # номера от самого нового к старым, без копирования кольца
+        ids = self._ids
+        count = len(self) if n is None else min(n, len(self))
+        if not count:
+            return
+        size = self._size
+        last = self._total - 1
+        for k in range(last, last - count, -1):
+            yield ids[k % size]
+
+    def __iter__(self):
+        # от старых к новым
+        ids = self._ids
+        count = len(self)
+        if not count:
+            return
+        size = self._size
+        for k in range(self._total - count, self._total):
+            yield ids[k % size]
+
+# Файл полного пути: после MAGIC подряд записи (такт, номер самолёта, номер аэропорта),
+# по одной на каждый вылет - аэропорт, из которого самолёт улетел. Файл только дописывается.
+MAGIC = b'AIRVIS01'
+
+_RECORD = struct.Struct('<qii')
+
+class HistoryError(ValueError):
+    pass
+
+class HistorySpill:
+    def __init__(self, path, buffering: int = 1 << 16):
+        self._file = open(path, 'ab', buffering=buffering)
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        else:
+            # дописывать можно только в историю той же версии, а не в чужой файл
+            with open(path, 'rb') as file:
+                if file.read(len(MAGIC)) != MAGIC:
+                    self._file.close()
+                    raise HistoryError(f"{path} is not a visit history of the current version")
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, tick: int, aircraft: int, airport: int):
+        self._file.write(_RECORD.pack(tick, aircraft, airport))
+        self._count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+def read_spill(path, aircraft: int | None = None) -> 'np.ndarray':
+    # записи столбцами tick, aircraft, airport; aircraft - только путь одного самолёта.
+    # numpy импортируется здесь: модель без него стартует быстрее, см. headless.engine
+    import numpy as np
+
+    dtype = np.dtype([('tick', '<i8'), ('aircraft', '<i4'), ('airport', '<i4')])
+    # пустой файл memmap не открывает, а короче MAGIC - не история в любом случае
+    if os.path.getsize(path) < len(MAGIC):
+        raise HistoryError(f"{path} is not a visit history")
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    if raw[:len(MAGIC)].tobytes() != MAGIC:
+        raise HistoryError(f"{path} is not a visit history")
+
+    body = raw[len(MAGIC):]
+    # недописанная последняя запись (например, после падения) отбрасывается
+    body = body[:len(body) - len(body) % dtype.itemsize]
+    records = body.view(dtype)
+    if aircraft is not None:
+        records = records[records['aircraft'] == aircraft]
+    return records
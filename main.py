@@ -1,36 +1,25 @@
+import sys
 import pyray as rl
-from aircraft import Aircraft, CargoAircraft, PassengerAircraft
-from airport import Airport
-from purpose import Purpose
-from model import Model
-from vector import Vec2d
+import profiling
+from aircraft import Aircraft
+import scenario
 from gui import GUI
 
-def main():
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    # AIRSIM_PROFILE включает таймеры горячих путей; обёртки должны встать до set_model,
+    # который запоминает Menu._default_info
+    profiler = profiling.from_environment()
+    if profiler is not None:
+        profiler.start()
+
     graphics = GUI()
     
     Aircraft.load()
     
-    # Создаем аэропорты
-    airports = [
-        Airport("Civil 1", Vec2d(100, 100), 5, Purpose.Civil),
-        Airport("Civil 2", Vec2d(93, 633), 5, Purpose.Civil),
-        Airport("Military 1", Vec2d(700, 100), 5, Purpose.Military),
-        Airport("Military 2", Vec2d(300, 50), 5, Purpose.Military),
-        Airport("General 1", Vec2d(400, 500), 5, Purpose.General)
-    ]
-    
-    # Создаем самолеты разных типов
-    aircrafts = [
-        CargoAircraft.new_rand('Cargo 1', airports[0], Vec2d(150, 150)),
-        CargoAircraft.new_rand('Cargo 2', airports[0], Vec2d(200, 300)),
-        PassengerAircraft.new_rand('Pass 1', airports[1], Vec2d(700, 150)),
-        PassengerAircraft.new_rand('Pass 2', airports[1], Vec2d(600, 300)),
-        Aircraft.new_rand('Empty 1', airports[2], Vec2d(400, 400)),
-        Aircraft.new_rand('Empty 2', airports[2], Vec2d(450, 450))
-    ]
-
-    model = Model(aircrafts, airports)
+    # python main.py [scenario.json | scenario.csv]
+    model = scenario.load(argv[0]) if argv else scenario.default()
     graphics.set_model(model)
 
     while not graphics.should_close():
@@ -40,5 +29,8 @@ def main():
     
     rl.close_window()
 
+    if profiler is not None:
+        profiling.finish(profiler)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,44 +1,272 @@
-import random
+from collections import namedtuple
+from time import perf_counter
+from typing import Iterable
+from activity import ActiveSet
 from airport import Airport
 from aircraft import Aircraft
-from purpose import Purpose
+from departures import DestinationTable
+from events import EventBus, EventKind
+from replay import ReplayReader, ReplayWriter
+from rng import root
 from stepable import Stepable
 
+# согласованное неизменяемое состояние модели на один такт
+ModelSnapshot = namedtuple('ModelSnapshot', 'tick airports aircrafts')
+
 class Model(Stepable):
-    def __init__(self, aircrafts: list[Aircraft], airports: list[Airport]):
+    # шагаются только летящие самолёты, см. activity.py; движки со своим шагом выключают
+    _uses_activity = True
+
+    def __init__(self, aircrafts: Iterable[Aircraft], airports: Iterable[Airport], seed: int | None = None):
         super().__init__()
-        self._aircrafts = aircrafts
-        self._airports = airports
-        
-        for i in self._airports:
-            i.set_model(self)
+        self._tick = 0
+        self._events = EventBus()
+        self._deadlines = None
+
+        # у каждого аэропорта и самолёта свой поток, так что выборки не зависят от порядка обхода
+        self._seed, self._rng = root(seed)
+        self._recorder = None
+        self._spill = None
+        self._replay = None
+        self._telemetry = None
+        self._conflicts = None
+        self._routes = None
+        self._activity = None
+        if self._uses_activity:
+            self._activity = ActiveSet(lambda aircraft: self._aircraft_index[aircraft])
+
+        # самолёты могут приходить из генератора: модель собирает свои списки сама
+        self._aircrafts = []
+        self._airports = []
+        self._aircraft_index = {}
+        self._airport_index = {}
+        self._destinations = DestinationTable()
+
+        for i in airports:
+            self._attach_airport(i)
+        for i in aircrafts:
+            self._attach_aircraft(i)
+
+    def _attach_airport(self, airport):
+        n = len(self._airports)
+        self._airports.append(airport)
+        self._airport_index[airport] = n
+        self._destinations.add(airport)
+        airport.set_model(self)
+        airport.set_rng(self._rng.split('airport', n))
+
+    def _attach_aircraft(self, aircraft):
+        n = len(self._aircrafts)
+        self._aircrafts.append(aircraft)
+        self._aircraft_index[aircraft] = n
+        aircraft.set_model(self)
+        aircraft.set_rng(self._rng.split('aircraft', n))
+        if self._activity is not None:
+            self._activity.join(aircraft)
+
+    def add_airport(self, airport):
+        self._attach_airport(airport)
+        if self._routes is not None:
+            self._routes.invalidate()
+
+    def add_aircraft(self, aircraft):
+        # самолёт в уже собранную модель; движки дополняют это своими структурами
+        self._attach_aircraft(aircraft)
+        if self._deadlines is not None and not aircraft.destroyed:
+            self._deadlines.add(aircraft)
          
     def depart(self, aircraft):
-        options = self.airports[:]
-        options.remove(aircraft.destination)
-        options = list(filter(lambda x: x.purpose in [aircraft.purpose, Purpose.General], options))
+        origin = aircraft.destination
+
+        if self._replay is not None:
+            # цель и груз уже в журнале: выбирать цель и тянуть числа не нужно,
+            # но потоки ставятся туда же, где были при записи, чтобы после журнала
+            # продолжить с того же места
+            target, payload, draws, final = self._replay.next(self._tick, self._aircraft_index[aircraft])
+            target = self._airports[target]
+            if self._routes is not None:
+                self._routes.set_final(aircraft, self._airports[final] if final >= 0 else None)
+            if draws is not None:
+                origin.rng.draws, aircraft.rng.draws = draws
+            else:
+                origin.rng.skip()
+                if payload is not None:
+                    aircraft.rng.skip()
+        elif self._routes is None:
+            target = self._destinations.choose(aircraft.purpose, origin, origin.rng)
+            payload = aircraft.rand_payload()
+        else:
+            # дальность зависит от груза, поэтому груз выбирается первым; потоки у них
+            # разные, так что порядок на сами числа не влияет
+            payload = aircraft.rand_payload()
+            target = self._routes.next_hop(
+                aircraft, origin, payload,
+                lambda: self._destinations.choose(aircraft.purpose, origin, origin.rng))
+
+        aircraft.depart_with(target, payload)
+        if self._activity is not None:
+            self._activity.join(aircraft)
+
+        if self._recorder is not None:
+            final = self._routes.final(aircraft) if self._routes is not None else None
+            self._recorder.append(self._tick, self._aircraft_index[aircraft], self._airport_index[target], payload,
+                                  origin.rng.draws, aircraft.rng.draws,
+                                  -1 if final is None else self._airport_index[final])
+        if self._spill is not None:
+            self._spill.append(self._tick, self._aircraft_index[aircraft], self._airport_index[origin])
+        self._events.publish(EventKind.Departed, aircraft, origin)
 
-        target = random.choice(options)
-        aircraft.depart_rand(target)
+    def set_route_planning(self, reserve: int | None = 150, bucket: float = 50.0):
+        # вылеты по маршрутам с пересадками в пределах дальности, см. routes.py; None - напрямую
+        if reserve is None:
+            self._routes = None
+            return
+        from routes import RoutePlanner
+        # начатые маршруты (например, из снимка) продолжаются и с новыми настройками
+        finals = self._routes.finals if self._routes is not None else None
+        self._routes = RoutePlanner(self, reserve, bucket, finals=finals)
+
+    @property
+    def routes(self):
+        return self._routes
+
+    def set_destination_weights(self, weight, per_origin: bool = True):
+        # weight(origin, target) -> вес цели, см. departures.WEIGHTS; None - равновероятно
+        self._destinations.set_weight(weight, per_origin)
+
+    def start_recording(self, path):
+        # каждый вылет дописывается в журнал, см. replay.py
+        self.stop_recording()
+        self._recorder = ReplayWriter(path)
+
+    def stop_recording(self):
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+    def start_history_spill(self, path):
+        # полный путь каждого самолёта дописывается в файл, в памяти остаются только последние
+        # аэропорты, см. history.py
+        from history import HistorySpill
+
+        self.stop_history_spill()
+        self._spill = HistorySpill(path)
+
+    def stop_history_spill(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def airport_id(self, airport) -> int:
+        return self._airport_index[airport]
+
+    def replay_from(self, path):
+        self._replay = ReplayReader(path)
+
+    def stop_replay(self):
+        self._replay = None
     
 
 
     def step(self):
-        for aircraft in self._aircrafts:
-            '''
-            if aircraft.can_depart():
-                options = self.airports[:]
-                options.remove(aircraft.destination)
-                options = list(filter(lambda x: x.purpose in [aircraft.purpose, Purpose.General], options))
-
-                target = random.choice(options)
-                aircraft.depart_rand(target)
-            '''
-            aircraft.step()
-            
+        self._tick += 1
+
+        if self._telemetry is None:
+            self._step_aircrafts()
+            if self._conflicts is not None:
+                self._conflicts.check()
+            self._step_airports()
+            return
+
+        start = perf_counter()
+        self._step_aircrafts()
+        if self._conflicts is not None:
+            self._conflicts.check()
+        middle = perf_counter()
+        self._step_airports()
+        self._telemetry.record(self._tick, middle - start, perf_counter() - middle)
+
+    def set_telemetry(self, telemetry):
+        # telemetry.Telemetry или None; без неё шаг ничего не меряет
+        self._telemetry = telemetry
+
+    def set_conflict_separation(self, separation: float | None):
+        # после движения на каждом такте искать пары ближе separation; None - не искать
+        if separation is None:
+            self._conflicts = None
+            return
+        from conflicts import ConflictDetector
+        self._conflicts = ConflictDetector(self, separation)
+
+    @property
+    def conflicts(self):
+        # conflicts.ConflictDetector или None
+        return self._conflicts
+
+    def conflicts_of(self, aircraft) -> list[Aircraft]:
+        if self._conflicts is None:
+            return []
+        return [self._aircrafts[x] for x in self._conflicts.conflicts_of(self._aircraft_index[aircraft])]
+
+    def in_conflict(self, aircraft) -> bool:
+        return self._conflicts is not None and bool(self._conflicts.conflicts_of(self._aircraft_index[aircraft]))
+
+    def advance(self, ticks: int):
+        for _ in range(ticks):
+            self.step()
+
+    def ticks_to_next_event(self) -> int | None:
+        # через сколько тактов состояние может измениться; при пошаговой модели - на каждом
+        return 1
+
+    def _step_aircrafts(self):
+        self._activity.step(self._tick)
+
+    def _step_airports(self):
         for airport in self._airports:
             airport.step()
 
+    def aircrafts_expiring(self, within: float) -> list[Aircraft]:
+        # индекс строится при первом запросе, чтобы без запросов не тратить время на события
+        if self._deadlines is None:
+            from deadlines import DeadlineIndex
+            self._deadlines = DeadlineIndex(self)
+        return self._deadlines.expiring(within)
+
+    def save_snapshot(self, path):
+        # двоичный снимок всего состояния, см. snapshot.py
+        from snapshot import save
+        save(self, path)
+
+    @classmethod
+    def load_snapshot(cls, path, mmap: bool = True) -> 'Model':
+        from snapshot import load
+        return load(path, cls, mmap)
+
+    def _restore_tick(self, tick: int):
+        self._tick = tick
+
+    def snapshot(self) -> ModelSnapshot:
+        return ModelSnapshot(self._tick,
+                             tuple(i.state() for i in self._airports),
+                             tuple(i.state() for i in self._aircrafts))
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def replay(self) -> ReplayReader | None:
+        return self._replay
+
+    @property
+    def events(self) -> EventBus:
+        return self._events
+
+    @property
+    def tick(self) -> int:
+        return self._tick
+
     @property
     def airports(self) -> list[Airport]:
         return self._airports
@@ -0,0 +1,225 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Профилирование по запросу. ScopeProfiler подменяет на время работы методы из HOT_PATHS
+# обёртками с таймером, поэтому без него в горячих путях ничего не меняется, а в вывод
+# не попадают вызовы raylib. SamplingProfiler раз в interval секунд снимает стек одного
+# потока. Оба пишут свёрнутые стеки (формат flamegraph.pl / speedscope: "a;b;c N")
+# и печатают сводку по самым дорогим местам.
+#
+# AIRSIM_PROFILE=all или AIRSIM_PROFILE=Aircraft.step,Model.depart включает ScopeProfiler
+# и в окне, и в headless; файлы пишутся с префиксом AIRSIM_PROFILE_OUT (по умолчанию profile).
+
+# имя -> (модуль, класс, метод)
+HOT_PATHS = {
+    'Model.step': ('model', 'Model', 'step'),
+    'Model.depart': ('model', 'Model', 'depart'),
+    'Aircraft.step': ('aircraft', 'Aircraft', 'step'),
+    'Airport.step': ('airport', 'Airport', 'step'),
+    'Airport._land': ('airport', 'Airport', '_land'),
+    'GUI.update_graphics': ('gui', 'GUI', 'update_graphics'),
+    'GUI._update_menu': ('gui', 'GUI', '_update_menu'),
+    'Menu._default_info': ('gui', 'Menu', '_default_info'),
+}
+
+# окно тянет за собой pyray, поэтому headless берёт только эти
+SIMULATION_PATHS = tuple(x for x, (module, _, _) in HOT_PATHS.items() if module != 'gui')
+
+def parse_scopes(text: str, default=tuple(HOT_PATHS)) -> tuple[str, ...]:
+    if text.strip().lower() in ('', '1', 'all'):
+        return tuple(default)
+
+    scopes = tuple(x.strip() for x in text.split(',') if x.strip())
+    unknown = [x for x in scopes if x not in HOT_PATHS]
+    if unknown:
+        raise ValueError(f"unknown profiling scope {unknown[0]!r}, expected one of {', '.join(HOT_PATHS)}")
+    return scopes
+
+class ScopeProfiler:
+    def __init__(self, scopes=tuple(HOT_PATHS)):
+        self._scopes = tuple(scopes)
+        self._patched = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        # свёрнутый стек -> собственное время в секундах
+        self._self_time = Counter()
+        # имя -> [вызовы, полное время, собственное время]
+        self._totals = {x: [0, 0.0, 0.0] for x in self._scopes}
+
+    @property
+    def scopes(self) -> tuple[str, ...]:
+        return self._scopes
+
+    def start(self):
+        if self._patched:
+            return
+        for name in self._scopes:
+            module, cls, method = HOT_PATHS[name]
+            owner = getattr(importlib.import_module(module), cls)
+            original = owner.__dict__[method]
+            setattr(owner, method, self._wrap(name, original))
+            self._patched.append((owner, method, original))
+
+    def stop(self):
+        for owner, method, original in reversed(self._patched):
+            setattr(owner, method, original)
+        self._patched.clear()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _wrap(self, name: str, function):
+        local = self._local
+        totals = self._totals[name]
+        self_time = self._self_time
+        lock = self._lock
+
+        def timed(*args, **kwargs):
+            stack = getattr(local, 'stack', None)
+            if stack is None:
+                # на каждый поток свой стек: модель в окне шагает не в том потоке, где рисование
+                stack = local.stack = []
+                local.children = []
+
+            children = local.children
+            stack.append(name)
+            children.append(0.0)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                own = elapsed - children.pop()
+                key = ';'.join(stack)
+                stack.pop()
+                if children:
+                    children[-1] += elapsed
+
+                with lock:
+                    totals[0] += 1
+                    totals[1] += elapsed
+                    totals[2] += own
+                    self_time[key] += own
+
+        timed.__wrapped__ = function
+        timed.__name__ = function.__name__
+        timed.__qualname__ = function.__qualname__
+        return timed
+
+    def collapsed(self) -> list[str]:
+        # значения в микросекундах: flamegraph.pl принимает только целые числа
+        with self._lock:
+            return [f'{stack} {round(seconds * 1e6)}' for stack, seconds in sorted(self._self_time.items())]
+
+    def summary(self, top: int = 20) -> str:
+        with self._lock:
+            rows = sorted(((x, *y) for x, y in self._totals.items() if y[0]), key=lambda x: -x[3])[:top]
+
+        lines = [f'{"scope":<22} {"calls":>10} {"total s":>10} {"self s":>10} {"us/call":>10}']
+        for name, calls, total, own in rows:
+            lines.append(f'{name:<22} {calls:>10} {total:>10.3f} {own:>10.3f} {total / calls * 1e6:>10.2f}')
+        return '\n'.join(lines)
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.001, thread: int | None = None):
+        self._interval = interval
+        # по умолчанию - поток, который вызвал start
+        self._thread = thread
+        self._samples = Counter()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._switch = None
+
+    @property
+    def samples(self) -> int:
+        return sum(self._samples.values())
+
+    def start(self):
+        if self._sampler is not None:
+            return
+        if self._thread is None:
+            self._thread = threading.get_ident()
+        self._stop.clear()
+        # иначе сэмплер получает GIL не чаще раза в 5 мс, как бы мал ни был interval
+        self._switch = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch, self._interval / 2))
+        self._sampler = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        if self._sampler is None:
+            return
+        self._stop.set()
+        self._sampler.join()
+        self._sampler = None
+        sys.setswitchinterval(self._switch)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                # обёртки ScopeProfiler только удлиняют стеки
+                if frame.f_code.co_filename != __file__:
+                    stack.append(_frame_name(frame))
+                frame = frame.f_back
+            self._samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self) -> list[str]:
+        return [f'{stack} {count}' for stack, count in sorted(self._samples.items())]
+
+    def summary(self, top: int = 20) -> str:
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in self._samples.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            # рекурсия не должна считать одну функцию дважды
+            for name in set(frames):
+                inclusive[name] += count
+
+        total = self.samples or 1
+        lines = [f'{"function":<50} {"self %":>8} {"total %":>8}']
+        for name, count in own.most_common(top):
+            lines.append(f'{name[-50:]:<50} {count * 100 / total:>8.1f} {inclusive[name] * 100 / total:>8.1f}')
+        return '\n'.join(lines)
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f'{os.path.basename(code.co_filename)}:{code.co_qualname}'
+
+def write_collapsed(path, lines: list[str]):
+    with open(path, 'w') as file:
+        file.writelines(x + '\n' for x in lines)
+
+def from_environment(default=tuple(HOT_PATHS)) -> ScopeProfiler | None:
+    text = os.environ.get('AIRSIM_PROFILE')
+    if text is None or text.strip().lower() in ('0', 'no', 'off'):
+        return None
+    return ScopeProfiler(parse_scopes(text, default))
+
+def finish(profiler: ScopeProfiler, prefix: str | None = None, top: int = 20):
+    # снимает обёртки, пишет prefix.scopes.folded и печатает сводку
+    profiler.stop()
+    prefix = prefix or os.environ.get('AIRSIM_PROFILE_OUT', 'profile')
+    write_collapsed(f'{prefix}.scopes.folded', profiler.collapsed())
+    print(profiler.summary(top))
@@ -0,0 +1,91 @@
+import math
+import struct
+
+# Журнал решений о вылете: после MAGIC подряд идут записи фиксированной длины
+# (такт, номер самолёта, номер аэропорта назначения, груз, выборки потоков аэропорта
+# вылета и самолёта после решения, конечная цель маршрута). Груз - вес груза или число
+# пассажиров, NaN - у самолётов без груза. Конечная цель - номер аэропорта, куда самолёт
+# летит с пересадками (см. routes.py), -1 - такого нет. Выбор цели может взять из потока несколько чисел (повтор при
+# весах) или ни одного (продолжение маршрута), поэтому счётчики пишутся как есть и при
+# воспроизведении восстанавливаются точно. Файл только дописывается.
+MAGIC = b'AIRLOG02'
+
+_RECORD = struct.Struct('<qiidqqi')
+
+# в журналах первой версии счётчиков нет: там на вылет тратилось ровно по одному числу
+_MAGIC_V1 = b'AIRLOG01'
+_RECORD_V1 = struct.Struct('<qiid')
+
+class ReplayError(ValueError):
+    pass
+
+class ReplayWriter:
+    def __init__(self, path, buffering: int = 1 << 16):
+        self._file = open(path, 'ab', buffering=buffering)
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        else:
+            with open(path, 'rb') as file:
+                if file.read(len(MAGIC)) != MAGIC:
+                    self._file.close()
+                    raise ReplayError(f"{path} is not a replay log of the current version")
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, tick: int, aircraft: int, target: int, payload, origin_draws: int, aircraft_draws: int,
+               final: int = -1):
+        self._file.write(_RECORD.pack(tick, aircraft, target, math.nan if payload is None else payload,
+                                      origin_draws, aircraft_draws, final))
+        self._count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class ReplayReader:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        if data[:len(MAGIC)] == MAGIC:
+            record = _RECORD
+        elif data[:len(_MAGIC_V1)] == _MAGIC_V1:
+            record = _RECORD_V1
+        else:
+            raise ReplayError(f"{path} is not a replay log")
+
+        body = memoryview(data)[len(MAGIC):]
+        # недописанная последняя запись (например, после падения) отбрасывается
+        body = body[:len(body) - len(body) % record.size]
+
+        self._records = record.iter_unpack(body)
+        self._count = len(body) // record.size
+        self._done = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def remaining(self) -> int:
+        return self._count - self._done
+
+    def next(self, tick: int, aircraft: int) -> tuple[int, float | None, tuple[int, int] | None, int]:
+        # (цель, груз, выборки потоков аэропорта и самолёта, конечная цель маршрута);
+        # у журналов первой версии выборок нет (None) и конечная цель -1
+        record = next(self._records, None)
+        if record is None:
+            raise ReplayError(f"replay log ended before tick {tick}")
+
+        logged_tick, logged_aircraft, target, payload, *rest = record
+        draws, final = (tuple(rest[:2]), rest[2]) if rest else (None, -1)
+        if logged_tick != tick or logged_aircraft != aircraft:
+            raise ReplayError(f"run diverged from the log at record {self._done}: "
+                              f"expected aircraft {logged_aircraft} at tick {logged_tick}, "
+                              f"got aircraft {aircraft} at tick {tick}")
+
+        self._done += 1
+        return target, None if math.isnan(payload) else payload, draws, final
@@ -0,0 +1,47 @@
+import hashlib
+import random
+
+# Счётчиковый генератор: n-е число потока - хэш от (ключ потока, n). Потоки с разными
+# ключами независимы и не зависят от того, в каком порядке их опрашивают, а всё состояние
+# потока - число уже сделанных выборок, которое легко сохранить и восстановить.
+class Stream:
+    __slots__ = ('_key', 'draws')
+
+    def __init__(self, key: str, draws: int = 0):
+        self._key = key
+        self.draws = draws
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    def split(self, *key) -> 'Stream':
+        # дочерний поток; одинаковые ключи дают одинаковые потоки
+        return Stream('/'.join([self._key, *map(str, key)]))
+
+    def skip(self, draws: int = 1):
+        self.draws += draws
+
+    def _bits(self) -> int:
+        data = f'{self._key}#{self.draws}'.encode('utf-8')
+        self.draws += 1
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+    def random(self) -> float:
+        return (self._bits() >> 11) * (1.0 / (1 << 53))
+
+    def randint(self, a: int, b: int) -> int:
+        if b < a:
+            raise ValueError(f"empty range for randint({a}, {b})")
+        return a + (self._bits() * (b - a + 1) >> 64)
+
+    def choice(self, seq):
+        if not seq:
+            raise IndexError('cannot choose from an empty sequence')
+        return seq[self._bits() * len(seq) >> 64]
+
+def root(seed: int | None = None) -> tuple[int, Stream]:
+    # без явного зерна оно берётся из глобального random, так что random.seed() по-прежнему всё определяет
+    if seed is None:
+        seed = random.getrandbits(63)
+    return seed, Stream(str(seed))
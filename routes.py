@@ -0,0 +1,225 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from purpose import Purpose
+
+# Маршруты с пересадками для самолётов, которым цель не по силам за один перелёт.
+# Дальность самолёта - speed * (life_time с новым грузом - reserve): reserve тактов
+# оставлено на ожидание в очереди на посадку. Дальности округляются вниз до шага
+# bucket, и для каждой тройки (аэропорт вылета, назначение самолёта, ступень дальности)
+# один раз строится дерево кратчайших путей по рёбрам не длиннее дальности (длина пути -
+# сумма перелётов плюс hop_cost за каждый). Маршрут до любой цели после этого - проход
+# по дереву, а повторный - просто чтение из словаря.
+
+# до стольких аэропортов матрица расстояний считается целиком, дальше - строками по запросу
+_MATRIX_LIMIT = 2048
+
+class RoutePlanner:
+    def __init__(self, model, reserve: int = 150, bucket: float = 50.0, hop_cost: float = 100.0,
+                 cache_size: int = 4096, finals: dict | None = None):
+        if bucket <= 0:
+            raise ValueError(f"range bucket must be positive, got {bucket}")
+
+        self._model = model
+        self._reserve = reserve
+        self._bucket = bucket
+        # каждая пересадка - ещё очередь и стоянка, поэтому она стоит как лишний путь
+        self._hop_cost = hop_cost
+        self._cache_size = cache_size
+
+        # самолёт -> аэропорт, куда он в итоге летит, пока идёт по маршруту
+        self._final = dict(finals or {})
+        self.invalidate()
+
+    @property
+    def reserve(self) -> int:
+        return self._reserve
+
+    @property
+    def bucket(self) -> float:
+        return self._bucket
+
+    def invalidate(self):
+        # при изменении набора аэропортов всё считается заново
+        airports = self._model.airports
+        self._airports = list(airports)
+        self._index = {x: i for i, x in enumerate(airports)}
+        self._x = np.array([x.pos.x for x in airports], dtype=np.float64)
+        self._y = np.array([x.pos.y for x in airports], dtype=np.float64)
+        self._matrix = None
+        if len(airports) <= _MATRIX_LIMIT:
+            self._matrix = np.hypot(self._x[:, None] - self._x[None, :], self._y[:, None] - self._y[None, :])
+
+        # номера допустимых для назначения аэропортов и обратно, -1 - недопустим
+        self._nodes = {}
+        self._local = {}
+        for purpose in Purpose:
+            if purpose == Purpose.General:
+                continue
+            allowed = np.array([x.purpose in (purpose, Purpose.General) for x in airports], dtype=np.bool_)
+            self._nodes[purpose] = np.flatnonzero(allowed)
+            local = np.full(len(airports), -1, dtype=np.int64)
+            local[self._nodes[purpose]] = np.arange(len(self._nodes[purpose]))
+            self._local[purpose] = local
+
+        self._weights_cache = OrderedDict()
+        self._trees = OrderedDict()
+        self._routes = {}
+
+    def distance(self, origin, target) -> float:
+        return float(self._row(self._index[origin])[self._index[target]])
+
+    def _row(self, i: int) -> np.ndarray:
+        if self._matrix is not None:
+            return self._matrix[i]
+        return np.hypot(self._x - self._x[i], self._y - self._y[i])
+
+    def reach(self, aircraft, payload) -> float:
+        return aircraft.speed * max(aircraft.life_time_with(payload) - self._reserve, 0)
+
+    def route(self, origin, target, purpose: Purpose, reach: float) -> list | None:
+        # аэропорты после origin до target включительно или None, если добраться нельзя
+        bucket = int(reach // self._bucket)
+        if self.distance(origin, target) <= bucket * self._bucket:
+            # прямой перелёт короче любого пути с пересадкой, дерево не нужно
+            return [target]
+
+        key = (origin, target, purpose, bucket)
+        route = self._routes.get(key)
+        if route is None and key not in self._routes:
+            _, previous = self._tree(self._index[origin], purpose, bucket)
+            route = self._unwind(previous, self._index[origin], self._index[target])
+            if len(self._routes) >= self._cache_size * 16:
+                self._routes.clear()
+            self._routes[key] = route
+        return route
+
+    def _weights(self, purpose: Purpose, bucket: int) -> np.ndarray | None:
+        # цены рёбер между допустимыми для назначения аэропортами при этой дальности;
+        # inf - перелёт не по силам. Без полной матрицы строки считаются в _tree
+        if self._matrix is None:
+            return None
+        key = (purpose, bucket)
+        weights = self._weights_cache.get(key)
+        if weights is None:
+            nodes = self._nodes[purpose]
+            block = self._matrix[np.ix_(nodes, nodes)]
+            weights = np.where(block <= bucket * self._bucket, block + self._hop_cost, np.inf)
+            self._weights_cache[key] = weights
+            if len(self._weights_cache) > 8:
+                self._weights_cache.popitem(last=False)
+        else:
+            self._weights_cache.move_to_end(key)
+        return weights
+
+    def _tree(self, origin: int, purpose: Purpose, bucket: int) -> tuple[np.ndarray, np.ndarray]:
+        key = (origin, purpose, bucket)
+        tree = self._trees.get(key)
+        if tree is not None:
+            self._trees.move_to_end(key)
+            return tree
+
+        # Дейкстра на полном графе из аэропортов, куда самолёту этого назначения можно:
+        # на каждом шаге одна строка цен целиком
+        nodes = self._nodes[purpose]
+        n = len(self._airports)
+        distance = np.full(n, np.inf)
+        previous = np.full(n, -1, dtype=np.int64)
+
+        start = self._local[purpose][origin]
+        if start >= 0:
+            weights = self._weights(purpose, bucket)
+            reach = bucket * self._bucket
+            local = np.full(len(nodes), np.inf)
+            parent = np.full(len(nodes), -1, dtype=np.int64)
+            local[start] = 0.0
+            # у закрытых вершин inf, так что argmin выбирает ближайшую открытую
+            frontier = local.copy()
+
+            while True:
+                u = int(np.argmin(frontier))
+                if frontier[u] == np.inf:
+                    break
+                frontier[u] = np.inf
+
+                if weights is not None:
+                    row = weights[u]
+                else:
+                    row = np.hypot(self._x[nodes] - self._x[nodes[u]], self._y[nodes] - self._y[nodes[u]])
+                    row = np.where(row <= reach, row + self._hop_cost, np.inf)
+                through = local[u] + row
+                # у закрытых вершин путь уже не короче, так что проверять открытость не нужно
+                better = through < local
+                local[better] = through[better]
+                frontier[better] = through[better]
+                parent[better] = u
+
+            distance[nodes] = local
+            found = parent >= 0
+            previous[nodes[found]] = nodes[parent[found]]
+
+        tree = self._trees[key] = (distance, previous)
+        if len(self._trees) > self._cache_size:
+            self._trees.popitem(last=False)
+        return tree
+
+    def _unwind(self, previous: np.ndarray, origin: int, target: int) -> list | None:
+        if target != origin and previous[target] < 0:
+            return None
+        hops = []
+        while target != origin:
+            hops.append(self._airports[target])
+            target = int(previous[target])
+        hops.reverse()
+        return hops
+
+    def next_hop(self, aircraft, origin, payload, choose):
+        # choose() - случайная цель, как без маршрутов; тянется только когда прошлая достигнута
+        final = self._final.get(aircraft)
+        if final is None or final is origin or final not in self._index:
+            final = choose()
+
+        reach = self.reach(aircraft, payload)
+        route = self.route(origin, final, aircraft.purpose, reach)
+        if route is None:
+            route = self._closer(origin, final, aircraft.purpose, reach)
+        if not route:
+            # ни одного аэропорта в пределах дальности: летит напрямую, как раньше
+            self._final.pop(aircraft, None)
+            return final
+
+        if route[0] is final:
+            self._final.pop(aircraft, None)
+        else:
+            self._final[aircraft] = final
+        return route[0]
+
+    def _closer(self, origin, final, purpose: Purpose, reach: float) -> list | None:
+        # до цели не добраться: путь к достижимому аэропорту, ближайшему к ней
+        distance, previous = self._tree(self._index[origin], purpose, int(reach // self._bucket))
+        reachable = np.isfinite(distance)
+        reachable[self._index[origin]] = False
+        if not reachable.any():
+            return None
+
+        left = np.where(reachable, self._row(self._index[final]), np.inf)
+        best = int(np.argmin(left))
+        if left[best] >= self.distance(origin, final):
+            return None
+        return self._unwind(previous, self._index[origin], best)
+
+    @property
+    def finals(self) -> dict:
+        # самолёт -> конечная цель, пока он летит по маршруту с пересадками
+        return self._final
+
+    def final(self, aircraft):
+        return self._final.get(aircraft)
+
+    def set_final(self, aircraft, final):
+        # из снимка или журнала; None - самолёт не на маршруте
+        if final is None:
+            self._final.pop(aircraft, None)
+        else:
+            self._final[aircraft] = final
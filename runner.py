@@ -0,0 +1,145 @@
+import threading
+import time
+
+from model import Model, ModelSnapshot
+from spatial import SpatialGrid, hit_grid
+
+# на 1x модель делает такт на кадр при 60 FPS, как раньше в GUI.update_graphics
+BASE_RATE = 60
+# None - без ограничения скорости
+SPEEDS = (1, 10, 100, None)
+
+class SimulationRunner:
+    def __init__(self, model: Model, publish_rate: float = 120):
+        self._model = model
+        self._publish_interval = 1 / publish_rate
+
+        self._speed = 1
+        self._paused = False
+        self._single_steps = 0
+        self._repace = True
+
+        # (источник, текст): источник нужен GUI, чтобы не показать текст от прошлого наведения
+        self._info_source = None
+        self._info = (None, None)
+        # снимок и сетка для поиска под курсором публикуются одной парой
+        self._frame = self._build_frame()
+
+        self._error = None
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    @property
+    def snapshot(self) -> ModelSnapshot:
+        # ошибка в потоке модели должна дойти до GUI, а не тихо остановить симуляцию
+        return self.frame[0]
+
+    @property
+    def frame(self) -> tuple[ModelSnapshot, SpatialGrid]:
+        if self._error is not None:
+            raise self._error
+        return self._frame
+
+    @property
+    def info(self):
+        return self._info
+
+    @property
+    def info_source(self):
+        return self._info_source
+    @info_source.setter
+    def info_source(self, value):
+        if value != self._info_source:
+            self._info_source = value
+            self._wake.set()
+
+    @property
+    def speed(self):
+        return self._speed
+    @speed.setter
+    def speed(self, value):
+        if value not in SPEEDS:
+            raise ValueError(f"speed must be one of {SPEEDS}")
+        self._speed = value
+        self._repace = True
+        self._wake.set()
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def toggle_pause(self):
+        self._paused = not self._paused
+        self._repace = True
+        self._wake.set()
+
+    def step_once(self):
+        # шаг по кнопке работает только на паузе
+        if self._paused:
+            self._single_steps += 1
+            self._wake.set()
+
+    def _build_frame(self):
+        snapshot = self._model.snapshot()
+        return snapshot, hit_grid(snapshot.airports + snapshot.aircrafts)
+
+    def _publish(self):
+        # снимок и текст меню собираются здесь, между шагами, поэтому всегда согласованы
+        if self._frame[0].tick != self._model.tick:
+            self._frame = self._build_frame()
+
+        source = self._info_source
+        self._info = (source, source() if source is not None else None)
+
+    def _run(self):
+        try:
+            self._loop()
+        except BaseException as e:
+            self._error = e
+
+    def _loop(self):
+        model = self._model
+        next_publish = 0.0
+
+        while not self._stop.is_set():
+            self._wake.clear()
+            now = time.perf_counter()
+
+            if self._repace:
+                self._repace = False
+                start_time, start_tick = now, model.tick
+
+            if self._paused:
+                while self._single_steps:
+                    self._single_steps -= 1
+                    model.step()
+                wait = next_publish - now
+            elif self._speed is None:
+                while time.perf_counter() < next_publish:
+                    model.step()
+                wait = 0
+            else:
+                rate = BASE_RATE * self._speed
+                target = start_tick + int((now - start_time) * rate)
+                # если модель не успевает, она отстаёт, но кадры всё равно публикуются
+                while model.tick < target and time.perf_counter() < next_publish:
+                    model.step()
+                wait = min(next_publish, start_time + (model.tick - start_tick + 1) / rate) - time.perf_counter()
+
+            if time.perf_counter() >= next_publish:
+                self._publish()
+                next_publish = time.perf_counter() + self._publish_interval
+
+            if wait > 0:
+                self._wake.wait(wait)
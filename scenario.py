@@ -0,0 +1,178 @@
+import csv
+import json
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from aircraft import Aircraft, CargoAircraft, PassengerAircraft
+from airport import Airport
+from purpose import Purpose
+from model import Model
+from rng import root
+from vector import Vec2d
+
+def default(model_type: type[Model] = Model, seed: int | None = None) -> Model:
+    seed, rng = root(seed)
+    rng = rng.split('scenario')
+
+    # Создаем аэропорты
+    airports = [
+        Airport("Civil 1", Vec2d(100, 100), 5, Purpose.Civil),
+        Airport("Civil 2", Vec2d(93, 633), 5, Purpose.Civil),
+        Airport("Military 1", Vec2d(700, 100), 5, Purpose.Military),
+        Airport("Military 2", Vec2d(300, 50), 5, Purpose.Military),
+        Airport("General 1", Vec2d(400, 500), 5, Purpose.General)
+    ]
+    
+    # Создаем самолеты разных типов
+    aircrafts = [
+        CargoAircraft.new_rand('Cargo 1', airports[0], Vec2d(150, 150), rng),
+        CargoAircraft.new_rand('Cargo 2', airports[0], Vec2d(200, 300), rng),
+        PassengerAircraft.new_rand('Pass 1', airports[1], Vec2d(700, 150), rng),
+        PassengerAircraft.new_rand('Pass 2', airports[1], Vec2d(600, 300), rng),
+        Aircraft.new_rand('Empty 1', airports[2], Vec2d(400, 400), rng),
+        Aircraft.new_rand('Empty 2', airports[2], Vec2d(450, 450), rng)
+    ]
+
+    return model_type(aircrafts, airports, seed)
+
+# Файл сценария описывает аэропорты и самолёты. JSON: {"airports": [...], "aircrafts": [...]};
+# CSV: одна таблица со столбцом kind, где строки аэропортов идут раньше самолётов, которые
+# на них ссылаются, поэтому CSV читается построчно и годится для очень больших сценариев.
+#
+# аэропорт: kind=airport, name, x, y, parkings (по умолчанию 5), purpose (Civil/Military/General)
+# самолёт: kind=aircraft/cargo/passenger, name, destination (имя аэропорта), x, y и любые из
+# _AIRCRAFT_FIELDS и _KIND_FIELDS; не заданные параметры выбираются так же, как в new_rand
+AIRCRAFT_KINDS = {
+    'aircraft': Aircraft,
+    'cargo': CargoAircraft,
+    'passenger': PassengerAircraft,
+}
+
+_AIRCRAFT_FIELDS = ('speed', 'max_flight_time', 'stop_time', 'weight_fueled', 'max_weight', 'purpose')
+
+_KIND_FIELDS = {
+    CargoAircraft: ('cargo_weight', 'max_cargo_weight'),
+    PassengerAircraft: ('passangers', 'max_passangers'),
+}
+
+def _value(field: str, value):
+    # в CSV всё строки; целые остаются целыми, чтобы info() выглядел как у new_rand
+    if field == 'purpose':
+        return value if isinstance(value, Purpose) else Purpose[value]
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+    return value
+
+def make_airport(spec: dict) -> Airport:
+    parkings = spec.get('parkings')
+    return Airport(spec['name'], Vec2d(_value('x', spec['x']), _value('y', spec['y'])),
+                   5 if parkings in (None, '') else _value('parkings', parkings),
+                   _value('purpose', spec['purpose']))
+
+def make_aircraft(spec: dict, airports: dict[str, Airport], rng) -> Aircraft:
+    name = spec['name']
+    kind = AIRCRAFT_KINDS.get((spec.get('kind') or 'aircraft').lower())
+    if kind is None:
+        raise ValueError(f"aircraft {name}: unknown kind {spec.get('kind')!r}")
+
+    destination = airports.get(spec['destination'])
+    if destination is None:
+        raise ValueError(f"aircraft {name}: unknown destination airport {spec['destination']!r}")
+
+    pos = Vec2d(_value('x', spec['x']), _value('y', spec['y']))
+    aircraft = kind.new_rand(name, destination, pos, rng)
+
+    fields = _AIRCRAFT_FIELDS + _KIND_FIELDS.get(kind, ())
+    given = {x: _value(x, spec[x]) for x in fields if spec.get(x) not in (None, '')}
+    if not given:
+        return aircraft
+
+    # заданные поля поверх случайных из new_rand
+    params = {
+        'speed': aircraft.speed,
+        'max_flight_time': aircraft.max_flight_time,
+        'stop_time': aircraft.stop_time,
+        'weight_fueled': aircraft._weight_fueled,
+        'max_weight': aircraft.max_weight,
+        'purpose': aircraft.purpose,
+    }
+    if kind is CargoAircraft:
+        params['cargo_weight'] = aircraft.cargo_weight
+        params['max_cargo_weight'] = aircraft.max_cargo_weight
+    elif kind is PassengerAircraft:
+        params['passangers'] = aircraft.passangers
+        params['max_passangers'] = aircraft.max_passangers
+    params.update(given)
+
+    return kind(name, destination, pos, *(params[x] for x in fields))
+
+def _json_rows(path) -> Iterator[tuple[str, dict]]:
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+
+    for spec in data.get('airports', []):
+        yield 'airport', spec
+    for spec in data.get('aircrafts', []):
+        yield (spec.get('kind') or 'aircraft').lower(), spec
+
+def _csv_rows(path) -> Iterator[tuple[str, dict]]:
+    with open(path, newline='', encoding='utf-8') as file:
+        for spec in csv.DictReader(file):
+            yield (spec.get('kind') or '').strip().lower(), spec
+
+def _aircrafts(rows: Iterable[tuple[str, dict]], airports: dict[str, Airport], rng) -> Iterator[Aircraft]:
+    for kind, spec in rows:
+        if kind == 'airport':
+            raise ValueError(f"airport {spec['name']} must be listed before the aircrafts")
+        yield make_aircraft(spec, airports, rng)
+
+def load(path, model_type: type[Model] = Model, seed: int | None = None) -> Model:
+    seed, rng = root(seed)
+    rng = rng.split('scenario')
+
+    rows = _json_rows(path) if Path(path).suffix.lower() == '.json' else _csv_rows(path)
+
+    airports = {}
+    for kind, spec in rows:
+        if kind != 'airport':
+            rows = chain([(kind, spec)], rows)
+            break
+        airport = make_airport(spec)
+        if airport.name in airports:
+            raise ValueError(f"duplicate airport name {airport.name!r}")
+        airports[airport.name] = airport
+
+    # самолёты создаются по одному прямо в модели
+    return model_type(_aircrafts(rows, airports, rng), airports.values(), seed)
+
+def generate(airports: int = 1000, aircrafts: int = 100000, model_type: type[Model] = Model, seed: int | None = None,
+             width: int = 1000, height: int = 800, parkings: int = 5) -> Model:
+    # синтетическая сеть: аэропорты равномерно по карте, назначения самолётов случайны
+    if airports < 2:
+        raise ValueError("a network needs at least two airports")
+
+    seed, rng = root(seed)
+    rng = rng.split('generated')
+
+    purposes = [Purpose.General, Purpose.Civil, Purpose.Military]
+    ports = [Airport(f'Airport {i}', Vec2d(rng.randint(0, width), rng.randint(0, height)), parkings, purposes[i % 3])
+             for i in range(airports)]
+
+    kinds = [Aircraft, CargoAircraft, PassengerAircraft]
+    planes = (kinds[i % 3].new_rand(f'Aircraft {i}', ports[rng.randint(0, airports - 1)],
+                                    Vec2d(rng.randint(0, width), rng.randint(0, height)), rng)
+              for i in range(aircrafts))
+
+    return model_type(planes, ports, seed)
+
+def large(model_type: type[Model] = Model, seed: int | None = None) -> Model:
+    return generate(1000, 100000, model_type, seed)
+
+SCENARIOS = {
+    'default': default,
+    'large': large,
+}
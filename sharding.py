@@ -0,0 +1,359 @@
+import math
+import multiprocessing
+import heapq
+from operator import itemgetter
+
+from aircraft import Aircraft, AircraftStatus, CargoAircraft, PassengerAircraft
+from airport import Airport
+from history import VisitHistory
+from model import Model
+from purpose import Purpose
+from vector import Vec2d
+
+# Географическое разбиение модели по процессам. Аэропорты делятся на области, каждой
+# области - свой процесс. Самолёт принадлежит области своего аэропорта назначения:
+# всё, с чем он взаимодействует (очередь на посадку, стоянка, вылет), находится там же.
+# При вылете в чужую область самолёт долетает в старой области до ближайшего барьера
+# и передаётся сообщением. Окно между барьерами не длиннее самого короткого перелёта
+# между областями (lookahead), поэтому до барьера он не может никуда прилететь, и
+# результат совпадает с однопроцессной моделью такт в такт.
+
+_PLAIN, _CARGO, _PASSENGER = 0, 1, 2
+_KINDS = {_PLAIN: Aircraft, _CARGO: CargoAircraft, _PASSENGER: PassengerAircraft}
+
+def pack_aircraft(aircraft: Aircraft, number: int, airport_index: dict) -> tuple:
+    # компактное сообщение о самолёте: только простые значения, аэропорты - номерами
+    if isinstance(aircraft, CargoAircraft):
+        kind, load = _CARGO, (aircraft.cargo_weight, aircraft.max_cargo_weight)
+    elif isinstance(aircraft, PassengerAircraft):
+        kind, load = _PASSENGER, (aircraft.passangers, aircraft.max_passangers)
+    else:
+        kind, load = _PLAIN, ()
+
+    pos = aircraft.pos
+    return (number, kind, aircraft.name, airport_index[aircraft.destination], pos.x, pos.y,
+            aircraft.speed, aircraft.max_flight_time, aircraft.stop_time, aircraft._weight_fueled,
+            aircraft.max_weight, aircraft.purpose.value, aircraft.time, aircraft.status.value,
+            aircraft.destroyed, load, tuple(aircraft.history), aircraft.visits,
+            aircraft.rng.draws)
+
+def unpack_aircraft(message: tuple, airports: list[Airport]) -> tuple[int, Aircraft, int]:
+    (number, kind, name, destination, x, y, speed, max_flight_time, stop_time, weight_fueled,
+     max_weight, purpose, time, status, destroyed, load, visited, visits, draws) = message
+
+    aircraft = _KINDS[kind](name, airports[destination], Vec2d(x, y), speed, max_flight_time, stop_time,
+                            weight_fueled, max_weight, Purpose(purpose), *load)
+    aircraft._restore(time, AircraftStatus(status), destroyed, VisitHistory.restore(visited, visits))
+    return number, aircraft, draws
+
+def pack_airport_state(airport: Airport, aircraft_number: dict) -> tuple:
+    (busy, delay, timer, clock, seq,
+     waiting, parked, destroyed, landing, passanger, pending, ready) = airport._dump()
+
+    pairs = lambda items: [(aircraft_number[a], s) for a, s in items]
+    entries = lambda items: [(k, s, aircraft_number[a]) for k, s, a in items]
+
+    return (airport.rng.draws, busy, delay, timer, clock, seq,
+            pairs(waiting), pairs(parked), [aircraft_number[a] for a in destroyed],
+            entries(landing), entries(passanger), entries(pending), entries(ready))
+
+def restore_airport_state(airport: Airport, message: tuple, aircrafts: dict) -> int:
+    # возвращает число выборок потока аэропорта: поток выдаёт модель, к которой он привязан
+    (draws, busy, delay, timer, clock, seq,
+     waiting, parked, destroyed, landing, passanger, pending, ready) = message
+
+    pairs = lambda items: [(aircrafts[n], s) for n, s in items]
+    entries = lambda items: [(k, s, aircrafts[n]) for k, s, n in items]
+
+    airport._restore(busy, delay, timer, clock, seq, pairs(waiting), pairs(parked),
+                     [aircrafts[n] for n in destroyed],
+                     entries(landing), entries(passanger), entries(pending), entries(ready))
+    return draws
+
+def _airport_static(airport: Airport) -> tuple:
+    return airport.name, airport.pos.x, airport.pos.y, airport.total_parkings, airport.purpose.value
+
+def _build_airports(static: list[tuple]) -> list[Airport]:
+    return [Airport(name, Vec2d(x, y), parkings, Purpose(purpose)) for name, x, y, parkings, purpose in static]
+
+def partition(airports: list[Airport], shards: int, weights: list[float] | None = None) -> list[int]:
+    # рекурсивное деление пополам поперёк более длинной стороны, с равным весом в частях
+    region = [0] * len(airports)
+    if weights is None:
+        weights = [1.0] * len(airports)
+
+    def split(items, count, first):
+        if count == 1 or len(items) <= 1:
+            for i in items:
+                region[i] = first
+            return
+
+        xs = [airports[i].pos.x for i in items]
+        ys = [airports[i].pos.y for i in items]
+        axis = 0 if max(xs) - min(xs) >= max(ys) - min(ys) else 1
+        items = sorted(items, key=lambda i: (airports[i].pos.x, airports[i].pos.y)[axis])
+
+        left = count // 2
+        target = sum(weights[i] for i in items) * left / count
+        acc = 0.0
+        cut = 0
+        while cut < len(items) - 1 and acc + weights[items[cut]] <= target:
+            acc += weights[items[cut]]
+            cut += 1
+        cut = max(cut, 1)
+
+        split(items[:cut], left, first)
+        split(items[cut:], count - left, first + left)
+
+    split(list(range(len(airports))), max(1, min(shards, len(airports))), 0)
+    return region
+
+def lookahead(airports: list[Airport], region: list[int], max_speed: float) -> int | None:
+    # за сколько тактов после вылета самолёт гарантированно ещё не долетит ни до одной чужой области;
+    # None - областей меньше двух, и окно ничем не ограничено
+    import numpy as np
+
+    x = np.array([a.pos.x for a in airports], dtype=np.float64)
+    y = np.array([a.pos.y for a in airports], dtype=np.float64)
+    owner = np.array(region)
+    if len(set(region)) < 2:
+        return None
+
+    nearest = math.inf
+    for start in range(0, len(airports), 256):
+        part = slice(start, start + 256)
+        dx = x[part, None] - x[None, :]
+        dy = y[part, None] - y[None, :]
+        dist = np.sqrt(dx * dx + dy * dy)
+        dist[owner[part, None] == owner[None, :]] = math.inf
+        nearest = min(nearest, float(dist.min()))
+
+    # перелёт на расстояние d занимает не меньше ceil(d / v) шагов; один такт - запас на округление
+    return max(1, math.ceil(nearest / max_speed) - 1)
+
+class ShardModel(Model):
+    # модель одной области: все аэропорты (чужие - только как цели вылета), свои самолёты
+    # в порядке их общих номеров, шагают только свои аэропорты
+    def __init__(self, region: int, regions: list[int], airports: list[Airport], seed: int, tick: int):
+        super().__init__([], airports, seed)
+        self._tick = tick
+        self._region = region
+        self._regions = regions
+        self._local_airports = [a for a, r in zip(airports, regions) if r == region]
+
+        # общие номера самолётов, в том же порядке, что и self._aircrafts
+        self._numbers = []
+        self._leaving = []
+
+    @property
+    def local_airports(self) -> list[Airport]:
+        return self._local_airports
+
+    def receive(self, messages: list[tuple]):
+        if not messages:
+            return
+
+        arrived = []
+        for message in messages:
+            number, aircraft, draws = unpack_aircraft(message, self._airports)
+            if self._regions[self._airport_index[aircraft.destination]] != self._region:
+                raise ValueError(f"aircraft {aircraft.name} does not belong to region {self._region}")
+
+            self._aircraft_index[aircraft] = number
+            aircraft.set_model(self)
+            aircraft.set_rng(self._rng.split('aircraft', number))
+            aircraft.rng.draws = draws
+            self._activity.join(aircraft)
+            arrived.append((number, aircraft))
+
+        # слияние двух отсортированных по номеру списков, чтобы шагать в общем порядке
+        arrived.sort(key=itemgetter(0))
+        merged = list(heapq.merge(zip(self._numbers, self._aircrafts), arrived, key=itemgetter(0)))
+        self._numbers = [n for n, _ in merged]
+        self._aircrafts = [a for _, a in merged]
+
+    def depart(self, aircraft):
+        super().depart(aircraft)
+        if self._regions[self._airport_index[aircraft.destination]] != self._region:
+            self._leaving.append(aircraft)
+
+    def hand_off(self) -> list[tuple[int, tuple]]:
+        # улетевшие в чужие области с прошлого барьера: (область, сообщение)
+        if not self._leaving:
+            return []
+
+        messages = []
+        for aircraft in self._leaving:
+            if aircraft.status != AircraftStatus.EnRoute:
+                raise RuntimeError(f"aircraft {aircraft.name} reached another region before the barrier; "
+                                   "the window is longer than the lookahead")
+            target = self._regions[self._airport_index[aircraft.destination]]
+            messages.append((target, pack_aircraft(aircraft, self._aircraft_index[aircraft], self._airport_index)))
+
+        leaving = set(self._leaving)
+        self._leaving = []
+        kept = [(n, a) for n, a in zip(self._numbers, self._aircrafts) if a not in leaving]
+        self._numbers = [n for n, _ in kept]
+        self._aircrafts = [a for _, a in kept]
+        self._activity.forget(leaving)
+        for aircraft in leaving:
+            del self._aircraft_index[aircraft]
+        return messages
+
+    def _step_airports(self):
+        for airport in self._local_airports:
+            airport.step()
+
+    def pack(self) -> tuple[list[tuple], dict[int, tuple]]:
+        aircrafts = [pack_aircraft(a, n, self._airport_index) for n, a in zip(self._numbers, self._aircrafts)]
+        airports = {self._airport_index[a]: pack_airport_state(a, self._aircraft_index) for a in self._local_airports}
+        return aircrafts, airports
+
+def _serve(conn, region: int, regions: list[int], static: list[tuple], states: dict[int, tuple],
+           aircrafts: list[tuple], seed: int, tick: int):
+    model = ShardModel(region, regions, _build_airports(static), seed, tick)
+    model.receive(aircrafts)
+
+    local = {n: a for n, a in zip(model._numbers, model.aircrafts)}
+    for index, state in states.items():
+        airport = model.airports[index]
+        airport.rng.draws = restore_airport_state(airport, state, local)
+
+    while True:
+        command, *args = conn.recv()
+        if command == 'run':
+            ticks, incoming = args
+            model.receive(incoming)
+            model.advance(ticks)
+            conn.send(model.hand_off())
+        elif command == 'pack':
+            conn.send(model.pack())
+        elif command == 'stop':
+            conn.close()
+            return
+
+class ShardedRun:
+    # ведущий процесс: раздаёт области, гоняет окна между барьерами и пересылает самолёты
+    def __init__(self, model: Model, shards: int, window: int = 1):
+        if window < 1:
+            raise ValueError("window must be at least one tick")
+
+        airports = model.airports
+        aircrafts = model.aircrafts
+        airport_index = {a: i for i, a in enumerate(airports)}
+        aircraft_number = {a: i for i, a in enumerate(aircrafts)}
+
+        # вес аэропорта - сколько самолётов сейчас к нему приписано
+        weights = [1.0] * len(airports)
+        for aircraft in aircrafts:
+            weights[airport_index[aircraft.destination]] += 1
+
+        self._regions = partition(airports, shards, weights)
+        self._shards = max(self._regions) + 1
+        max_speed = max((a.speed for a in aircrafts), default=1.0)
+        self._lookahead = lookahead(airports, self._regions, max_speed)
+        self._window = window if self._lookahead is None else min(window, self._lookahead)
+
+        self._seed = model.seed
+        self._tick = model.tick
+        self._static = [_airport_static(a) for a in airports]
+
+        owned = [[] for _ in range(self._shards)]
+        for aircraft in aircrafts:
+            region = self._regions[airport_index[aircraft.destination]]
+            owned[region].append(pack_aircraft(aircraft, aircraft_number[aircraft], airport_index))
+
+        states = [{} for _ in range(self._shards)]
+        for i, airport in enumerate(airports):
+            states[self._regions[i]][i] = pack_airport_state(airport, aircraft_number)
+
+        self._conns = []
+        self._processes = []
+        for region in range(self._shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve, daemon=True,
+                args=(child, region, self._regions, self._static, states[region], owned[region], self._seed, self._tick))
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+
+        self._incoming = [[] for _ in range(self._shards)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def tick(self) -> int:
+        return self._tick
+
+    @property
+    def shards(self) -> int:
+        return self._shards
+
+    @property
+    def regions(self) -> list[int]:
+        return self._regions[:]
+
+    @property
+    def lookahead(self) -> int | None:
+        return self._lookahead
+
+    @property
+    def window(self) -> int:
+        return self._window
+
+    def advance(self, ticks: int):
+        while ticks > 0:
+            step = min(ticks, self._window)
+            for conn, incoming in zip(self._conns, self._incoming):
+                conn.send(('run', step, incoming))
+
+            self._incoming = [[] for _ in range(self._shards)]
+            for conn in self._conns:
+                for region, message in conn.recv():
+                    self._incoming[region].append(message)
+
+            self._tick += step
+            ticks -= step
+
+    def collect(self) -> Model:
+        # собрать всё состояние в обычную модель, как если бы она шла в одном процессе
+        aircraft_messages = [m for messages in self._incoming for m in messages]
+        airport_states = {}
+        for conn in self._conns:
+            conn.send(('pack',))
+        for conn in self._conns:
+            aircrafts, airports = conn.recv()
+            aircraft_messages.extend(aircrafts)
+            airport_states.update(airports)
+
+        airports = _build_airports(self._static)
+        unpacked = sorted((unpack_aircraft(m, airports) for m in aircraft_messages), key=lambda x: x[0])
+        aircrafts = {number: aircraft for number, aircraft, _ in unpacked}
+        draws = {index: restore_airport_state(airports[index], state, aircrafts)
+                 for index, state in airport_states.items()}
+
+        model = Model([aircraft for _, aircraft, _ in unpacked], airports, self._seed)
+        for _, aircraft, count in unpacked:
+            aircraft.rng.draws = count
+        for index, count in draws.items():
+            airports[index].rng.draws = count
+        model._restore_tick(self._tick)
+        return model
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(('stop',))
+                conn.close()
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join()
+        self._conns = []
+        self._processes = []
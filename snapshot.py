@@ -0,0 +1,308 @@
+import json
+
+import numpy as np
+
+from aircraft import Aircraft, AircraftStatus, CargoAircraft, PassengerAircraft
+from airport import Airport
+from history import VisitHistory
+from purpose import Purpose
+from vector import Vec2d
+
+# Файл снимка: MAGIC, версия и длина заголовка (uint32), JSON-заголовок, затем
+# выровненные по _ALIGN массивы numpy подряд. В заголовке для каждого массива
+# записаны dtype, shape и смещение, поэтому при загрузке файл можно отобразить
+# в память и брать столбцы как представления, без разбора по объектам.
+MAGIC = b'AIRSNAPS'
+VERSION = 2
+
+_ALIGN = 64
+_PREFIX = np.dtype([('magic', 'S8'), ('version', '<u4'), ('header', '<u4')])
+
+_PLAIN, _CARGO, _PASSENGER = 0, 1, 2
+
+_AIRCRAFT = np.dtype([
+    ('kind', 'u1'),
+    ('purpose', 'u1'),
+    ('status', 'u1'),
+    ('destroyed', '?'),
+    ('destination', '<i4'),
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('speed', '<f8'),
+    ('max_flight_time', '<i8'),
+    ('stop_time', '<i8'),
+    ('weight_fueled', '<f8'),
+    ('max_weight', '<f8'),
+    ('time', '<i8'),
+    ('cargo_weight', '<f8'),
+    ('max_cargo_weight', '<f8'),
+    ('passangers', '<i8'),
+    ('max_passangers', '<i8'),
+])
+
+_AIRPORT = np.dtype([
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('total_parkings', '<i8'),
+    ('purpose', 'u1'),
+    ('busy_parkings', '<i8'),
+    ('delay', '<i8'),
+    ('timer', '<i8'),
+    ('clock', '<i8'),
+    ('seq', '<i8'),
+])
+
+# очереди аэропортов одной таблицей; у списков без ключа key = 0
+_WAITING, _PARKED, _DESTROYED, _LANDING, _PASSANGER, _PENDING, _READY = range(7)
+
+_ENTRY = np.dtype([
+    ('airport', '<i4'),
+    ('queue', 'u1'),
+    ('key', '<i8'),
+    ('seq', '<i8'),
+    ('aircraft', '<i4'),
+])
+
+class SnapshotError(ValueError):
+    pass
+
+def _strings(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    encoded = [x.encode('utf-8') for x in values]
+    ends = np.cumsum([len(x) for x in encoded], dtype=np.int64)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), ends
+
+def _unstrings(blob: np.ndarray, ends: np.ndarray) -> list[str]:
+    data = blob.tobytes()
+    starts = [0, *ends[:-1].tolist()]
+    return [data[a:b].decode('utf-8') for a, b in zip(starts, ends.tolist())]
+
+def _number(value: float):
+    # веса в конструкторы обычно приходят целыми; возвращаем тот же тип, чтобы info() не менялся
+    return int(value) if value.is_integer() else value
+
+def _collect(model) -> dict[str, np.ndarray]:
+    aircrafts = model.aircrafts
+    airports = model.airports
+    airport_index = {airport: i for i, airport in enumerate(airports)}
+    aircraft_index = {aircraft: i for i, aircraft in enumerate(aircrafts)}
+
+    # значения собираются построчно в списки и раскладываются по столбцам одним присваиванием
+    rows = []
+    visited = []
+    visited_ends = []
+    visited_totals = []
+
+    for aircraft in aircrafts:
+        pos = aircraft.pos
+        kind, cargo, max_cargo, passangers, max_passangers = _PLAIN, 0, 0, 0, 0
+        if isinstance(aircraft, CargoAircraft):
+            kind, cargo, max_cargo = _CARGO, aircraft.cargo_weight, aircraft.max_cargo_weight
+        elif isinstance(aircraft, PassengerAircraft):
+            kind, passangers, max_passangers = _PASSENGER, aircraft.passangers, aircraft.max_passangers
+
+        rows.append((kind, aircraft.purpose.value, aircraft.status.value, aircraft.destroyed,
+                     airport_index[aircraft.destination], pos.x, pos.y, aircraft.speed,
+                     aircraft.max_flight_time, aircraft.stop_time, aircraft._weight_fueled, aircraft.max_weight,
+                     aircraft.time, cargo, max_cargo, passangers, max_passangers))
+
+        # номера аэропортов в истории те же, что и здесь: это места в model.airports
+        visited.extend(aircraft.history)
+        visited_ends.append(len(visited))
+        visited_totals.append(aircraft.visits)
+
+    planes = np.array(rows, dtype=_AIRCRAFT)
+
+    ports = []
+    entries = []
+
+    for i, airport in enumerate(airports):
+        (busy, delay, timer, clock, seq,
+         waiting, parked, destroyed, landing, passanger, pending, ready) = airport._dump()
+
+        ports.append((airport.pos.x, airport.pos.y, airport.total_parkings, airport.purpose.value,
+                      busy, delay, timer, clock, seq))
+
+        entries.extend((i, _WAITING, 0, s, aircraft_index[a]) for a, s in waiting)
+        entries.extend((i, _PARKED, 0, s, aircraft_index[a]) for a, s in parked)
+        entries.extend((i, _DESTROYED, 0, 0, aircraft_index[a]) for a in destroyed)
+        for queue, items in ((_LANDING, landing), (_PASSANGER, passanger), (_PENDING, pending), (_READY, ready)):
+            entries.extend((i, queue, k, s, aircraft_index[a]) for k, s, a in items)
+
+    finals = model.routes.finals if model.routes is not None else {}
+
+    aircraft_names, aircraft_name_ends = _strings([x.name for x in aircrafts])
+    airport_names, airport_name_ends = _strings([x.name for x in airports])
+
+    return {
+        'aircrafts': planes,
+        'aircraft_names': aircraft_names,
+        'aircraft_name_ends': aircraft_name_ends,
+        'visited': np.array(visited, dtype=np.int32),
+        'visited_ends': np.array(visited_ends, dtype=np.int64),
+        'visited_totals': np.array(visited_totals, dtype=np.int64),
+        'airports': np.array(ports, dtype=_AIRPORT),
+        'airport_names': airport_names,
+        'airport_name_ends': airport_name_ends,
+        'entries': np.array(entries, dtype=_ENTRY),
+        # конечные цели самолётов на маршрутах с пересадками, -1 - не на маршруте
+        'route_finals': np.array([airport_index.get(finals.get(x), -1) for x in aircrafts], dtype=np.int32),
+        # потоки случайных чисел задаются зерном модели и числом сделанных выборок
+        'aircraft_draws': np.array([x.rng.draws for x in aircrafts], dtype=np.int64),
+        'airport_draws': np.array([x.rng.draws for x in airports], dtype=np.int64),
+    }
+
+def save(model, path):
+    arrays = _collect(model)
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {
+            'dtype': np.lib.format.dtype_to_descr(array.dtype),
+            'shape': list(array.shape),
+            'offset': offset,
+        }
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    header = json.dumps({
+        'tick': model.tick,
+        'seed': model.seed,
+        'routes': None if model.routes is None else {'reserve': model.routes.reserve, 'bucket': model.routes.bucket},
+        'arrays': layout,
+    }).encode('utf-8')
+
+    # смещения в заголовке считаются от начала данных, а данные начинаются с границы _ALIGN
+    start = -(-(_PREFIX.itemsize + len(header)) // _ALIGN) * _ALIGN
+
+    with open(path, 'wb') as file:
+        file.write(np.array((MAGIC, VERSION, len(header)), dtype=_PREFIX).tobytes())
+        file.write(header)
+        file.write(b'\0' * (start - _PREFIX.itemsize - len(header)))
+
+        for name, array in arrays.items():
+            data = np.ascontiguousarray(array).tobytes()
+            file.write(data)
+            file.write(b'\0' * (-len(data) % _ALIGN))
+
+def read(path, mmap: bool = True) -> tuple[dict, dict[str, np.ndarray]]:
+    if mmap:
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        raw = np.fromfile(path, dtype=np.uint8)
+
+    if raw.size < _PREFIX.itemsize:
+        raise SnapshotError(f"{path} is too short to be a snapshot")
+
+    magic, version, length = raw[:_PREFIX.itemsize].view(_PREFIX)[0].tolist()
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version} (expected {VERSION})")
+
+    header = json.loads(raw[_PREFIX.itemsize:_PREFIX.itemsize + length].tobytes())
+    start = -(-(_PREFIX.itemsize + length) // _ALIGN) * _ALIGN
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.lib.format.descr_to_dtype(spec['dtype'])
+        shape = tuple(spec['shape'])
+        begin = start + spec['offset']
+        end = begin + dtype.itemsize * int(np.prod(shape))
+        if end > raw.size:
+            raise SnapshotError(f"{path} is truncated")
+        arrays[name] = raw[begin:end].view(dtype).reshape(shape)
+
+    return header, arrays
+
+def _build_airports(arrays) -> list[Airport]:
+    ports = arrays['airports']
+    names = _unstrings(arrays['airport_names'], arrays['airport_name_ends'])
+
+    return [Airport(name, Vec2d(x, y), total, Purpose(purpose))
+            for name, x, y, total, purpose in zip(names, ports['x'].tolist(), ports['y'].tolist(),
+                                                  ports['total_parkings'].tolist(), ports['purpose'].tolist())]
+
+def _build_aircrafts(arrays, airports: list[Airport]) -> list[Aircraft]:
+    planes = arrays['aircrafts']
+    names = _unstrings(arrays['aircraft_names'], arrays['aircraft_name_ends'])
+    # столбцы целиком переводятся в списки Python - это намного быстрее, чем читать по элементу
+    columns = [planes[name].tolist() for name in _AIRCRAFT.names]
+
+    visited = arrays['visited'].tolist()
+    visited_ends = arrays['visited_ends'].tolist()
+    # в снимках до ограничения истории хранился весь путь, и число посещений - его длина
+    visited_totals = arrays['visited_totals'].tolist() if 'visited_totals' in arrays else [None] * len(names)
+
+    purposes = {x.value: x for x in Purpose}
+    statuses = {x.value: x for x in AircraftStatus}
+
+    aircrafts = []
+    start = 0
+    for name, end, total, row in zip(names, visited_ends, visited_totals, zip(*columns)):
+        (kind, purpose, status, destroyed, destination, x, y, speed, max_flight_time, stop_time,
+         weight_fueled, max_weight, time, cargo_weight, max_cargo_weight, passangers, max_passangers) = row
+
+        args = (name, airports[destination], Vec2d(x, y), speed, max_flight_time, stop_time,
+                _number(weight_fueled), _number(max_weight), purposes[purpose])
+
+        if kind == _CARGO:
+            aircraft = CargoAircraft(*args, cargo_weight, max_cargo_weight)
+        elif kind == _PASSENGER:
+            aircraft = PassengerAircraft(*args, passangers, max_passangers)
+        else:
+            aircraft = Aircraft(*args)
+
+        aircraft._restore(time, statuses[status], destroyed, VisitHistory.restore(visited[start:end], total))
+        start = end
+
+        aircrafts.append(aircraft)
+
+    return aircrafts
+
+def _restore_airports(arrays, airports: list[Airport], aircrafts: list[Aircraft]):
+    ports = arrays['airports']
+    entries = arrays['entries']
+    # записи сохранены по порядку аэропортов, так что у каждого свой непрерывный кусок
+    bounds = np.searchsorted(entries['airport'], np.arange(len(airports) + 1)).tolist()
+    queues = entries['queue'].tolist()
+    keys = entries['key'].tolist()
+    seqs = entries['seq'].tolist()
+    owners = entries['aircraft'].tolist()
+
+    for i, airport in enumerate(airports):
+        lists = [[] for _ in range(7)]
+        for j in range(bounds[i], bounds[i + 1]):
+            queue = queues[j]
+            aircraft = aircrafts[owners[j]]
+            if queue in (_WAITING, _PARKED):
+                lists[queue].append((aircraft, seqs[j]))
+            elif queue == _DESTROYED:
+                lists[queue].append(aircraft)
+            else:
+                lists[queue].append((keys[j], seqs[j], aircraft))
+
+        row = ports[i]
+        airport._restore(int(row['busy_parkings']), int(row['delay']), int(row['timer']),
+                         int(row['clock']), int(row['seq']), *lists)
+
+def load(path, model_type, mmap: bool = True):
+    header, arrays = read(path, mmap)
+
+    airports = _build_airports(arrays)
+    aircrafts = _build_aircrafts(arrays, airports)
+    _restore_airports(arrays, airports, aircrafts)
+
+    model = model_type(aircrafts, airports, header['seed'])
+    for entity, draws in zip(aircrafts, arrays['aircraft_draws'].tolist()):
+        entity.rng.draws = draws
+    for entity, draws in zip(airports, arrays['airport_draws'].tolist()):
+        entity.rng.draws = draws
+    model._restore_tick(header['tick'])
+
+    routes = header.get('routes')
+    if routes is not None:
+        model.set_route_planning(routes['reserve'], routes['bucket'])
+        for aircraft, final in zip(aircrafts, arrays['route_finals'].tolist()):
+            if final >= 0:
+                model.routes.set_final(aircraft, airports[final])
+    return model
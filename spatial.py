@@ -0,0 +1,60 @@
+import math
+
+# равномерная сетка: элемент кладётся во все клетки, которые задевает его прямоугольник
+class SpatialGrid:
+    def __init__(self, cell_size: float = 32):
+        self._cell_size = cell_size
+        self._cells = {}
+
+    @property
+    def cell_size(self) -> float:
+        return self._cell_size
+
+    def __len__(self):
+        return len(self._cells)
+
+    def clear(self):
+        self._cells.clear()
+
+    def insert(self, item, left: float, top: float, right: float, bottom: float):
+        size = self._cell_size
+        cells = self._cells
+
+        for cx in range(math.floor(left / size), math.floor(right / size) + 1):
+            for cy in range(math.floor(top / size), math.floor(bottom / size) + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [item]
+                else:
+                    bucket.append(item)
+
+    def insert_point(self, item, x: float, y: float):
+        size = self._cell_size
+        key = (math.floor(x / size), math.floor(y / size))
+        bucket = self._cells.get(key)
+        if bucket is None:
+            self._cells[key] = [item]
+        else:
+            bucket.append(item)
+
+    def at(self, x: float, y: float) -> list:
+        size = self._cell_size
+        return self._cells.get((math.floor(x / size), math.floor(y / size)), [])
+
+    def near(self, x: float, y: float, radius: float):
+        # всё из клеток, задевающих квадрат со стороной 2 * radius; точное расстояние проверяет вызывающий
+        size = self._cell_size
+        cells = self._cells
+
+        for cx in range(math.floor((x - radius) / size), math.floor((x + radius) / size) + 1):
+            for cy in range(math.floor((y - radius) / size), math.floor((y + radius) / size) + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is not None:
+                    yield from bucket
+
+def hit_grid(states, cell_size: float = 32) -> SpatialGrid:
+    # в клетках лежат номера states, чтобы при попадании побеждал первый по порядку отрисовки
+    grid = SpatialGrid(cell_size)
+    for i, state in enumerate(states):
+        grid.insert(i, *state.bounds())
+    return grid
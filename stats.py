@@ -0,0 +1,92 @@
+from collections import Counter
+
+from aircraft import CargoAircraft, PassengerAircraft
+from events import EventKind
+from purpose import Purpose
+
+# счётчики по парку самолётов, которые обновляются по событиям модели, а не пересчитываются
+class FleetStats:
+    def __init__(self, model):
+        self._destroyed = 0
+        self._dead_passangers = 0
+        self._dead_cargo = 0.0
+
+        self._waiting = Counter()
+        self._max_waiting = Counter()
+        self._parked = Counter()
+
+        self._departed = Counter()
+        self._landed = Counter()
+        self._destroyed_by_purpose = Counter()
+
+        # то, что случилось до подписки, считаем один раз
+        for aircraft in model.aircrafts:
+            if aircraft.destroyed:
+                self._count_destroyed(aircraft)
+        for airport in model.airports:
+            self._waiting[airport] = sum(1 for x in airport.waiting_aircrafts if not x.destroyed)
+            self._max_waiting[airport] = self._waiting[airport]
+            self._parked[airport] = len(airport.parked_aircrafts)
+
+        events = model.events
+        events.subscribe(EventKind.Departed, self._on_departed)
+        events.subscribe(EventKind.LandingRequested, self._on_landing_requested)
+        events.subscribe(EventKind.Landed, self._on_landed)
+        events.subscribe(EventKind.Destroyed, self._on_destroyed)
+
+    @property
+    def destroyed(self) -> int:
+        return self._destroyed
+    @property
+    def dead_passangers(self) -> int:
+        return self._dead_passangers
+    @property
+    def dead_cargo(self) -> float:
+        return self._dead_cargo
+
+    def waiting(self, airport) -> int:
+        return self._waiting[airport]
+
+    def max_waiting(self, airport) -> int:
+        # самая длинная очередь на посадку с момента подписки
+        return self._max_waiting[airport]
+
+    def parked(self, airport) -> int:
+        return self._parked[airport]
+
+    def departed(self, purpose: Purpose) -> int:
+        return self._departed[purpose]
+
+    def landed(self, purpose: Purpose) -> int:
+        return self._landed[purpose]
+
+    def destroyed_by_purpose(self, purpose: Purpose) -> int:
+        return self._destroyed_by_purpose[purpose]
+
+    def _count_destroyed(self, aircraft):
+        self._destroyed += 1
+        self._destroyed_by_purpose[aircraft.purpose] += 1
+
+        if isinstance(aircraft, PassengerAircraft):
+            self._dead_passangers += aircraft.passangers
+        elif isinstance(aircraft, CargoAircraft):
+            self._dead_cargo += aircraft.cargo_weight
+
+    def _on_departed(self, aircraft, airport):
+        self._parked[airport] -= 1
+        self._departed[aircraft.purpose] += 1
+
+    def _on_landing_requested(self, aircraft, airport):
+        self._waiting[airport] += 1
+        if self._waiting[airport] > self._max_waiting[airport]:
+            self._max_waiting[airport] = self._waiting[airport]
+
+    def _on_landed(self, aircraft, airport):
+        self._waiting[airport] -= 1
+        self._parked[airport] += 1
+        self._landed[aircraft.purpose] += 1
+
+    def _on_destroyed(self, aircraft, airport):
+        if airport is not None:
+            self._waiting[airport] -= 1
+        self._count_destroyed(aircraft)
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 
 class Stepable(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def __init__(self) -> None:
         super().__init__()
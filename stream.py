@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import json
+import struct
+import time
+from collections import deque
+
+import numpy as np
+
+from trajectory import aircraft_columns
+
+# Трансляция состояния модели по TCP. Клиент после подключения получает HELLO
+# (JSON со статическим описанием сети) и ключевой кадр со всеми самолётами и
+# аэропортами, а дальше каждый такт - дельту только с теми, что изменились.
+#
+# Кадр: _HEADER (MAGIC, вид кадра, такт, число записей самолётов и аэропортов,
+# длина JSON), затем JSON (только у HELLO), записи _AIRCRAFT и записи _AIRPORT.
+# Записи хранят новые значения целиком, поэтому дельты можно склеивать и пропускать,
+# если следом придёт ключевой кадр.
+#
+# Модель шагает в том же цикле asyncio, что и отправка, но никогда не ждёт клиентов:
+# у каждого своя очередь кадров, и если он отстал больше чем на max_pending кадров,
+# очередь выбрасывается, а клиенту при следующей возможности уходит свежий ключевой кадр.
+
+MAGIC = b'AIRS'
+
+HELLO, KEYFRAME, DELTA = 0, 1, 2
+
+_HEADER = struct.Struct('<4sBqIII')
+
+# state: AircraftStatus.value в младших битах, 0x80 - самолёт уничтожен
+_AIRCRAFT = np.dtype([('index', '<u4'), ('x', '<f4'), ('y', '<f4'), ('state', 'u1')])
+_AIRPORT = np.dtype([('index', '<u4'), ('waiting', '<u4'), ('parked', '<u4'), ('busy', '<i4')])
+
+_DESTROYED = 0x80
+
+class StreamError(ValueError):
+    pass
+
+class _Encoder:
+    # помнит последнее отправленное состояние и кодирует отличия от него
+    def __init__(self, model):
+        self._model = model
+        self._aircrafts = None
+        self._airports = None
+
+    def hello(self) -> bytes:
+        model = self._model
+        info = json.dumps({
+            'tick': model.tick,
+            'airports': [{'name': x.name, 'x': x.pos.x, 'y': x.pos.y, 'purpose': x.purpose.name,
+                          'parkings': x.total_parkings} for x in model.airports],
+            'aircrafts': [{'name': x.name, 'purpose': x.purpose.name} for x in model.aircrafts],
+        }).encode()
+        return _HEADER.pack(MAGIC, HELLO, model.tick, 0, 0, len(info)) + info
+
+    def _current(self) -> tuple[np.ndarray, np.ndarray]:
+        columns = aircraft_columns(self._model)
+        aircrafts = np.empty(len(columns['x']), _AIRCRAFT)
+        aircrafts['index'] = np.arange(len(aircrafts))
+        aircrafts['x'] = columns['x']
+        aircrafts['y'] = columns['y']
+        aircrafts['state'] = columns['status'] | (columns['destroyed'].astype(np.uint8) * _DESTROYED)
+
+        ports = self._model.airports
+        airports = np.empty(len(ports), _AIRPORT)
+        airports['index'] = np.arange(len(ports))
+        airports['waiting'] = np.fromiter((len(x.waiting_aircrafts) for x in ports), np.uint32, len(ports))
+        airports['parked'] = np.fromiter((len(x.parked_aircrafts) for x in ports), np.uint32, len(ports))
+        airports['busy'] = np.fromiter((x.busy_parkings for x in ports), np.int32, len(ports))
+        return aircrafts, airports
+
+    def reset(self):
+        self._aircrafts = None
+        self._airports = None
+
+    def keyframe(self) -> bytes:
+        # ключевой кадр не сдвигает базу дельт: её двигает только delta() раз в такт
+        aircrafts, airports = self._current()
+        if self._aircrafts is None:
+            self._aircrafts, self._airports = aircrafts, airports
+        return _frame(KEYFRAME, self._model.tick, aircrafts, airports)
+
+    def delta(self) -> bytes:
+        aircrafts, airports = self._current()
+        previous, previous_airports = self._aircrafts, self._airports
+        self._aircrafts, self._airports = aircrafts, airports
+
+        if previous is None or len(previous) != len(aircrafts) or len(previous_airports) != len(airports):
+            # сеть выросла: проще разослать всё
+            return _frame(KEYFRAME, self._model.tick, aircrafts, airports)
+
+        changed = ((aircrafts['x'] != previous['x']) | (aircrafts['y'] != previous['y'])
+                   | (aircrafts['state'] != previous['state']))
+        changed_airports = ((airports['waiting'] != previous_airports['waiting'])
+                            | (airports['parked'] != previous_airports['parked'])
+                            | (airports['busy'] != previous_airports['busy']))
+        return _frame(DELTA, self._model.tick, aircrafts[changed], airports[changed_airports])
+
+def _frame(kind: int, tick: int, aircrafts: np.ndarray, airports: np.ndarray) -> bytes:
+    return b''.join((_HEADER.pack(MAGIC, kind, tick, len(aircrafts), len(airports), 0),
+                     aircrafts.tobytes(), airports.tobytes()))
+
+class _Client:
+    def __init__(self, writer: asyncio.StreamWriter, max_pending: int):
+        self.writer = writer
+        self.frames = deque()
+        self.resync = True
+        self.ready = asyncio.Event()
+        self.max_pending = max_pending
+        self.dropped = 0
+
+    def offer(self, frame: bytes):
+        if self.resync:
+            # дельта уже войдёт в ключевой кадр
+            self.dropped += 1
+            return
+        if len(self.frames) >= self.max_pending:
+            # отстал: вместо накопленных дельт он получит один ключевой кадр
+            self.dropped += len(self.frames) + 1
+            self.frames.clear()
+            self.resync = True
+        else:
+            self.frames.append(frame)
+        self.ready.set()
+
+class StateServer:
+    def __init__(self, model, host: str = '127.0.0.1', port: int = 8765, max_pending: int = 8):
+        self._model = model
+        self._host = host
+        self._port = port
+        self._max_pending = max_pending
+        self._encoder = _Encoder(model)
+        self._clients = set()
+        self._server = None
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    @property
+    def port(self) -> int:
+        if self._server is None:
+            return self._port
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self._host, self._port)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        for client in list(self._clients):
+            client.writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def publish(self):
+        # вызывается после каждого шага модели
+        if not self._clients:
+            # без слушателей дельты не нужны; база заново возьмётся из ключевого кадра
+            self._encoder.reset()
+            return
+        frame = self._encoder.delta()
+        for client in self._clients:
+            client.offer(frame)
+
+    async def run(self, ticks: int | None = None, rate: float | None = None, until=None) -> int:
+        # шагает модель ticks тактов (или пока не выполнится until) и рассылает дельты;
+        # rate - тактов в секунду, None - сколько успеет
+        done = 0
+        start = time.perf_counter()
+        while ticks is None or done < ticks:
+            if until is not None and until(self._model):
+                break
+            self._model.step()
+            self.publish()
+            done += 1
+
+            if rate is None:
+                # отдать управление отправителям
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(max(0.0, start + done / rate - time.perf_counter()))
+        return done
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Client(writer, self._max_pending)
+        self._clients.add(client)
+        try:
+            writer.write(self._encoder.hello())
+            while True:
+                if client.resync:
+                    # кадр собирается прямо сейчас, между шагами модели
+                    client.frames.clear()
+                    client.resync = False
+                    writer.write(self._encoder.keyframe())
+                while client.frames:
+                    writer.write(client.frames.popleft())
+                client.ready.clear()
+                await writer.drain()
+                if not client.frames and not client.resync:
+                    await client.ready.wait()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(client)
+            writer.close()
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[int, int, object, np.ndarray, np.ndarray]:
+    # (вид, такт, JSON у HELLO или None, записи самолётов, записи аэропортов)
+    header = await reader.readexactly(_HEADER.size)
+    magic, kind, tick, aircrafts, airports, info = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise StreamError("not an airport simulation stream")
+
+    body = await reader.readexactly(info + aircrafts * _AIRCRAFT.itemsize + airports * _AIRPORT.itemsize)
+    meta = json.loads(body[:info]) if info else None
+    records = np.frombuffer(body, _AIRCRAFT, aircrafts, info)
+    ports = np.frombuffer(body, _AIRPORT, airports, info + aircrafts * _AIRCRAFT.itemsize)
+    return kind, tick, meta, records, ports
+
+class StateMirror:
+    # копия состояния на стороне клиента, собранная из кадров
+    def __init__(self):
+        self.meta = None
+        self.tick = None
+        self.aircrafts = np.zeros(0, _AIRCRAFT)
+        self.airports = np.zeros(0, _AIRPORT)
+
+    def apply(self, kind: int, tick: int, meta, aircrafts: np.ndarray, airports: np.ndarray):
+        if kind == HELLO:
+            self.meta = meta
+            return
+        if kind == KEYFRAME:
+            self.aircrafts = aircrafts.copy()
+            self.airports = airports.copy()
+        elif self.tick is not None:
+            self.aircrafts[aircrafts['index']] = aircrafts
+            self.airports[airports['index']] = airports
+        self.tick = tick
+
+async def _watch(host: str, port: int, seconds: float | None):
+    reader, writer = await asyncio.open_connection(host, port)
+    mirror = StateMirror()
+    frames = 0
+    size = 0
+    start = time.perf_counter()
+    try:
+        while seconds is None or time.perf_counter() - start < seconds:
+            kind, tick, meta, aircrafts, airports = await read_frame(reader)
+            mirror.apply(kind, tick, meta, aircrafts, airports)
+            frames += 1
+            size += len(aircrafts) * _AIRCRAFT.itemsize + len(airports) * _AIRPORT.itemsize
+            if frames % 100 == 0:
+                elapsed = time.perf_counter() - start
+                print(f'tick {mirror.tick}: {frames / elapsed:.0f} frames/s, {size / elapsed / 1024:.0f} KiB/s')
+    except asyncio.IncompleteReadError:
+        pass
+    finally:
+        writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Watch a simulation streamed by headless --serve')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seconds', type=float, default=None)
+    args = parser.parse_args(argv)
+    asyncio.run(_watch(args.host, args.port, args.seconds))
+
+if __name__ == "__main__":
+    main()
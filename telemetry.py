@@ -0,0 +1,191 @@
+import os
+from collections import Counter
+
+from aircraft import AircraftStatus
+from events import EventKind
+
+# Метрики прогона по тактам: время шага по фазам (самолёты, аэропорты), число самолётов
+# по состояниям и очереди аэропортов. Подключается через Model.set_telemetry; без неё
+# модель не меряет ничего. Время шага копится в памяти каждый такт, а раз в every тактов
+# к нему добавляется срез состояния и всё накопленное пишется в файл.
+#
+# csv - длинная таблица tick,metric,airport,value, файл только дописывается;
+# prometheus - текстовый формат для textfile-коллектора, файл каждый раз заменяется целиком.
+
+FORMATS = ('csv', 'prometheus')
+
+STATUSES = ('en_route', 'landing', 'landed', 'destroyed')
+
+_STATUS_NAMES = {
+    AircraftStatus.EnRoute: 'en_route',
+    AircraftStatus.Landing: 'landing',
+    AircraftStatus.Landed: 'landed',
+}
+
+class Telemetry:
+    def __init__(self, model, path, every: int = 100, format: str = 'csv'):
+        if every < 1:
+            raise ValueError(f"telemetry interval must be positive, got {every}")
+        if format not in FORMATS:
+            raise ValueError(f"unknown telemetry format {format!r}")
+
+        self._model = model
+        self._path = os.fspath(path)
+        self._every = every
+        self._format = format
+
+        self._status = Counter()
+        for aircraft in model.aircrafts:
+            self._status[self._status_of(aircraft)] += 1
+
+        # (такт, секунды на самолёты, секунды на аэропорты) с последней записи
+        self._steps = []
+        # суммы за весь прогон, для счётчиков prometheus
+        self._ticks = 0
+        self._aircraft_seconds = 0.0
+        self._airport_seconds = 0.0
+
+        events = model.events
+        events.subscribe(EventKind.Departed, self._on_departed)
+        events.subscribe(EventKind.LandingRequested, self._on_landing_requested)
+        events.subscribe(EventKind.Landed, self._on_landed)
+        events.subscribe(EventKind.Destroyed, self._on_destroyed)
+
+        if format == 'csv':
+            self._file = open(self._path, 'a', buffering=1 << 16)
+            if self._file.tell() == 0:
+                self._file.write('tick,metric,airport,value\n')
+        else:
+            self._file = None
+
+        model.set_telemetry(self)
+
+    @property
+    def every(self) -> int:
+        return self._every
+
+    def count(self, status: str) -> int:
+        return self._status[status]
+
+    def next_sample(self, tick: int) -> int:
+        return (tick // self._every + 1) * self._every
+
+    def record(self, tick: int, aircraft_seconds: float, airport_seconds: float):
+        # вызывается моделью после каждого шага (событийной - после каждого отрезка до среза)
+        self._steps.append((tick, aircraft_seconds, airport_seconds))
+        if tick % self._every == 0:
+            self.flush()
+
+    def flush(self):
+        tick = self._model.tick
+        steps = self._steps
+        self._steps = []
+
+        self._ticks += len(steps)
+        for _, aircraft_seconds, airport_seconds in steps:
+            self._aircraft_seconds += aircraft_seconds
+            self._airport_seconds += airport_seconds
+
+        if self._format == 'csv':
+            self._write_csv(tick, steps)
+        else:
+            self._write_prometheus(tick)
+
+    def close(self):
+        if self._model is None:
+            return
+        if self._steps:
+            self.flush()
+
+        events = self._model.events
+        events.unsubscribe(EventKind.Departed, self._on_departed)
+        events.unsubscribe(EventKind.LandingRequested, self._on_landing_requested)
+        events.unsubscribe(EventKind.Landed, self._on_landed)
+        events.unsubscribe(EventKind.Destroyed, self._on_destroyed)
+        self._model.set_telemetry(None)
+        self._model = None
+
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _airports(self):
+        # очереди обходятся только в момент среза, раз в every тактов
+        for airport in self._model.airports:
+            waiting = sum(1 for x in airport.waiting_aircrafts if not x.destroyed)
+            yield airport, waiting, len(airport.parked_aircrafts), airport.busy_parkings
+
+    def _write_csv(self, tick: int, steps: list):
+        rows = []
+        for step, aircraft_seconds, airport_seconds in steps:
+            rows.append(f'{step},step_aircraft_seconds,,{aircraft_seconds:.9f}\n')
+            rows.append(f'{step},step_airport_seconds,,{airport_seconds:.9f}\n')
+        for status in STATUSES:
+            rows.append(f'{tick},aircraft_{status},,{self._status[status]}\n')
+        for airport, waiting, parked, busy in self._airports():
+            name = _csv_quote(airport.name)
+            rows.append(f'{tick},airport_waiting,{name},{waiting}\n')
+            rows.append(f'{tick},airport_parked,{name},{parked}\n')
+            rows.append(f'{tick},airport_busy_parkings,{name},{busy}\n')
+
+        self._file.write(''.join(rows))
+        self._file.flush()
+
+    def _write_prometheus(self, tick: int):
+        lines = [
+            '# TYPE airsim_tick gauge',
+            f'airsim_tick {tick}',
+            '# TYPE airsim_steps_total counter',
+            f'airsim_steps_total {self._ticks}',
+            '# TYPE airsim_step_seconds_total counter',
+            f'airsim_step_seconds_total{{phase="aircraft"}} {self._aircraft_seconds:.9f}',
+            f'airsim_step_seconds_total{{phase="airport"}} {self._airport_seconds:.9f}',
+            '# TYPE airsim_aircrafts gauge',
+        ]
+        lines += [f'airsim_aircrafts{{status="{x}"}} {self._status[x]}' for x in STATUSES]
+
+        airports = list(self._airports())
+        for metric, column in (('waiting', 1), ('parked', 2), ('busy_parkings', 3)):
+            lines.append(f'# TYPE airsim_airport_{metric} gauge')
+            lines += [f'airsim_airport_{metric}{{airport="{_label(x[0].name)}"}} {x[column]}' for x in airports]
+
+        # коллектор не должен увидеть наполовину записанный файл
+        temporary = self._path + '.tmp'
+        with open(temporary, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+        os.replace(temporary, self._path)
+
+    @staticmethod
+    def _status_of(aircraft) -> str:
+        if aircraft.destroyed:
+            return 'destroyed'
+        return _STATUS_NAMES[aircraft.status]
+
+    def _on_departed(self, aircraft, airport):
+        self._status['landed'] -= 1
+        self._status['en_route'] += 1
+
+    def _on_landing_requested(self, aircraft, airport):
+        self._status['en_route'] -= 1
+        self._status['landing'] += 1
+
+    def _on_landed(self, aircraft, airport):
+        self._status['landing'] -= 1
+        self._status['landed'] += 1
+
+    def _on_destroyed(self, aircraft, airport):
+        self._status['en_route' if airport is None else 'landing'] -= 1
+        self._status['destroyed'] += 1
+
+def _csv_quote(text: str) -> str:
+    if any(x in text for x in ',"\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+def _label(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
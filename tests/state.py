@@ -0,0 +1,32 @@
+# сравнимое состояние модели: всё, что видно снаружи, плюс счётчики потоков случайных чисел
+
+def model_state(model) -> tuple:
+    aircrafts = [(x.name, round(x.pos.x, 6), round(x.pos.y, 6), x.time, x.status.name, x.destroyed,
+                  x.destination.name, x.visits, tuple(y.name for y in x.visited_airports), x.rng.draws)
+                 for x in model.aircrafts]
+    airports = [(x.info(), x.busy_parkings, x.rng.draws) for x in model.airports]
+    return model.tick, aircrafts, airports
+
+# настройки модели, с которыми проверяются запись, воспроизведение и снимки
+def _uniform(model):
+    pass
+
+def _weighted(model):
+    # общая таблица с самим аэропортом вылета: выбор может тянуть несколько чисел
+    from departures import by_capacity
+
+    model.set_destination_weights(by_capacity, per_origin=False)
+
+def _routes(model):
+    # продолжение маршрута не тянет чисел вовсе, а конечная цель должна пережить
+    # и журнал, и снимок
+    model.set_route_planning(150)
+
+SETUPS = {'uniform': _uniform, 'weighted': _weighted, 'routes': _routes}
+
+def build(setup):
+    import scenario
+
+    model = scenario.generate(30, 300, seed=11)
+    setup(model)
+    return model
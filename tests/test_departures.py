@@ -0,0 +1,21 @@
+import pytest
+
+from airport import Airport
+from departures import DestinationTable, by_capacity
+from purpose import Purpose
+from rng import Stream
+from vector import Vec2d
+
+def test_shared_weights_reject_origin_holding_all_weight():
+    # общая таблица строится при вылете из B, но из A лететь некуда: у остальных вес 0
+    a = Airport('A', Vec2d(0, 0), 5, Purpose.General)
+    b = Airport('B', Vec2d(10, 0), 0, Purpose.General)
+    c = Airport('C', Vec2d(20, 0), 0, Purpose.General)
+    table = DestinationTable(by_capacity, per_origin=False)
+    for airport in (a, b, c):
+        table.add(airport)
+
+    rng = Stream('test')
+    assert table.choose(Purpose.Military, b, rng) is a
+    with pytest.raises(ValueError, match='leaving A'):
+        table.choose(Purpose.Military, a, rng)
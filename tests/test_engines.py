@@ -0,0 +1,46 @@
+import pytest
+
+import headless
+import scenario
+from departures import by_capacity
+from state import model_state
+
+# другие движки должны давать то же состояние, что и объектный, в том числе когда
+# модель шагают кусками разной длины
+
+ENGINES = ['fleet', 'event']
+
+CHUNKS = [1, 2, 50, 97, 600, 1250]
+
+def _states(engine: str, seed: int, setup=None) -> list:
+    model = scenario.generate(20, 200, headless.engine(engine), seed)
+    if setup is not None:
+        setup(model)
+    states = []
+    for ticks in CHUNKS:
+        headless.run(model, ticks)
+        states.append(model_state(model))
+    return states
+
+@pytest.mark.parametrize('seed', [1, 2])
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engine_matches_object(engine, seed):
+    assert _states(engine, seed) == _states('object', seed)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engine_matches_object_with_weights(engine):
+    def setup(model):
+        model.set_destination_weights(by_capacity, per_origin=False)
+    assert _states(engine, 3, setup) == _states('object', 3, setup)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engine_matches_object_with_conflicts(engine):
+    def setup(model):
+        model.set_conflict_separation(10)
+    assert _states(engine, 5, setup) == _states('object', 5, setup)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engine_matches_object_with_routes(engine):
+    def setup(model):
+        model.set_route_planning(150)
+    assert _states(engine, 4, setup) == _states('object', 4, setup)
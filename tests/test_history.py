@@ -0,0 +1,73 @@
+import pytest
+
+from history import HistoryError, HistorySpill, VisitHistory, read_spill
+from replay import ReplayWriter
+
+# кольцо посещений после переполнения и восстановления ведёт себя как полный список,
+# урезанный до последних size номеров
+
+def test_ring_wraps_around():
+    history = VisitHistory(16)
+    visits = list(range(40))
+    for i in visits:
+        history.append(i)
+
+    assert len(history) == 16
+    assert history.total == 40
+    assert list(history) == visits[-16:]
+    assert list(history.recent()) == visits[::-1][:16]
+    assert list(history.recent(3)) == [39, 38, 37]
+
+def test_restore_keeps_total():
+    visits = list(range(25))
+    history = VisitHistory.restore(visits[-10:], total=25)
+    assert len(history) == 10
+    assert history.total == 25
+    assert list(history) == visits[-10:]
+
+    # дальше кольцо продолжается так же, как у самолёта, который летал без перерыва
+    original = VisitHistory()
+    for i in visits:
+        original.append(i)
+    for i in range(25, 60):
+        history.append(i)
+        original.append(i)
+        # восстановлено 10 номеров, так что первые 6 шагов кольцо короче исходного
+        assert list(history) == list(original)[-len(history):]
+        assert list(history.recent()) == list(original.recent(len(history)))
+        assert history.total == original.total
+    assert len(history) == len(original) == 16
+
+def test_spill_round_trip(tmp_path):
+    path = tmp_path / 'visits.bin'
+    spill = HistorySpill(path)
+    spill.append(1, 0, 3)
+    spill.append(2, 1, 4)
+    spill.close()
+
+    # дописывание в существующую историю продолжает тот же файл
+    spill = HistorySpill(path)
+    spill.append(3, 0, 5)
+    spill.close()
+
+    records = read_spill(path)
+    assert records['tick'].tolist() == [1, 2, 3]
+    assert read_spill(path, aircraft=0)['airport'].tolist() == [3, 5]
+
+def test_spill_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'departures.log'
+    writer = ReplayWriter(path)
+    writer.close()
+    size = path.stat().st_size
+
+    with pytest.raises(HistoryError):
+        HistorySpill(path)
+    assert path.stat().st_size == size
+    with pytest.raises(HistoryError):
+        read_spill(path)
+
+def test_read_empty_spill(tmp_path):
+    path = tmp_path / 'visits.bin'
+    path.write_bytes(b'')
+    with pytest.raises(HistoryError):
+        read_spill(path)
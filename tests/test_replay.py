@@ -0,0 +1,28 @@
+import pytest
+
+import headless
+from state import SETUPS, build, model_state
+
+# запись вылетов -> воспроизведение -> продолжение без журнала даёт то же, что и
+# исходный прогон, включая счётчики потоков: иначе продолжение разойдётся
+
+@pytest.mark.parametrize('name', sorted(SETUPS))
+def test_replay_then_continue(tmp_path, name):
+    setup = SETUPS[name]
+    log = tmp_path / 'departures.log'
+
+    recorded = build(setup)
+    recorded.start_recording(log)
+    headless.run(recorded, 2000)
+    recorded.stop_recording()
+
+    replayed = build(setup)
+    replayed.replay_from(log)
+    headless.run(replayed, 2000)
+    assert replayed.replay.remaining == 0
+    replayed.stop_replay()
+    assert model_state(replayed) == model_state(recorded)
+
+    headless.run(recorded, 1500)
+    headless.run(replayed, 1500)
+    assert model_state(replayed) == model_state(recorded)
@@ -0,0 +1,22 @@
+import pytest
+
+import headless
+import scenario
+from sharding import ShardedRun
+from state import model_state
+
+# области в отдельных процессах дают то же, что одна модель
+
+@pytest.mark.parametrize('shards,window', [(2, 1), (3, 100)])
+def test_sharded_matches_single(shards, window):
+    single = scenario.generate(40, 400, seed=5)
+    headless.run(single, 300)
+    headless.run(single, 2000)
+
+    start = scenario.generate(40, 400, seed=5)
+    headless.run(start, 300)
+    with ShardedRun(start, shards, window) as sharded:
+        sharded.advance(2000)
+        collected = sharded.collect()
+
+    assert model_state(collected) == model_state(single)
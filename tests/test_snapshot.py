@@ -0,0 +1,25 @@
+import pytest
+
+import headless
+from model import Model
+from state import SETUPS, build, model_state
+
+# снимок -> загрузка -> продолжение даёт то же, что и непрерывный прогон
+
+@pytest.mark.parametrize('name', sorted(SETUPS))
+def test_snapshot_then_continue(tmp_path, name):
+    setup = SETUPS[name]
+    path = tmp_path / 'state.snap'
+
+    original = build(setup)
+    headless.run(original, 2000)
+    original.save_snapshot(path)
+
+    resumed = Model.load_snapshot(path)
+    # функции весов в снимок не попадают и задаются заново, как при запуске
+    setup(resumed)
+    assert model_state(resumed) == model_state(original)
+
+    headless.run(original, 1500)
+    headless.run(resumed, 1500)
+    assert model_state(resumed) == model_state(original)
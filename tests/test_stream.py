@@ -0,0 +1,84 @@
+import asyncio
+import socket
+
+import numpy as np
+import pytest
+
+import headless
+import scenario
+from stream import DELTA, HELLO, KEYFRAME, StateMirror, StateServer, read_frame
+from trajectory import aircraft_columns
+
+# копия у клиента, собранная из ключевого кадра и дельт, совпадает с моделью, а
+# клиент, который не читает, не останавливает модель и потом получает ключевой кадр
+
+def _assert_mirrors(mirror, model):
+    assert mirror.tick == model.tick
+    columns = aircraft_columns(model)
+    assert np.array_equal(mirror.aircrafts['index'], np.arange(len(model.aircrafts)))
+    assert np.array_equal(mirror.aircrafts['x'], columns['x'].astype(np.float32))
+    assert np.array_equal(mirror.aircrafts['y'], columns['y'].astype(np.float32))
+    assert np.array_equal(mirror.aircrafts['state'] & 0x7f, columns['status'])
+    assert np.array_equal(mirror.aircrafts['state'] & 0x80 != 0, columns['destroyed'])
+    assert mirror.airports['waiting'].tolist() == [len(x.waiting_aircrafts) for x in model.airports]
+    assert mirror.airports['parked'].tolist() == [len(x.parked_aircrafts) for x in model.airports]
+    assert mirror.airports['busy'].tolist() == [x.busy_parkings for x in model.airports]
+
+async def _read_until(reader, mirror, tick: int, kinds: list):
+    while mirror.tick != tick:
+        kind, frame_tick, meta, aircrafts, airports = await read_frame(reader)
+        mirror.apply(kind, frame_tick, meta, aircrafts, airports)
+        kinds.append((kind, frame_tick))
+
+@pytest.mark.parametrize('engine', ['object', 'fleet'])
+def test_mirror_follows_model(engine):
+    async def session():
+        model = scenario.generate(20, 200, headless.engine(engine), seed=4)
+        async with StateServer(model, port=0) as server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            mirror = StateMirror()
+            kinds = []
+            # ключевой кадр уходит сразу после подключения, до первого шага
+            await asyncio.wait_for(_read_until(reader, mirror, model.tick, kinds), 10)
+
+            reading = asyncio.ensure_future(_read_until(reader, mirror, model.tick + 300, kinds))
+            assert await asyncio.wait_for(server.run(300), 30) == 300
+            await asyncio.wait_for(reading, 10)
+            writer.close()
+
+        assert kinds[0][0] == HELLO and kinds[1][0] == KEYFRAME
+        assert DELTA in {x for x, _ in kinds[2:]}
+        assert mirror.meta['tick'] == 0 and len(mirror.meta['aircrafts']) == len(model.aircrafts)
+        _assert_mirrors(mirror, model)
+
+    asyncio.run(session())
+
+def test_stalled_client_is_resynced():
+    async def session():
+        model = scenario.generate(30, 600, seed=7)
+        async with StateServer(model, port=0, max_pending=1) as server:
+            # маленький приёмный буфер, чтобы отправка упёрлась в клиента быстрее
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.setblocking(False)
+            await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', server.port))
+            reader, writer = await asyncio.open_connection(sock=sock)
+            while not server.clients:
+                await asyncio.sleep(0)
+
+            # клиент ничего не читает, а модель всё равно проходит все такты
+            assert await asyncio.wait_for(server.run(3000), 60) == 3000
+
+            mirror = StateMirror()
+            kinds = []
+            await asyncio.wait_for(_read_until(reader, mirror, model.tick, kinds), 30)
+            writer.close()
+
+        assert kinds[0][0] == HELLO and kinds[1][0] == KEYFRAME
+        # часть дельт выброшена, и через пропущенные такты клиента перенёс ключевой кадр
+        assert any(kind == KEYFRAME and tick > previous + 1
+                   for (_, previous), (kind, tick) in zip(kinds[1:], kinds[2:]))
+        assert len(kinds) - 2 < 3000
+        _assert_mirrors(mirror, model)
+
+    asyncio.run(session())
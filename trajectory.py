@@ -0,0 +1,361 @@
+import json
+import os
+
+import numpy as np
+
+from events import EventKind
+
+# Треки самолётов в каталоге из столбцов .npy. Файлы выделяются сразу на целый кусок
+# и пишутся через memmap, а на диск сбрасываются, когда кусок заполнен. meta.json
+# описывает куски и сколько в каждом заполнено, поэтому читатель отображает в память
+# только те куски, что попадают в запрошенный диапазон тактов.
+#
+# dense - каждый every-й такт состояние всех самолётов, столбцы формы (такты, самолёты);
+# changes - строка на каждое изменение состояния (вылет, запрос посадки, посадка, гибель),
+# столбцы длины chunk.
+
+VERSION = 1
+
+# столбцы состояния самолёта: как в снимке, status - AircraftStatus.value
+COLUMNS = {
+    'x': np.float64,
+    'y': np.float64,
+    'status': np.uint8,
+    'destroyed': np.bool_,
+    'destination': np.int32,
+}
+
+# в режиме changes у строки ещё такт и номер самолёта
+_CHANGE_COLUMNS = {'tick': np.int64, 'aircraft': np.int32, **COLUMNS}
+
+# кусок dense по умолчанию - около 64 МиБ
+_CHUNK_BYTES = 64 << 20
+_CHANGES_CHUNK = 1 << 20
+
+def aircraft_columns(model, airport_index: dict | None = None) -> dict[str, np.ndarray]:
+    # состояние всех самолётов столбцами COLUMNS; без airport_index - без destination
+    fleet = getattr(model, 'fleet', None)
+    if fleet is not None:
+        # векторный движок и так держит всё в столбцах
+        n = len(fleet)
+        columns = {
+            'x': fleet._x[:n],
+            'y': fleet._y[:n],
+            'status': fleet._status[:n],
+            'destroyed': fleet._destroyed[:n],
+        }
+        if airport_index is not None:
+            columns['destination'] = fleet._dest[:n]
+        return columns
+
+    aircrafts = model.aircrafts
+    n = len(aircrafts)
+    positions = [x.pos for x in aircrafts]
+    columns = {
+        'x': np.fromiter((p.x for p in positions), np.float64, n),
+        'y': np.fromiter((p.y for p in positions), np.float64, n),
+        'status': np.fromiter((x.status.value for x in aircrafts), np.uint8, n),
+        'destroyed': np.fromiter((x.destroyed for x in aircrafts), np.bool_, n),
+    }
+    if airport_index is not None:
+        columns['destination'] = np.fromiter((airport_index[x.destination] for x in aircrafts), np.int32, n)
+    return columns
+
+class TrajectoryError(ValueError):
+    pass
+
+class TrajectoryWriter:
+    def __init__(self, model, path, every: int = 1, changes: bool = False, chunk: int | None = None):
+        if every < 1:
+            raise ValueError(f"recording interval must be positive, got {every}")
+
+        self._model = model
+        self._path = os.fspath(path)
+        self._every = every
+        self._changes = changes
+        self._chunk = chunk
+
+        os.makedirs(self._path, exist_ok=True)
+        if os.path.exists(self._meta_path()):
+            raise TrajectoryError(f"{self._path} already holds a recording")
+
+        self._chunks = []
+        self._columns = None
+        self._row = 0
+        self._width = 0
+        self._airport_index = {}
+
+        if changes:
+            events = model.events
+            events.subscribe(EventKind.Departed, self._on_change)
+            events.subscribe(EventKind.LandingRequested, self._on_change)
+            events.subscribe(EventKind.Landed, self._on_change)
+            events.subscribe(EventKind.Destroyed, self._on_change)
+            self._aircraft_index = {x: i for i, x in enumerate(model.aircrafts)}
+            # начальное состояние - такая же строка для каждого самолёта
+            for aircraft in model.aircrafts:
+                self._on_change(aircraft, None)
+        else:
+            self.capture()
+
+    @property
+    def every(self) -> int:
+        return self._every
+
+    def next_capture(self, tick: int) -> int:
+        return (tick // self._every + 1) * self._every
+
+    def advance(self, ticks: int | None, until=None) -> int:
+        # шагает модель до каждого такта записи и снимает состояние; в режиме changes
+        # строки пишут события, так что модель просто шагает
+        import headless
+
+        if self._changes:
+            return headless.run(self._model, ticks, until)
+
+        done = 0
+        while ticks is None or done < ticks:
+            step = self.next_capture(self._model.tick) - self._model.tick
+            if ticks is not None:
+                step = min(step, ticks - done)
+            jumped = headless.run(self._model, step, until)
+            done += jumped
+            if jumped < step:
+                break
+            if self._model.tick % self._every == 0:
+                self.capture()
+        return done
+
+    def capture(self):
+        model = self._model
+        n = len(model.aircrafts)
+        if self._columns is None or self._row == len(self._columns['x']) or n != self._width:
+            self._new_chunk(n)
+
+        row = self._row
+        columns = self._columns
+        for name, values in self._state().items():
+            columns[name][row, :n] = values
+        columns['tick'][row] = model.tick
+        self._row += 1
+
+    def _state(self) -> dict:
+        model = self._model
+        if len(self._airport_index) != len(model.airports):
+            self._airport_index = {x: i for i, x in enumerate(model.airports)}
+        return aircraft_columns(model, self._airport_index)
+
+    def _on_change(self, aircraft, airport):
+        if self._columns is None or self._row == len(self._columns['tick']):
+            self._new_chunk(0)
+
+        index = self._aircraft_index.get(aircraft)
+        if index is None:
+            # самолёт добавлен после начала записи
+            self._aircraft_index = {x: i for i, x in enumerate(self._model.aircrafts)}
+            index = self._aircraft_index[aircraft]
+        if len(self._airport_index) != len(self._model.airports):
+            self._airport_index = {x: i for i, x in enumerate(self._model.airports)}
+
+        row = self._row
+        columns = self._columns
+        pos = aircraft.pos
+        columns['tick'][row] = self._model.tick
+        columns['aircraft'][row] = index
+        columns['x'][row] = pos.x
+        columns['y'][row] = pos.y
+        columns['status'][row] = aircraft.status.value
+        columns['destroyed'][row] = aircraft.destroyed
+        columns['destination'][row] = self._airport_index[aircraft.destination]
+        self._row += 1
+
+    def _new_chunk(self, width: int):
+        self._finish_chunk()
+
+        if self._changes:
+            rows = self._chunk or _CHANGES_CHUNK
+            shapes = {name: (rows,) for name in _CHANGE_COLUMNS}
+            dtypes = _CHANGE_COLUMNS
+        else:
+            entry = sum(np.dtype(x).itemsize for x in COLUMNS.values())
+            rows = self._chunk or max(1, _CHUNK_BYTES // max(1, width * entry))
+            shapes = {name: (rows, width) for name in COLUMNS}
+            shapes['tick'] = (rows,)
+            dtypes = {**COLUMNS, 'tick': np.int64}
+
+        number = len(self._chunks)
+        self._columns = {
+            name: np.lib.format.open_memmap(self._column_path(number, name), mode='w+',
+                                            dtype=dtypes[name], shape=shapes[name])
+            for name in shapes
+        }
+        self._chunks.append({'rows': 0, 'width': width})
+        self._width = width
+        self._row = 0
+
+    def _finish_chunk(self):
+        if self._columns is None:
+            return
+        for column in self._columns.values():
+            column.flush()
+        chunk = self._chunks[-1]
+        chunk['rows'] = self._row
+        if self._row:
+            chunk['first'] = int(self._columns['tick'][0])
+            chunk['last'] = int(self._columns['tick'][self._row - 1])
+        self._write_meta()
+
+    def flush(self):
+        if self._columns is not None:
+            self._finish_chunk()
+
+    def close(self):
+        if self._model is None:
+            return
+        if self._changes:
+            events = self._model.events
+            events.unsubscribe(EventKind.Departed, self._on_change)
+            events.unsubscribe(EventKind.LandingRequested, self._on_change)
+            events.unsubscribe(EventKind.Landed, self._on_change)
+            events.unsubscribe(EventKind.Destroyed, self._on_change)
+
+        self._finish_chunk()
+        self._shrink_chunk()
+        self._model = None
+
+    def _shrink_chunk(self):
+        # последний кусок выделен целиком, а заполнен обычно частично: файлы переписываются
+        # по записанным строкам, чтобы на диске не оставались десятки мегабайт нулей
+        if self._columns is None:
+            return
+        rows = self._row
+        number = len(self._chunks) - 1
+        written = {name: np.array(column[:rows]) for name, column in self._columns.items()
+                   if len(column) != rows}
+        # отображения закрываются раньше, чем файлы под ними перезаписываются
+        self._columns = None
+        for name, data in written.items():
+            np.save(self._column_path(number, name), data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_meta(self):
+        meta = {
+            'version': VERSION,
+            'mode': 'changes' if self._changes else 'dense',
+            'every': self._every,
+            'chunks': self._chunks,
+        }
+        temporary = self._meta_path() + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(meta, file)
+        os.replace(temporary, self._meta_path())
+
+    def _meta_path(self) -> str:
+        return os.path.join(self._path, 'meta.json')
+
+    def _column_path(self, number: int, name: str) -> str:
+        return os.path.join(self._path, f'{number:06d}.{name}.npy')
+
+class TrajectoryReader:
+    def __init__(self, path):
+        self._path = os.fspath(path)
+        try:
+            with open(os.path.join(self._path, 'meta.json')) as file:
+                meta = json.load(file)
+        except FileNotFoundError:
+            raise TrajectoryError(f"{self._path} is not a trajectory recording") from None
+        if meta.get('version') != VERSION:
+            raise TrajectoryError(f"unsupported trajectory version {meta.get('version')}")
+
+        self._mode = meta['mode']
+        self._every = meta['every']
+        self._chunks = [x for x in meta['chunks'] if x['rows']]
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def every(self) -> int:
+        return self._every
+
+    @property
+    def aircrafts(self) -> int:
+        if self._mode == 'dense':
+            return max((x['width'] for x in self._chunks), default=0)
+        return max((int(self._column(i, 'aircraft').max()) + 1 for i in range(len(self._chunks))), default=0)
+
+    @property
+    def ticks(self) -> tuple[int, int] | None:
+        # первый и последний записанный такт
+        if not self._chunks:
+            return None
+        return self._chunks[0]['first'], self._chunks[-1]['last']
+
+    def _column(self, number: int, name: str) -> np.ndarray:
+        column = np.load(os.path.join(self._path, f'{number:06d}.{name}.npy'), mmap_mode='r')
+        return column[:self._chunks[number]['rows']]
+
+    def _overlapping(self, start, stop):
+        for number, chunk in enumerate(self._chunks):
+            if start is not None and chunk['last'] < start:
+                continue
+            if stop is not None and chunk['first'] >= stop:
+                break
+            yield number
+
+    def track(self, aircraft: int, start: int | None = None, stop: int | None = None) -> dict[str, np.ndarray]:
+        # такты [start, stop) одного самолёта; читаются только нужные куски и столбец самолёта
+        return self.window(start, stop, [aircraft], squeeze=True)
+
+    def window(self, start: int | None = None, stop: int | None = None, aircrafts=None,
+               squeeze: bool = False) -> dict[str, np.ndarray]:
+        parts = []
+        for number in self._overlapping(start, stop):
+            ticks = self._column(number, 'tick')
+            lo = 0 if start is None else int(np.searchsorted(ticks, start, 'left'))
+            hi = len(ticks) if stop is None else int(np.searchsorted(ticks, stop, 'left'))
+            if lo >= hi:
+                continue
+
+            if self._mode == 'changes':
+                rows = slice(lo, hi)
+                part = {name: self._column(number, name)[rows] for name in _CHANGE_COLUMNS}
+                if aircrafts is not None:
+                    keep = np.isin(part['aircraft'], aircrafts)
+                    part = {name: x[keep] for name, x in part.items()}
+                parts.append(part)
+                continue
+
+            width = self._chunks[number]['width']
+            selected = np.arange(width) if aircrafts is None else np.asarray(aircrafts)
+            if selected.size and selected.max() >= width:
+                raise TrajectoryError(f"aircraft {int(selected.max())} is not in the recording at tick {int(ticks[lo])}")
+            part = {'tick': np.array(ticks[lo:hi])}
+            for name in COLUMNS:
+                part[name] = self._column(number, name)[lo:hi][:, selected]
+            parts.append(part)
+
+        if self._mode == 'changes':
+            names = _CHANGE_COLUMNS
+            return {name: np.concatenate([x[name] for x in parts]) if parts else np.empty(0, dtype)
+                    for name, dtype in names.items()}
+
+        if not parts:
+            width = len(aircrafts) if aircrafts is not None else 0
+            result = {name: np.empty((0, width), dtype) for name, dtype in COLUMNS.items()}
+            result['tick'] = np.empty(0, np.int64)
+        else:
+            if len({x['x'].shape[1] for x in parts}) > 1:
+                raise TrajectoryError("the number of aircrafts changed inside the window; pass aircrafts explicitly")
+            result = {name: np.concatenate([x[name] for x in parts]) for name in parts[0]}
+
+        if squeeze:
+            for name in COLUMNS:
+                result[name] = result[name][:, 0]
+        return result
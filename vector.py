@@ -1,7 +1,8 @@
 import math
-import pyray as pr
 
 class Vec2d:
+    __slots__ = ('x', 'y')
+
     def __repr__(self):
         return "(" + str(self.x) + "," + str(self.y) + ")"
     
@@ -28,7 +29,7 @@ class Vec2d:
         return Vec2d(-self.x, -self.y)
 
     def length(self):
-        return math.sqrt(self.x ** 2 + self.y ** 2)
+        return math.sqrt(self.x * self.x + self.y * self.y)
     def normalize(self):
         length = self.length()
         if length == 0:
@@ -36,5 +37,37 @@ class Vec2d:
         else:
             return Vec2d(self.x / length, self.y / length)
         
+    # изменяющие на месте версии для горячих мест, где не хочется создавать объекты
+    def assign(self, point):
+        self.x = point.x
+        self.y = point.y
+        return self
+
+    def iadd(self, point):
+        self.x = self.x + point.x
+        self.y = self.y + point.y
+        return self
+
+    def sub_into(self, point, out):
+        out.x = self.x - point.x
+        out.y = self.y - point.y
+        return out
+
+    def scale_(self, num):
+        self.x = num * self.x
+        self.y = num * self.y
+        return self
+
+    def normalize_into(self, out):
+        length = self.length()
+        if length == 0:
+            out.x = 0
+            out.y = 0
+        else:
+            out.x = self.x / length
+            out.y = self.y / length
+        return out
+        
     def Vector2(self):
+        import pyray as pr
         return pr.Vector2(self.x, self.y)
\ No newline at end of file